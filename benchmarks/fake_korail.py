@@ -0,0 +1,451 @@
+"""코레일 대신 사용할 로컬 가짜 서버 (좌석 반환 시뮬레이터 포함)
+
+korail2가 사용하는 로그인(common.code.do, login.Login), 열차 검색
+(seatMovie.ScheduleView), 예약(certification.TicketReservation)과 예약 조회
+(reservation.ReservationView) 요청에 같은 형식으로 응답한다. 봇이나 worker를
+KORAIL_BASE_URL=http://127.0.0.1:8765 로 실행하면 실제 코레일 대신 이 서버로
+요청한다.
+
+노선과 날짜마다 열차 시간표를 만들고, 매진된 열차의 좌석이 임의의 시각에
+반환되는 상황을 흉내낸다. 좌석 반환은 노선마다 분당 `release_rate`회의 Poisson
+과정으로 일어나고, 반환된 좌석은 평균 `hold`초 뒤에 다른 사람이 가져간다.
+클라이언트가 그 전에 예약하면 좌석 반환부터 예약까지 걸린 시간을 기록한다.
+모든 응답에는 `latency_ms` 만큼의 지연을 두고, `error_rate`의 비율로 500 응답을
+돌려준다. 통계는 GET /stats, 초기화는 POST /reset 으로 확인한다.
+
+    pipenv run python benchmarks/fake_korail.py --port 8765 --release-rate 6 --hold 5
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import secrets
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+MOBILE = "/classes/com.korail.mobile"
+
+NO_RESULTS = "P100"
+NEED_TO_LOGIN = "P058"
+SOLD_OUT = "ERR211161"
+
+# (열차 그룹, 열차 종류 코드, 열차 종류 이름, 소요 시간(분))
+TRAIN_KINDS = (
+    ("100", "00", "KTX", 150),
+    ("101", "01", "새마을호", 270),
+    ("102", "02", "무궁화호", 320),
+)
+PAGE_SIZE = 10  # 코레일이 한 번에 돌려주는 열차 수
+
+
+class SeatSimulator:
+    """노선별 열차 시간표와 좌석 반환을 흉내내는 simulator
+
+    열차는 노선과 날짜별로 `first_departure`부터 `headway`분 간격으로 `trains`대를
+    만들고, `sold_out`의 비율만큼은 처음부터 매진 상태로 둔다. 매진되지 않은 열차에는
+    일반실과 특실이 `seats`석씩 있다.
+
+    좌석 반환은 요청이 들어올 때 지난 시간만큼 몰아서 만든다. 반환된 좌석은 노선의
+    열차 중 하나에 무작위로 생기고(`special_ratio`의 비율로 특실), 평균 `hold`초
+    (지수 분포) 뒤에는 다른 사람이 예약한 것으로 보고 사라진다.
+
+    Args:
+        release_rate (float): 노선별 분당 좌석 반환 횟수. 기본값 6
+        hold (float): 반환된 좌석이 남아 있는 평균 시간(초). 기본값 5
+        latency_ms (float): 응답 지연 평균(ms, 0.5~1.5배 사이 균등 분포). 기본값 50
+        error_rate (float): 500 응답을 돌려줄 비율. 기본값 0
+        trains (int): 노선별 열차 수. 기본값 40
+        headway (int): 열차 간격(분). 기본값 25
+        first_departure (str): 첫 열차 출발 시각 (HHMM). 기본값 "0500"
+        sold_out (float): 처음부터 매진인 열차의 비율. 기본값 1.0
+        seats (int): 매진되지 않은 열차의 객실별 좌석 수. 기본값 50
+        special_ratio (float): 반환 좌석 중 특실의 비율. 기본값 0.2
+        seed (int, optional): 난수 seed. 같은 seed면 같은 시간표와 반환 순서
+    """
+
+    def __init__(
+        self,
+        release_rate=6.0,
+        hold=5.0,
+        latency_ms=50.0,
+        error_rate=0.0,
+        trains=40,
+        headway=25,
+        first_departure="0500",
+        sold_out=1.0,
+        seats=50,
+        special_ratio=0.2,
+        seed=None,
+    ):
+        self.release_rate = release_rate
+        self.hold = hold
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.trains = trains
+        self.headway = headway
+        self.first_departure = first_departure
+        self.sold_out = sold_out
+        self.seats = seats
+        self.special_ratio = special_ratio
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._sessions = {}
+        self._reservations = {}
+        self._pnr = itertools.count(1)
+        self.reset()
+
+    def reset(self):
+        """좌석 상태와 통계 초기화 (시간표와 로그인 세션은 유지)"""
+        with self._lock:
+            for route in self._routes.values():
+                self._reset_route(route)
+            self._reservations.clear()
+            self.started_at = time.monotonic()
+            self.latencies = []
+            self.stats = {
+                "requests": {},
+                "injected_errors": 0,
+                "releases": 0,
+                "taken_by_others": 0,
+                "reserved": 0,
+                "sold_out_replies": 0,
+            }
+
+    # 요청 처리
+
+    def issue_login_key(self):
+        return {"idx": "1", "key": secrets.token_hex(16)}
+
+    def login(self, member_no):
+        key = secrets.token_hex(8)
+        with self._lock:
+            self._sessions[key] = member_no
+        return {
+            "strResult": "SUCC",
+            "Key": key,
+            "strMbCrdNo": f"{abs(hash(member_no)) % 10**10:010d}",
+            "strCustNm": member_no,
+            "strEmailAdr": f"{member_no}@example.com",
+        }
+
+    def search(self, src, dst, date, hour, train_group):
+        """txtGoHour 이후에 출발하는 열차를 PAGE_SIZE대까지 반환"""
+        now = time.monotonic()
+        with self._lock:
+            route = self._route(src, dst, date)
+            self._advance(route, now)
+            page = [
+                train
+                for train in route["trains"]
+                if train["depTime"] >= hour
+                and (train_group == "109" or train["group"] == train_group)
+            ][:PAGE_SIZE]
+            infos = [self._train_info(route, train, now) for train in page]
+        if not infos:
+            return _fail(NO_RESULTS, "조회 결과가 없습니다.")
+        return {"strResult": "SUCC", "trn_infos": {"trn_info": infos}}
+
+    def reserve(self, key, date, train_no, seat_class):
+        """좌석이 남아 있으면 예약하고 예약 번호 반환, 없으면 매진 응답"""
+        now = time.monotonic()
+        with self._lock:
+            member = self._sessions.get(key)
+            if member is None:
+                return _fail(NEED_TO_LOGIN, "로그인이 필요합니다.")
+            for route in self._routes.values():
+                if route["date"] != date:
+                    continue
+                self._advance(route, now)
+                train = route["byNo"].get(train_no)
+                if train is None:
+                    continue
+                cls = "special" if seat_class == "2" else "general"
+                if train["seats"][cls] > 0:
+                    train["seats"][cls] -= 1
+                    return self._reserved(route, train, member)
+                released = route["open"].get((train_no, cls))
+                if released:
+                    released_at, _ = released.pop(0)
+                    self.latencies.append(now - released_at)
+                    return self._reserved(route, train, member)
+                break
+            self.stats["sold_out_replies"] += 1
+            return _fail(SOLD_OUT, "잔여석이 없습니다.")
+
+    def reservations(self, key):
+        with self._lock:
+            member = self._sessions.get(key)
+            if member is None:
+                return _fail(NEED_TO_LOGIN, "로그인이 필요합니다.")
+            infos = [
+                {"train_infos": {"train_info": [info]}}
+                for info in self._reservations.get(member, [])
+            ]
+        if not infos:
+            return _fail(NO_RESULTS, "예약 내역이 없습니다.")
+        return {"strResult": "SUCC", "jrny_infos": {"jrny_info": infos}}
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            return {
+                **self.stats,
+                "elapsed_sec": round(time.monotonic() - self.started_at, 1),
+                "release_to_reservation_ms": _summary(latencies),
+            }
+
+    # 시간표와 좌석 상태
+
+    def _route(self, src, dst, date):
+        key = (src, dst, date)
+        route = self._routes.get(key)
+        if route is not None:
+            return route
+
+        start = datetime.strptime(date + self.first_departure, "%Y%m%d%H%M")
+        trains = []
+        for index in range(self.trains):
+            group, clsf, name, minutes = TRAIN_KINDS[index % len(TRAIN_KINDS)]
+            departure = start + timedelta(minutes=self.headway * index)
+            if departure.strftime("%Y%m%d") != date:
+                break
+            arrival = departure + timedelta(minutes=minutes)
+            trains.append(
+                {
+                    "no": f"{index + 1:05d}",
+                    "group": group,
+                    "clsf": clsf,
+                    "name": name,
+                    "depTime": departure.strftime("%H%M%S"),
+                    "arrDate": arrival.strftime("%Y%m%d"),
+                    "arrTime": arrival.strftime("%H%M%S"),
+                    "soldOut": self.random.random() < self.sold_out,
+                }
+            )
+        route = {
+            "src": src,
+            "dst": dst,
+            "date": date,
+            "trains": trains,
+            "byNo": {train["no"]: train for train in trains},
+        }
+        self._reset_route(route)
+        self._routes[key] = route
+        return route
+
+    def _reset_route(self, route):
+        for train in route["trains"]:
+            seats = 0 if train["soldOut"] else self.seats
+            train["seats"] = {"general": seats, "special": seats}
+        # (열차 번호, 객실) -> [(반환 시각, 다른 사람이 가져갈 시각)]
+        route["open"] = {}
+        route["clock"] = time.monotonic()
+        route["nextRelease"] = route["clock"] + self._next_release_gap()
+
+    def _next_release_gap(self):
+        if self.release_rate <= 0:
+            return float("inf")
+        return self.random.expovariate(self.release_rate / 60)
+
+    def _advance(self, route, now):
+        # 마지막으로 확인한 뒤 지난 시간 동안의 좌석 반환을 만들고, 만료된 좌석 제거
+        while route["nextRelease"] <= now:
+            released_at = route["nextRelease"]
+            train = self.random.choice(route["trains"])
+            cls = "special" if self.random.random() < self.special_ratio else "general"
+            expires_at = released_at + self.random.expovariate(1 / self.hold)
+            route["open"].setdefault((train["no"], cls), []).append(
+                (released_at, expires_at)
+            )
+            self.stats["releases"] += 1
+            route["nextRelease"] = released_at + self._next_release_gap()
+
+        for seats in route["open"].values():
+            remaining = [seat for seat in seats if seat[1] > now]
+            self.stats["taken_by_others"] += len(seats) - len(remaining)
+            seats[:] = remaining
+        route["clock"] = now
+
+    def _available(self, route, train, cls):
+        return train["seats"][cls] + len(route["open"].get((train["no"], cls), ()))
+
+    def _train_info(self, route, train, now):
+        general = self._available(route, train, "general") > 0
+        special = self._available(route, train, "special") > 0
+        return {
+            **self._schedule(route, train),
+            "h_expct_dlay_hr": "0000",
+            "h_rsv_psb_flg": "Y" if general or special else "N",
+            "h_rsv_psb_nm": "예약가능" if general or special else "매진",
+            "h_gen_rsv_cd": "11" if general else "13",
+            "h_spe_rsv_cd": "11" if special else "13",
+            "h_wait_rsv_flg": "-2" if general or special else "0",
+        }
+
+    def _schedule(self, route, train):
+        return {
+            "h_trn_clsf_cd": train["clsf"],
+            "h_trn_clsf_nm": train["name"],
+            "h_trn_gp_cd": train["group"],
+            "h_trn_no": train["no"],
+            "h_dpt_rs_stn_nm": route["src"],
+            "h_dpt_rs_stn_cd": "0001",
+            "h_dpt_dt": route["date"],
+            "h_dpt_tm": train["depTime"],
+            "h_arv_rs_stn_nm": route["dst"],
+            "h_arv_rs_stn_cd": "0020",
+            "h_arv_dt": train["arrDate"],
+            "h_arv_tm": train["arrTime"],
+            "h_run_dt": route["date"],
+        }
+
+    def _reserved(self, route, train, member):
+        pnr = f"{next(self._pnr):010d}"
+        limit = datetime.now() + timedelta(minutes=20)
+        self._reservations.setdefault(member, []).append(
+            {
+                **self._schedule(route, train),
+                "h_pnr_no": pnr,
+                "h_tot_seat_cnt": "001",
+                "h_ntisu_lmt_dt": limit.strftime("%Y%m%d"),
+                "h_ntisu_lmt_tm": limit.strftime("%H%M%S"),
+                "h_rsv_amt": "00059800",
+            }
+        )
+        self.stats["reserved"] += 1
+        return {"strResult": "SUCC", "h_pnr_no": pnr}
+
+
+def create_app(simulator):
+    """simulator로 응답하는 FastAPI 앱 (app.state.simulator를 바꾸면 다음 요청부터 적용)"""
+    app = FastAPI()
+    app.state.simulator = simulator
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        sim = app.state.simulator
+        name = request.url.path.rsplit(".", 1)[-1]
+        requests_ = sim.stats["requests"]
+        requests_[name] = requests_.get(name, 0) + 1
+        if sim.latency_ms > 0:
+            await asyncio.sleep(sim.latency_ms * sim.random.uniform(0.5, 1.5) / 1000)
+        if sim.error_rate > 0 and sim.random.random() < sim.error_rate:
+            sim.stats["injected_errors"] += 1
+            return PlainTextResponse("Internal Server Error", status_code=500)
+        return await call_next(request)
+
+    @app.post(f"{MOBILE}.common.code.do")
+    async def code():
+        return {"strResult": "SUCC", "app.login.cphd": sim().issue_login_key()}
+
+    @app.post(f"{MOBILE}.login.Login")
+    async def login(request: Request):
+        form = await request.form()
+        return sim().login(form.get("txtMemberNo", ""))
+
+    @app.get(f"{MOBILE}.seatMovie.ScheduleView")
+    async def schedule(request: Request):
+        params = request.query_params
+        return sim().search(
+            params.get("txtGoStart"),
+            params.get("txtGoEnd"),
+            params.get("txtGoAbrdDt"),
+            params.get("txtGoHour", "000000"),
+            params.get("selGoTrain", "109"),
+        )
+
+    @app.get(f"{MOBILE}.certification.TicketReservation")
+    async def reserve(request: Request):
+        params = request.query_params
+        return sim().reserve(
+            params.get("Key"),
+            params.get("txtDptDt1"),
+            params.get("txtTrnNo1"),
+            params.get("txtPsrmClCd1"),
+        )
+
+    @app.get(f"{MOBILE}.reservation.ReservationView")
+    async def reservations(request: Request):
+        return sim().reservations(request.query_params.get("Key"))
+
+    @app.get(f"{MOBILE}.common.logout")
+    async def logout():
+        return {"strResult": "SUCC"}
+
+    @app.get("/stats")
+    async def stats():
+        return sim().snapshot()
+
+    @app.post("/reset")
+    async def reset():
+        sim().reset()
+        return sim().snapshot()
+
+    def sim():
+        return app.state.simulator
+
+    return app
+
+
+def _fail(code, message):
+    return JSONResponse({"strResult": "FAIL", "h_msg_cd": code, "h_msg_txt": message})
+
+
+def _summary(values):
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "p50": round(statistics.median(values) * 1000, 1),
+        "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 1),
+        "max": round(values[-1] * 1000, 1),
+    }
+
+
+def add_simulator_arguments(parser):
+    parser.add_argument("--release-rate", type=float, default=6.0)
+    parser.add_argument("--hold", type=float, default=5.0)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--trains", type=int, default=40)
+    parser.add_argument("--sold-out", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def simulator_from_args(args):
+    return SeatSimulator(
+        release_rate=args.release_rate,
+        hold=args.hold,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        trains=args.trains,
+        sold_out=args.sold_out,
+        seed=args.seed,
+    )
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_simulator_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(simulator_from_args(args)),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
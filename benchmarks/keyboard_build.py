@@ -0,0 +1,110 @@
+"""달력/시간 선택 키보드를 만드는 비용 측정 (callback 한 번당)
+
+캐시 없이 매번 키보드를 새로 만드는 경우(이전 방식과 같은 _build_* 함수)와
+KeyboardCache를 거치는 현재 create_* 함수를 같은 입력 순서로 호출해 호출당
+평균 시간을 비교한다. 달력은 사용자가 ◀️/▶️ 버튼으로 앞뒤 몇 달을 오가는
+상황을, 시간 선택은 출발 시간을 고른 뒤 최대 출발 시간 키보드를 여는 상황을
+흉내낸다.
+
+    pipenv run python benchmarks/keyboard_build.py --calls 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup  # noqa: E402
+
+from telegramBot.callback_data import encode_callback  # noqa: E402
+from telegramBot.calendar_keyboard import _build_calendar, create_calendar  # noqa: E402
+from telegramBot.keyboard_cache import get_keyboard_cache  # noqa: E402
+from telegramBot.time_keyboard import (  # noqa: E402
+    _build_time_keyboard,
+    create_max_time_keyboard,
+    create_time_keyboard,
+)
+
+
+def uncached_time_keyboard(action="time", min_time=None):
+    markup = _build_time_keyboard(action, min_time)
+    if action != "time":
+        return markup
+    current = time.strftime("%H%M")
+    row = [
+        InlineKeyboardButton(
+            "현재 시간", callback_data=encode_callback(action, current)
+        )
+    ]
+    return InlineKeyboardMarkup([row, *markup.inline_keyboard])
+
+
+def calendar_taps(calls, rng):
+    # 이번 달 기준 앞뒤 3달 안에서 이전/다음 버튼을 누르는 순서
+    now = time.localtime()
+    offset = 0
+    taps = []
+    for _ in range(calls):
+        offset = max(-3, min(3, offset + rng.choice((-1, 1))))
+        index = now.tm_year * 12 + now.tm_mon - 1 + offset
+        taps.append((index // 12, index % 12 + 1))
+    return taps
+
+
+def time_taps(calls, rng):
+    # 출발 시간 키보드와, 06:00~23:30 사이에서 고른 시간 이후의 최대 출발 시간 키보드
+    taps = []
+    for _ in range(calls):
+        if rng.random() < 0.5:
+            taps.append(None)
+        else:
+            minutes = rng.randrange(6 * 60, 24 * 60, 30)
+            taps.append(f"{minutes // 60:02d}{minutes % 60:02d}")
+    return taps
+
+
+def measure(func, inputs):
+    started = time.perf_counter()
+    for args in inputs:
+        func(*args)
+    return (time.perf_counter() - started) / len(inputs) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    months = calendar_taps(args.calls, rng)
+    times = [
+        ("time", None) if min_time is None else ("maxtime", min_time)
+        for min_time in time_taps(args.calls, rng)
+    ]
+
+    def cached_time(action, min_time):
+        if action == "time":
+            return create_time_keyboard()
+        return create_max_time_keyboard(min_time)
+
+    results = {
+        "calendar": (
+            measure(_build_calendar, months),
+            measure(create_calendar, months),
+        ),
+        "time": (measure(uncached_time_keyboard, times), measure(cached_time, times)),
+    }
+    for name, (before, after) in results.items():
+        print(
+            f"{name:8} uncached {before:8.1f} us/call   cached {after:8.1f} us/call"
+            f"   x{before / after:.1f}"
+        )
+    print(f"cache    {get_keyboard_cache().snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
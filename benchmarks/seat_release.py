@@ -0,0 +1,172 @@
+"""좌석 반환부터 예약까지 걸리는 시간과 코레일 요청 수를 조회 전략별로 측정
+
+benchmarks/fake_korail.py의 가짜 코레일 서버를 같은 프로세스에서 띄우고
+KORAIL_BASE_URL로 연결한 뒤, 조회 전략마다 `--jobs`개의 예약을 실제
+ReserveHandler.reserve(검색 → 예약 루프)로 `--duration`초 동안 실행한다.
+예약은 각각 좌석 하나를 원하고, 서버는 매진된 노선에서 좌석이 반환되는 상황을
+흉내낸다. 전략마다 예약에 성공한 수, 좌석 반환부터 예약까지 걸린 시간(p50/p95),
+서버가 받은 검색/예약 요청 수와 예약 하나당 검색 수를 출력한다.
+
+조회 전략은 고정 간격(초)이나 "adaptive"(기본 PollScheduler)로 지정하고,
+--targeted 를 지정하면 예약 확인 때처럼 검색 시간 범위의 열차를 정해 두고
+조회한다 (targetTrains).
+
+    pipenv run python benchmarks/seat_release.py --strategies 0.5,1,3,adaptive \\
+        --jobs 4 --duration 60 --release-rate 6 --hold 5 --latency-ms 80
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+
+PORT = 8765
+
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="korail-bench-"))
+os.environ["KORAIL_BASE_URL"] = f"http://127.0.0.1:{PORT}"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import uvicorn  # noqa: E402
+from korail2 import ReserveOption, TrainType  # noqa: E402
+
+from fake_korail import (  # noqa: E402
+    add_simulator_arguments,
+    create_app,
+    simulator_from_args,
+)
+from telegramBot.korail_client import ReserveHandler  # noqa: E402
+from telegramBot.poll_scheduler import PollScheduler  # noqa: E402
+
+
+def start_server(app, port):
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def make_scheduler(strategy, duration):
+    if strategy == "adaptive":
+        return PollScheduler()
+    interval = float(strategy)
+    # 고정 간격이면 duration 동안만 조회하도록 조회 예산을 정함 (페이지마다 차감)
+    return PollScheduler(
+        min_interval=interval,
+        max_interval=interval,
+        budget=max(1, int(duration / interval)) * ReserveHandler().max_search_pages,
+    )
+
+
+def run_job(index, strategy, args, dep_date, targets, deadline, results):
+    handler = ReserveHandler(scheduler=make_scheduler(strategy, args.duration))
+    # adaptive 전략은 조회 예산이 크므로 duration이 지나면 멈추도록 함
+    stop_reason = handler.scheduler.stop_reason
+    handler.scheduler.stop_reason = lambda info, requests: (
+        "benchmark finished" if time.time() >= deadline else stop_reason(info, requests)
+    )
+    try:
+        # 주입된 오류로 로그인에 실패하면 조회 전략과 관계없으므로 다시 시도
+        for retry in range(3):
+            try:
+                handler.login(f"bench{index}", "password")
+                break
+            except Exception:
+                if retry == 2:
+                    raise
+        reservation = handler.reserve(
+            dep_date,
+            args.src,
+            args.dst,
+            f"{args.dep_time}00",
+            TrainType.ALL,
+            ReserveOption.GENERAL_FIRST,
+            "",
+            args.max_dep_time,
+            targets,
+        )
+        results.append(reservation is not None)
+    except Exception as e:
+        results.append(e)
+
+
+def run_strategy(strategy, args, app, dep_date):
+    sim = app.state.simulator = simulator_from_args(args)
+    targets = None
+    if args.targeted:
+        handler = ReserveHandler()
+        handler.login("bench-timetable", "password")
+        targets = [
+            {"trainNo": train["trainNo"], "depTime": train["depTime"]}
+            for train in handler.fetch_timetable(
+                args.src, args.dst, dep_date, args.dep_time, args.max_dep_time
+            )
+        ]
+        sim.reset()
+
+    deadline = time.time() + args.duration
+    results = []
+    threads = [
+        threading.Thread(
+            target=run_job,
+            args=(index, strategy, args, dep_date, targets, deadline, results),
+        )
+        for index in range(args.jobs)
+    ]
+    with redirect_stdout(open(os.devnull, "w")):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    stats = sim.snapshot()
+    searches = stats["requests"].get("ScheduleView", 0)
+    reserved = sum(1 for result in results if result is True)
+    errors = [result for result in results if isinstance(result, Exception)]
+    latency = stats["release_to_reservation_ms"]
+    print(
+        f"{strategy:>8}  reserved {reserved}/{args.jobs}"
+        f"  release->reserve p50 {latency.get('p50', '-')} ms"
+        f" p95 {latency.get('p95', '-')} ms"
+        f"  searches {searches}"
+        f" ({searches / max(reserved, 1):.0f}/reservation)"
+        f"  reserve calls {stats['requests'].get('TicketReservation', 0)}"
+        f"  releases {stats['releases']} (taken by others {stats['taken_by_others']})"
+        f"  injected errors {stats['injected_errors']}"
+    )
+    for error in errors:
+        print(f"          job error: {error!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--strategies", default="0.5,1,3,adaptive")
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--src", default="서울")
+    parser.add_argument("--dst", default="부산")
+    parser.add_argument("--dep-time", default="0600")
+    parser.add_argument("--max-dep-time", default="2200")
+    parser.add_argument("--targeted", action="store_true")
+    add_simulator_arguments(parser)
+    args = parser.parse_args()
+
+    dep_date = (date.today() + timedelta(days=1)).strftime("%Y%m%d")
+    app = create_app(simulator_from_args(args))
+    server = start_server(app, PORT)
+    try:
+        for strategy in args.strategies.split(","):
+            run_strategy(strategy.strip(), args, app, dep_date)
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
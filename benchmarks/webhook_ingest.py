@@ -0,0 +1,146 @@
+"""webhook 수신(/message) 처리량과 지연시간 측정
+
+이전 방식(request.json() + payload 전체 출력 + 크기 제한 없는 대기열)과 현재
+app.py의 process_update를 같은 조건에서 호출해 초당 처리 요청 수와 p50/p99
+지연시간을 비교한다. 네트워크 없이 ASGI 앱을 직접 호출하므로 handler 자체의
+비용만 측정된다.
+
+--stalled 를 지정하면 update를 처리하는 쪽이 멈춘 상황에서, 이전 방식은 대기열이
+계속 늘어나고 현재 방식은 대기열이 가득 차면 429로 응답하는지 확인한다.
+
+    pipenv run python benchmarks/webhook_ingest.py --requests 5000 --concurrency 50
+    pipenv run python benchmarks/webhook_ingest.py --stalled
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+os.environ.setdefault("BOTTOKEN", "123456:benchmark")
+os.environ.setdefault("WEBHOOK_SECRET", "benchmark-secret")
+os.environ.setdefault("STATE_BACKEND", "memory")
+os.environ.setdefault("WORKER_POOL_SIZE", "0")
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="korail-bench-"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, Request, Response, status  # noqa: E402
+from telegram import Update  # noqa: E402
+
+import app as webhook_app  # noqa: E402
+
+bot = webhook_app.bot
+legacy = FastAPI()
+# 이전에는 ApplicationBuilder 기본값인 크기 제한 없는 대기열을 사용
+legacy_queue = asyncio.Queue()
+
+
+@legacy.post("/message")
+async def legacy_process_update(request: Request):
+    req = await request.json()
+    print("Request recieved", req)
+    update = Update.de_json(req, bot.app.bot)
+    await legacy_queue.put(update)
+    return Response(status_code=status.HTTP_200_OK)
+
+
+def make_update(update_id):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": 10000 + update_id % 100, "type": "private"},
+            "from": {"id": 10000 + update_id % 100, "is_bot": False, "first_name": "a"},
+            "text": "20250101",
+        },
+    }
+
+
+async def drain(queue):
+    while True:
+        await queue.get()
+
+
+async def run(asgi_app, queue, total, concurrency):
+    headers = {
+        "content-type": "application/json",
+        "x-telegram-bot-api-secret-token": os.environ["WEBHOOK_SECRET"],
+    }
+    bodies = [json.dumps(make_update(i)).encode() for i in range(total)]
+    latencies = []
+    statuses = {}
+    next_index = 0
+
+    transport = httpx.ASGITransport(app=asgi_app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def worker():
+            nonlocal next_index
+            while next_index < total:
+                body = bodies[next_index]
+                next_index += 1
+                # ASGI 앱을 직접 호출하면 I/O 대기가 없으므로, 실제 서버처럼
+                # 대기열을 비우는 task가 실행될 수 있게 한 번 양보
+                await asyncio.sleep(0)
+                start = time.perf_counter()
+                response = await client.post("/message", content=body, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] = (
+                    statuses.get(response.status_code, 0) + 1
+                )
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": round(total / elapsed),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+        "statuses": statuses,
+        "queued": queue.qsize(),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument(
+        "--stalled", action="store_true", help="update 처리가 멈춘 상황에서 측정"
+    )
+    args = parser.parse_args()
+
+    targets = (
+        ("legacy", legacy, legacy_queue),
+        ("current", webhook_app.app, bot.app.update_queue),
+    )
+    drainers = []
+    if not args.stalled:
+        drainers = [asyncio.create_task(drain(queue)) for _, _, queue in targets]
+    print(f"JSON decoder: {webhook_app.json_loads.__module__}")
+    with open(os.devnull, "w") as devnull:
+        for name, asgi_app, queue in targets:
+            # 이전 handler의 payload 출력은 실제로 stdout에 쓰는 비용까지 포함
+            with redirect_stdout(devnull):
+                if not args.stalled:
+                    await run(
+                        asgi_app, queue, min(500, args.requests), args.concurrency
+                    )
+                result = await run(asgi_app, queue, args.requests, args.concurrency)
+            print(f"{name:8} {result}")
+    for drainer in drainers:
+        drainer.cancel()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
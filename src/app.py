@@ -1,13 +1,19 @@
 import os
 import sys
+import hmac
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
 from telegram import Update
 from telegramBot.bot import TelegramBot
-from telegramBot.messages import Messages
+
+try:
+    # 설치되어 있으면 webhook payload를 더 빠른 orjson으로 파싱
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 
 # Configure logging
@@ -36,6 +42,12 @@ if not bot_token:
 logger.info(f"Using bot token: {bot_token[:10]}...")
 bot = TelegramBot(bot_token)
 
+# Telegram이 webhook 요청의 X-Telegram-Bot-Api-Secret-Token 헤더로 보내는 값
+webhook_secret = os.environ.get("WEBHOOK_SECRET", "")
+if not webhook_secret:
+    logger.warning("WEBHOOK_SECRET is not set, webhook requests are not authenticated")
+webhook_stats = {"accepted": 0, "unauthorized": 0, "invalid": 0, "rejected": 0}
+
 
 # webhook 등록 및 lifespan 설정
 @asynccontextmanager
@@ -55,7 +67,7 @@ async def lifespan(_: FastAPI):
 
     try:
         # webhook 등록 시도
-        result = await bot.set_webhook(url=webhook_url)
+        result = await bot.set_webhook(url=webhook_url, secret_token=webhook_secret)
         if result:
             logger.info("Webhook set successfully")
         else:
@@ -70,11 +82,31 @@ async def lifespan(_: FastAPI):
         # webhook 설정 실패해도 서버는 계속 실행되도록 함
 
     async with bot.app:
+        # 복구 과정에서 보내는 메시지도 발송 대기열을 거치므로 가장 먼저 시작
+        bot.dispatcher.start()
+        await bot.ipc_server.start()
+        if bot.worker_pool is not None:
+            await bot.worker_pool.start()
+        # update를 처리하기 전에 저장된 대화 상태와 예약을 복구
+        await bot.restore_state()
+        bot.start_lease_renewal()
         await bot.app.start()
+        bot.loop_monitor.start()
         logger.info("Bot application started")
         yield
         logger.info("Shutting down bot application")
+        await bot.loop_monitor.stop()
+        await bot.stop_lease_renewal()
+        if bot.worker_pool is not None:
+            await bot.worker_pool.close()
+        await bot.ipc_server.stop()
+        bot.supervisor.close()
+        if bot.engine is not None:
+            await bot.engine.shutdown()
         await bot.app.stop()
+        await bot.dispatcher.stop()
+        bot.store.close()
+        bot.executor.shutdown()
 
 
 # 서버 시작
@@ -93,26 +125,52 @@ async def health_check():
     return {"status": "healthy", "service": "korail_telegrambot"}
 
 
-class Chat(BaseModel):
-    id: int
-
+@app.get("/metrics")
+async def metrics():
+    return {
+        **await bot.get_metrics(),
+        "webhook": {**webhook_stats, "queued": bot.app.update_queue.qsize()},
+    }
 
-class Message(BaseModel):
-    text: str
-    chat: Chat
 
+@app.post("/message")
+async def process_update(request: Request):
+    """Telegram webhook으로 받은 update를 처리 대기열에 넣고 바로 응답
 
-class TelegramRequest(BaseModel):
-    message: Message
+    대기열이 가득 차면 429를 응답해 Telegram이 나중에 다시 보내도록 한다.
+    """
+    token = request.headers.get("x-telegram-bot-api-secret-token", "")
+    if webhook_secret and not hmac.compare_digest(token, webhook_secret):
+        webhook_stats["unauthorized"] += 1
+        return Response(status_code=status.HTTP_401_UNAUTHORIZED)
 
+    try:
+        update = Update.de_json(json_loads(await request.body()), bot.app.bot)
+    except (ValueError, TypeError, KeyError):
+        webhook_stats["invalid"] += 1
+        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+
+    if bot.deduplicator.is_duplicate(update) or (
+        bot.multi_instance
+        and await bot.executor.run(bot.deduplicator.is_shared_duplicate, update)
+    ):
+        # 이미 받은 update는 처리하지 않고 200으로 응답해 재전송을 멈춤
+        return Response(status_code=status.HTTP_200_OK)
 
-@app.post("/message")
-async def process_update(request: Request):
-    req = await request.json()
-    print("Request recieved", req)
-    update = Update.de_json(req, bot.app.bot)
-    # await bot.app.process_update(update)
-    await bot.app.update_queue.put(update)
+    try:
+        bot.app.update_queue.put_nowait(update)
+    except asyncio.QueueFull:
+        webhook_stats["rejected"] += 1
+        # Telegram이 다시 보내면 처리할 수 있도록 중복 기록 제거
+        bot.deduplicator.forget(update)
+        if bot.multi_instance:
+            await bot.executor.run(bot.deduplicator.forget_shared, update)
+        logger.warning(f"Update queue is full, rejecting update {update.update_id}")
+        return Response(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": "1"},
+        )
+    webhook_stats["accepted"] += 1
     return Response(status_code=status.HTTP_200_OK)
 
 
@@ -128,28 +186,10 @@ async def send_reservation_status(
             1: 예약 성공
             0: 예약 실패
             -1: 예약 오류
+            -2: 저장된 세션이 만료되어 다시 로그인 필요
         reserveInfo (str): 예약 정보 문자열
     """
-    if chat_id not in bot.runningStatus:
-        print(f"Chat ID {chat_id}는 예약 큐에 없습니다")
-        return
-
-    # Handle messages based on status code
-    if status == 1:
-        msg = Messages.Info.RESERVE_SUCCESS.format(reserveInfo=reserveInfo)
-    elif status == -1:
-        msg = Messages.Error.RESERVE_WRONG
-    else:
-        msg = Messages.Error.RESERVE_FAILED
-
-    await bot.send_message(chat_id, msg)
-
-    # Reset user state if reservation process is complete
-    if status == 1:
-        print("예약 완료, 상태 초기화")
-        bot._reset_user_state(chat_id)
-
-    del bot.runningStatus[chat_id]
+    await bot.handle_reservation_status(chat_id, status, reserveInfo)
     # msgToSubscribers = f'{telebot_handler.userDict[chatId]["userInfo"]["korailId"]}의 예약이 종료되었습니다.'
     # telebot_handler.sendToSubscribers(msgToSubscribers)
 
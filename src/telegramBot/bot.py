@@ -1,8 +1,10 @@
 import os
-import subprocess
+import asyncio
 import signal
+import socket
+from contextlib import suppress
+from functools import partial
 from datetime import datetime, time
-import threading
 
 from korail2 import ReserveOption, TrainType
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -13,16 +15,40 @@ from telegram.ext import (
     MessageHandler,
     filters,
     CallbackQueryHandler,
+    TypeHandler,
 )
-from telegram.error import TelegramError
 
 from .korail_client import ReserveHandler
+from .rate_limiter import get_rate_limiter
+from .session_store import SessionStore
+from .session_keeper import session_stats
+from .http_pool import pool_stats
+from .circuit_breaker import get_circuit_breaker
+from .ipc import IpcServer
+from .supervisor import ProcessSupervisor, is_worker_process
+from .store import create_store
+from .job_scheduler import JobScheduler, QueueFullError
+from .dedupe import UpdateDeduplicator
+from .progress import ProgressBoard
+from .dispatcher import (
+    MessageDispatcher,
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    PRIORITY_NORMAL,
+)
+from .worker_pool import LatencyRecorder, WorkerPool
+from .engine import ReservationEngine, ReservationJob
+from .executor import LoopLagMonitor, get_executor
+from .update_processor import ChatOrderedUpdateProcessor
 from .messages import Messages
+from .callback_data import CallbackDataError, decode_callback, encode_callback
 from .calendar_keyboard import create_calendar, handle_calendar_action
+from .keyboard_cache import get_keyboard_cache
+from .stations import create_station_keyboard, get_station_index
+from .timetable import format_timetable, get_timetable_cache, trains_of_type
 from .time_keyboard import (
     create_time_keyboard,
     create_max_time_keyboard,
-    handle_time_action,
     create_time_reselect_keyboard,
 )
 
@@ -67,9 +93,61 @@ def is_past_time(time: str):
 class TelegramBot:
     def __init__(self, token: str):
         self.token = token
-        self.app = ApplicationBuilder().token(self.token).build()
+        self.app = (
+            ApplicationBuilder()
+            .token(self.token)
+            .concurrent_updates(ChatOrderedUpdateProcessor())
+            # 처리가 밀리면 webhook이 429로 응답하도록 대기열 크기 제한
+            .update_queue(
+                asyncio.Queue(maxsize=int(os.environ.get("UPDATE_QUEUE_SIZE", "1000")))
+            )
+            .build()
+        )
+        # callback_data의 동작 이름으로 바로 처리 함수를 찾음
+        self._callback_routes = self._build_callback_routes()
         self._register_handlers()
         self.lastSentMessage = None
+        # 대화 상태, 실행중인 예약, 구독자를 저장해 서버가 재시작되어도 이어서 진행
+        self.store = create_store()
+        # INSTANCE_ID를 지정하면 여러 인스턴스가 update와 예약을 나누어 처리
+        self.multi_instance = bool(os.environ.get("INSTANCE_ID"))
+        self._lease_task = None
+        # 로그인 확인에 사용한 세션을 예약 작업에 넘겨주기 위한 저장소
+        self.session_store = SessionStore()
+        # 코레일 로그인, 프로세스 실행 등 blocking 호출은 이벤트 루프 밖에서 실행
+        self.executor = get_executor()
+        self.loop_monitor = LoopLagMonitor()
+        # worker 프로세스가 예약 진행 상황과 결과를 보내는 Unix socket 서버
+        self.ipc_server = IpcServer(self.handle_worker_event)
+        # worker 프로세스가 종료되면 바로 회수하고 예약 상태 정리
+        self.supervisor = ProcessSupervisor(self._handle_worker_exit)
+        # RESERVE_ENGINE=asyncio 이면 worker 프로세스 대신 서버 내 엔진으로 예약 실행
+        self.engine = (
+            ReservationEngine(
+                self.handle_reservation_status, on_progress=self.handle_worker_event
+            )
+            if os.environ.get("RESERVE_ENGINE", "process") == "asyncio"
+            else None
+        )
+        # import를 마치고 대기하는 worker에 작업을 보내 예약 시작 지연을 줄임
+        self.worker_pool = (
+            WorkerPool(self.supervisor, self._handle_worker_exit, self.executor)
+            if self.engine is None
+            else None
+        )
+        # 요청 예산에 맞춰 동시에 실행할 예약 수를 제한하고 나머지는 대기열에서 순서대로 실행
+        self.job_scheduler = JobScheduler(self._run_job)
+        # 응답이 늦어 Telegram이 다시 보낸 update를 한 번만 처리
+        # (여러 인스턴스면 다른 인스턴스가 받은 update도 저장소에서 확인)
+        self.deduplicator = UpdateDeduplicator(
+            store=self.store if self.multi_instance else None
+        )
+        # 텔레그램 발송 제한에 맞춰 여러 채팅에 동시에 메시지 전송
+        self.dispatcher = MessageDispatcher(self.app.bot)
+        # 예약마다 고정된 진행 상황 메시지를 모아서 수정
+        self.progress = ProgressBoard(self.dispatcher)
+        # 예약 확인부터 첫 검색까지 걸린 시간
+        self.start_latency = LatencyRecorder()
 
     # userDict : Use like DB.
     # {
@@ -94,9 +172,11 @@ class TelegramBot:
     # Group for get notification
     subscribes = []
 
-    async def set_webhook(self, url):
+    async def set_webhook(self, url, secret_token=None):
         try:
-            result = await self.app.bot.set_webhook(url)
+            result = await self.app.bot.set_webhook(
+                url, secret_token=secret_token or None
+            )
             return result
         except Exception as e:
             raise e
@@ -138,6 +218,10 @@ class TelegramBot:
         )
         # 메뉴 버튼 처리를 위한 핸들러
         self.app.add_handler(CallbackQueryHandler(self._handle_callback))
+        # 다른 인스턴스가 바꾼 대화 상태를 불러온 뒤 처리
+        self.app.add_handler(TypeHandler(Update, self._load_update_state), group=-1)
+        # 위 핸들러가 처리한 뒤 바뀐 대화 상태 저장
+        self.app.add_handler(TypeHandler(Update, self._save_update_state), group=1)
 
     async def handle_progress(self, chat_id, action, data=""):
         actions = {
@@ -154,12 +238,6 @@ class TelegramBot:
             11: self._start_reserve,
         }
 
-        if len(self.runningStatus) > 0 and chat_id not in self.runningStatus:
-            await self.send_message(
-                chat_id, "현재 다른 유저가 이용중입니다. 관리자에게 문의하세요."
-            )
-            return
-
         handler = actions.get(action, self._handle_invalid_action)
         await handler(chat_id, data)
 
@@ -197,45 +275,67 @@ class TelegramBot:
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ):
         query = update.callback_query
-        await query.answer()
         chat_id = query.message.chat_id
+        try:
+            action, args = decode_callback(query.data)
+        except CallbackDataError as e:
+            # 배포 전에 보낸 키보드, 오래된 키보드, 위조된 callback_data
+            print(f"Rejected callback from {chat_id}: {str(e)}")
+            await query.answer(text=Messages.Error.CALLBACK_EXPIRED, show_alert=True)
+            return
+        await query.answer()
+        await self._callback_routes[action](chat_id, args, update, context)
 
-        if query.data.startswith("start_"):
-            await self._start_accept(chat_id, query.data)
-        elif query.data.startswith("train_type_"):
-            await self._input_train_type(chat_id, query.data)
-        elif query.data.startswith("seat_type_"):
-            await self._input_seat_type(chat_id, query.data)
-        elif query.data.startswith("confirm_"):
-            await self._start_reserve(chat_id, query.data)
-        elif query.data.startswith("calendar_"):
-            selected, date = await handle_calendar_action(update, context)
-            if selected:
-                await self._input_date(chat_id, date)
-        elif query.data.startswith("login_"):
-            await self._handle_login_callback(chat_id, query.data)
-        else:
-            selected, time_result = handle_time_action(query.data)
-            if selected:
-                if time_result == "reselect":
-                    # 시간 선택 다시하기
-                    self.userDict[chat_id]["lastAction"] = 7
-                    msg = (
-                        "시간 선택을 다시 시작합니다.\n\n"
-                        + Messages.Info.INPUT_DEP_TIME
-                    )
-                    current_time = datetime.now().strftime("%H%M")
-                    await self.send_message(
-                        chat_id,
-                        msg,
-                        reply_markup=create_time_keyboard(
-                            action="time", min_time=current_time
-                        ),
-                    )
-                elif query.data.startswith("time;"):
-                    await self._input_dep_time(chat_id, time_result)
-                elif query.data.startswith("maxtime;"):
-                    await self._input_max_dep_time(chat_id, time_result)
+    def _build_callback_routes(self):
+        """callback_data의 동작 이름별 처리 함수 (chat_id, args, update, context)
+
+        텍스트 입력과 같은 처리 함수를 쓰는 동작은 텍스트 입력과 같은 값으로 변환해 넘긴다.
+        """
+        routes = {
+            "start": lambda chat_id, args, *_: self._start_accept(chat_id, "start_yes"),
+            "login_back": lambda chat_id, args, *_: self._handle_login_callback(
+                chat_id, "login_back"
+            ),
+            "train_type": lambda chat_id, args, *_: self._input_train_type(
+                chat_id, f"train_type_{args[0]}"
+            ),
+            "seat_type": lambda chat_id, args, *_: self._input_seat_type(
+                chat_id, f"seat_type_{args[0]}"
+            ),
+            "confirm": lambda chat_id, args, *_: self._start_reserve(
+                chat_id, f"confirm_{args[0]}"
+            ),
+            "time": lambda chat_id, args, *_: self._input_dep_time(chat_id, args[0]),
+            "maxtime": lambda chat_id, args, *_: self._input_max_dep_time(
+                chat_id, args[0]
+            ),
+            "reselect_time": lambda chat_id, args, *_: self._reselect_time(chat_id),
+            "station": lambda chat_id, args, *_: self._select_station(chat_id, *args),
+        }
+        for action in (
+            "calendar_day",
+            "calendar_prev",
+            "calendar_next",
+            "calendar_ignore",
+        ):
+            routes[action] = partial(self._handle_calendar_callback, action)
+        return routes
+
+    async def _handle_calendar_callback(self, action, chat_id, args, update, context):
+        selected, date = await handle_calendar_action(update, context, action, args)
+        if selected:
+            await self._input_date(chat_id, date)
+
+    async def _reselect_time(self, chat_id):
+        """시간 선택 다시하기"""
+        self.userDict[chat_id]["lastAction"] = 7
+        msg = "시간 선택을 다시 시작합니다.\n\n" + Messages.Info.INPUT_DEP_TIME
+        current_time = datetime.now().strftime("%H%M")
+        await self.send_message(
+            chat_id,
+            msg,
+            reply_markup=create_time_keyboard(action="time", min_time=current_time),
+        )
 
     async def _handle_login_callback(self, chat_id, callback_data):
         """로그인 실패 후 사용자 선택 처리"""
@@ -252,6 +352,68 @@ class TelegramBot:
         self.userDict[chat_id]["lastAction"] = 0
         self.userDict[chat_id]["trainInfo"] = {}
         self.userDict[chat_id]["pid"] = 9999999
+        self.session_store.discard(chat_id)
+        self.store.put_session(chat_id, None)
+        self._save_user(chat_id)
+
+    def _save_user(self, chat_id):
+        if chat_id in self.userDict:
+            # 코레일 비밀번호는 메모리에만 두고 저장소에는 저장하지 않음
+            state = self.userDict[chat_id]
+            user_info = dict(state["userInfo"])
+            user_info.pop("korailPw", None)
+            self.store.put_user(chat_id, {**state, "userInfo": user_info})
+
+    def _job_record(self, job, reserve_handler=None):
+        """저장소에 기록할 예약 정보
+
+        비밀번호는 저장하지 않는다. 로그인한 세션이 있으면 함께 저장해, 재시작하거나
+        다른 인스턴스가 예약을 가져갔을 때 그 세션으로 이어서 실행한다.
+
+        Args:
+            job (dict): korailId, confirmedAt, spec 등 예약 정보
+            reserve_handler (ReserveHandler, optional): 로그인한 ReserveHandler
+
+        Returns:
+            dict: spec에서 비밀번호를 뺀 예약 정보
+        """
+        spec = dict(job["spec"])
+        spec.pop("password", None)
+        if reserve_handler is not None and reserve_handler.korail_client is not None:
+            spec["session"] = reserve_handler.export_session()
+        return {**job, "spec": spec}
+
+    async def _load_update_state(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ):
+        if not self.multi_instance or update.effective_chat is None:
+            return
+        chat_id = update.effective_chat.id
+        state = await self.executor.run(self.store.get_user, chat_id)
+        if state is not None:
+            # 저장되지 않는 비밀번호는 이 인스턴스가 기억하고 있으면 유지
+            local = self.userDict.get(chat_id, {})
+            password = local.get("userInfo", {}).get("korailPw")
+            if password is not None and "userInfo" in state:
+                state["userInfo"]["korailPw"] = password
+            self.userDict[chat_id] = state
+
+    async def _save_update_state(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ):
+        if update.effective_chat is None:
+            return
+        self._save_user(update.effective_chat.id)
+        if self.multi_instance:
+            # 같은 채팅의 다음 update를 다른 인스턴스가 받을 수 있으므로 바로 저장
+            await self.executor.run(self.store.flush)
+
+    def _remove_job(self, chat_id):
+        """실행중인 예약 목록에서 제거"""
+        self.runningStatus.pop(chat_id, None)
+        self.progress.finish(chat_id)
+        self.store.delete_job(chat_id)
+        self.job_scheduler.release(chat_id)
 
     def _create_user(self, chat_id):
         self.userDict[chat_id] = {
@@ -285,20 +447,126 @@ class TelegramBot:
         inProgress = self.userDict[chat_id]["inProgress"]
         return inProgress, progressNum
 
-    async def send_message(self, chat_id, text, reply_markup=None):
+    async def send_message(
+        self, chat_id, text, reply_markup=None, priority=PRIORITY_NORMAL
+    ):
         """Send message using telegram bot API"""
-        try:
-            message = await self.app.bot.send_message(
-                chat_id=chat_id,
-                text=text,
-                reply_markup=reply_markup,
-            )
-            self.lastSentMessage = text
-            print(f"Send message to {chat_id} : {text}")
-            return message
-        except TelegramError as e:
-            print(f"Failed to send message to {chat_id}: {e}")
+        message = await self.dispatcher.send(chat_id, text, reply_markup, priority)
+        if message is None:
+            print(f"Failed to send message to {chat_id}")
             return None
+        self.lastSentMessage = text
+        print(f"Send message to {chat_id} : {text}")
+        return message
+
+    def post_message(self, chat_id, text, reply_markup=None, priority=PRIORITY_NORMAL):
+        """전송을 기다리지 않고 메시지를 발송 대기열에 넣음 (여러 채팅에 알릴 때 사용)"""
+        print(f"Queue message to {chat_id} : {text}")
+        return self.dispatcher.submit(chat_id, text, reply_markup, priority)
+
+    async def handle_reservation_status(self, chat_id, status, reserveInfo):
+        """예약 작업의 결과를 받아 사용자에게 메시지 전송
+
+        Args:
+            chat_id (int): 텔레그램 채팅방 ID
+            status (int): 예약 상태 코드
+                1: 예약 성공
+                0: 예약 실패
+                -1: 예약 오류
+                -2: 저장된 세션이 만료되어 다시 로그인 필요
+            reserveInfo (str): 예약 정보 문자열
+        """
+        if chat_id not in self.runningStatus:
+            print(f"Chat ID {chat_id}는 예약 큐에 없습니다")
+            return
+        if self.runningStatus[chat_id].get("stopping") and status != 1:
+            # 취소하면서 종료한 worker가 보내는 종료 알림은 취소 처리에서 안내
+            # (취소 직전에 예약에 성공한 결과는 그대로 알림)
+            print(f"취소중인 예약 {chat_id}의 결과를 무시합니다")
+            return
+
+        # 결과를 보내는 동안 worker가 종료되거나 같은 결과가 HTTP callback으로 다시
+        # 와도 오류나 중복 메시지를 보내지 않도록 실행중인 예약에서 먼저 제외
+        self.runningStatus.pop(chat_id)
+
+        # Handle messages based on status code
+        if status == 1:
+            msg = Messages.Info.RESERVE_SUCCESS.format(reserveInfo=reserveInfo)
+        elif status == -1:
+            msg = Messages.Error.RESERVE_WRONG
+        elif status == -2:
+            msg = Messages.Error.LOGIN_EXPIRED
+        else:
+            msg = Messages.Error.RESERVE_FAILED
+
+        # 진행 상황 메시지 수정과 고정 해제는 같은 채팅의 발송 순서를 따르므로,
+        # 결과 메시지가 그 뒤에서 기다리지 않도록 결과를 먼저 보낸 뒤 정리
+        await self.send_message(chat_id, msg, priority=PRIORITY_HIGH)
+        self.progress.finish(chat_id, "예약 성공" if status == 1 else "예약 실패")
+
+        # Reset user state if reservation process is complete
+        if status in (1, -2):
+            print("예약 완료, 상태 초기화")
+            self._reset_user_state(chat_id)
+
+        self._remove_job(chat_id)
+
+    async def handle_worker_event(self, event):
+        """worker 프로세스가 IPC로 보낸 이벤트 처리
+
+        Args:
+            event (dict): 이벤트. type 값에 따라 처리한다
+                started, searching, attempt, backoff, train_found, heartbeat:
+                    진행 상황 기록 및 진행 상황 메시지 수정
+                reserved, failed: 예약 결과 전송 (handle_reservation_status)
+        """
+        chat_id = int(event["chatId"])
+        if event["type"] in ("reserved", "failed"):
+            await self.handle_reservation_status(
+                chat_id, event["status"], event["reserveInfo"]
+            )
+            return
+
+        state = self.runningStatus.get(chat_id)
+        if state is None or state.get("stopping"):
+            return
+        state["lastSeen"] = event["ts"]
+        if event["type"] == "searching":
+            self.start_latency.record(event["ts"] - state["confirmedAt"])
+        elif event["type"] == "attempt":
+            state["attempts"] = event["attempt"]
+            self.progress.update(
+                chat_id,
+                state="조회중",
+                attempts=event["attempt"],
+                lastSearch=event["ts"],
+                trains=event.get("trains"),
+                backoff=event.get("delay"),
+            )
+        elif event["type"] == "backoff":
+            reason = "요청 제한" if event["reason"] == "rate_limit" else "조회 오류"
+            self.progress.update(
+                chat_id, state=f"{reason}로 대기중", backoff=event["delay"]
+            )
+        elif event["type"] == "train_found":
+            print(f"Worker for {chat_id} found train: {event['train']}")
+
+    async def _handle_worker_exit(self, chat_id, exit_info):
+        """worker 프로세스가 종료되었을 때 예약 상태 정리 (ProcessSupervisor에서 호출)"""
+        state = self.runningStatus.get(chat_id)
+        if (
+            state is not None
+            and state["pid"] == exit_info["pid"]
+            and not state.get("stopping")
+        ):
+            # 결과를 보내지 못하고 종료된 경우
+            self._remove_job(chat_id)
+            await self.send_message(chat_id, Messages.Error.RESERVE_WRONG)
+        if (
+            chat_id in self.userDict
+            and self.userDict[chat_id]["pid"] == exit_info["pid"]
+        ):
+            self._reset_user_state(chat_id)
 
     async def start_func(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         chat_id = update.message.chat_id
@@ -306,7 +574,9 @@ class TelegramBot:
         self.userDict[chat_id]["inProgress"] = True
         self.userDict[chat_id]["lastAction"] = 1
 
-        keyboard = [[InlineKeyboardButton("시작하기", callback_data="start_yes")]]
+        keyboard = [
+            [InlineKeyboardButton("시작하기", callback_data=encode_callback("start"))]
+        ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         await self.send_message(
             chat_id=chat_id,
@@ -331,8 +601,9 @@ class TelegramBot:
                 {"korailId": username, "korailPw": password}
             )
 
-            reserve_handler = ReserveHandler()
-            if reserve_handler.login(username, password):
+            reserve_handler = await self._login(username, password)
+            if reserve_handler is not None:
+                self._keep_session(chat_id, reserve_handler)
                 msg = Messages.Info.INPUT_DATE
                 self.userDict[chat_id]["lastAction"] = 4
                 await self.send_message(chat_id, msg, reply_markup=create_calendar())
@@ -388,10 +659,11 @@ class TelegramBot:
         print(self.userDict[chat_id]["userInfo"])
         username = self.userDict[chat_id]["userInfo"]["korailId"]
         password = self.userDict[chat_id]["userInfo"]["korailPw"]
-        reserve_handler = ReserveHandler()
-        loginSuc = reserve_handler.login(username, password)
+        reserve_handler = await self._login(username, password)
+        loginSuc = reserve_handler is not None
         print(loginSuc)
         if loginSuc:
+            self._keep_session(chat_id, reserve_handler)
             msg = Messages.Info.INPUT_DATE
             self.userDict[chat_id]["lastAction"] = 4
             await self.send_message(chat_id, msg, reply_markup=create_calendar())
@@ -407,13 +679,79 @@ class TelegramBot:
 5회 이상 로그인 실패할 경우, 홈페이지를 통해 비밀번호를 재설정하셔야합니다."""
 
             keyboard = [
-                [InlineKeyboardButton("뒤로 돌아가기", callback_data="login_back")]
+                [
+                    InlineKeyboardButton(
+                        "뒤로 돌아가기", callback_data=encode_callback("login_back")
+                    )
+                ]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             await self.send_message(chat_id, msg, reply_markup=reply_markup)
 
         return None
 
+    async def _login(self, username, password):
+        """이벤트 루프를 막지 않도록 스레드 풀에서 코레일 로그인
+
+        Returns:
+            ReserveHandler | None: 로그인한 ReserveHandler. 실패하거나 시간이 초과되면 None
+        """
+        reserve_handler = ReserveHandler()
+        try:
+            if await self.executor.run(reserve_handler.login, username, password):
+                return reserve_handler
+        except asyncio.TimeoutError:
+            print(f"Korail login timed out: {username}")
+        except Exception as e:
+            print(f"Korail login failed: {str(e)}")
+        return None
+
+    def _keep_session(self, chat_id, reserve_handler):
+        """로그인 확인에 사용한 세션을 예약을 시작할 때까지 보관
+
+        같은 채팅의 다음 update를 다른 인스턴스가 받을 수 있으므로 저장소에도 기록한다.
+        """
+        self.session_store.put(chat_id, reserve_handler)
+        self.store.put_session(chat_id, reserve_handler.export_session())
+
+    async def _checked_session(self, chat_id, take=False):
+        """로그인 확인 때 보관한 ReserveHandler
+
+        이 인스턴스에 없으면(비밀번호 확인을 다른 인스턴스가 처리했거나 재시작한 경우)
+        저장소에 기록된 세션으로 복구한다.
+
+        Args:
+            chat_id (int): 텔레그램 채팅방 ID
+            take (bool, optional): 예약을 시작하면서 꺼내 더 이상 보관하지 않을지 여부
+
+        Returns:
+            ReserveHandler | None: 세션이 없거나 만료되었으면 None
+        """
+        reserve_handler = self.session_store.peek(chat_id)
+        if reserve_handler is None:
+            reserve_handler = await self._restore_checked_session(chat_id)
+        if take:
+            self.session_store.discard(chat_id)
+            self.store.put_session(chat_id, None)
+        return reserve_handler
+
+    async def _restore_checked_session(self, chat_id):
+        session = await self.executor.run(
+            self.store.get_session, chat_id, self.session_store.ttl
+        )
+        if session is None:
+            return None
+        # 비밀번호는 저장하지 않으므로 다른 인스턴스가 확인한 세션은 비밀번호 없이 사용
+        password = self.userDict[chat_id]["userInfo"].get("korailPw")
+        reserve_handler = ReserveHandler()
+        try:
+            await self.executor.run(reserve_handler.restore_session, session, password)
+        except Exception as e:
+            print(f"저장된 코레일 세션을 복구하지 못했습니다, {chat_id}: {str(e)}")
+            return None
+        self.session_store.put(chat_id, reserve_handler)
+        return reserve_handler
+
     # 출발일 입력 함수 (직접 입력시)
     async def _input_date_str(self, chat_id, data):
         try:
@@ -441,6 +779,9 @@ class TelegramBot:
         return None
 
     async def _input_src_station(self, chat_id, data):
+        data = await self._resolve_station(chat_id, "src", data)
+        if data is None:
+            return None
         self.userDict[chat_id]["trainInfo"]["srcLocate"] = data
         self.userDict[chat_id]["lastAction"] = 6
         msg = f"선택하신 출발역: {data}\n\n{Messages.Info.INPUT_DST_STATION}"
@@ -448,6 +789,12 @@ class TelegramBot:
         return None
 
     async def _input_dst_station(self, chat_id, data):
+        data = await self._resolve_station(chat_id, "dst", data)
+        if data is None:
+            return None
+        if data == self.userDict[chat_id]["trainInfo"].get("srcLocate"):
+            await self.send_message(chat_id, Messages.Error.STATION_SAME)
+            return None
         self.userDict[chat_id]["trainInfo"]["dstLocate"] = data
         self.userDict[chat_id]["lastAction"] = 7
         msg = f"선택하신 도착역: {data}\n\n{Messages.Info.INPUT_DEP_TIME}"
@@ -460,6 +807,49 @@ class TelegramBot:
         )
         return None
 
+    async def _resolve_station(self, chat_id, role, data):
+        """입력한 역 이름을 역 목록에서 찾음
+
+        목록에 없으면 비슷한 역을 추천하는 키보드를 보내고 None을 반환하므로,
+        잘못된 역 이름으로 예약 작업을 시작하거나 코레일에 조회하지 않는다.
+
+        Args:
+            chat_id (int): 텔레그램 채팅방 ID
+            role (str): "src"(출발역) 또는 "dst"(도착역)
+            data (str): 사용자가 입력한 역 이름
+
+        Returns:
+            str | None: 코레일 역 이름. 찾지 못하면 None
+        """
+        stations = get_station_index()
+        station = stations.lookup(data)
+        if station is not None:
+            return station
+
+        suggestions = stations.suggest(data)
+        if suggestions:
+            await self.send_message(
+                chat_id,
+                Messages.Error.STATION_SUGGEST.format(station=data),
+                reply_markup=create_station_keyboard(role, suggestions),
+            )
+        else:
+            await self.send_message(
+                chat_id, Messages.Error.STATION_NOT_FOUND.format(station=data)
+            )
+        return None
+
+    async def _select_station(self, chat_id, role, name):
+        """추천 역 버튼 처리 (역을 입력하는 단계일 때만)"""
+        expected = 5 if role == "src" else 6
+        if self.userDict[chat_id]["lastAction"] != expected:
+            print(f"Ignored station button from {chat_id}: {role} {name}")
+            return
+        if role == "src":
+            await self._input_src_station(chat_id, name)
+        else:
+            await self._input_dst_station(chat_id, name)
+
     async def _input_dep_time(self, chat_id, data):
         dep_date = self.userDict[chat_id]["trainInfo"]["depDate"]
         if not is_valid_time(str(data)):
@@ -501,12 +891,17 @@ class TelegramBot:
         """기차 옵션 선택을 위해 인라인 키보드 전송"""
         keyboard = [
             [
-                InlineKeyboardButton("KTX", callback_data="train_type_1"),
-                InlineKeyboardButton("모든 열차", callback_data="train_type_2"),
+                InlineKeyboardButton(
+                    "KTX", callback_data=encode_callback("train_type", 1)
+                ),
+                InlineKeyboardButton(
+                    "모든 열차", callback_data=encode_callback("train_type", 2)
+                ),
             ],
             [
                 InlineKeyboardButton(
-                    "⬅️시간 다시 선택하기", callback_data="reselect_time"
+                    "⬅️시간 다시 선택하기",
+                    callback_data=encode_callback("reselect_time"),
                 )
             ],
         ]
@@ -538,12 +933,20 @@ class TelegramBot:
         """좌석 옵션 선택을 위해 인라인 키보드 전송"""
         keyboard = [
             [
-                InlineKeyboardButton("일반실 우선 예약", callback_data="seat_type_1"),
-                InlineKeyboardButton("일반실만 예약", callback_data="seat_type_2"),
+                InlineKeyboardButton(
+                    "일반실 우선 예약", callback_data=encode_callback("seat_type", 1)
+                ),
+                InlineKeyboardButton(
+                    "일반실만 예약", callback_data=encode_callback("seat_type", 2)
+                ),
             ],
             [
-                InlineKeyboardButton("특실 우선 예약", callback_data="seat_type_3"),
-                InlineKeyboardButton("특실만 예약", callback_data="seat_type_4"),
+                InlineKeyboardButton(
+                    "특실 우선 예약", callback_data=encode_callback("seat_type", 3)
+                ),
+                InlineKeyboardButton(
+                    "특실만 예약", callback_data=encode_callback("seat_type", 4)
+                ),
             ],
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
@@ -575,7 +978,37 @@ class TelegramBot:
 
     async def _send_confirm_reserve(self, chat_id):
         train_info = self.userDict[chat_id]["trainInfo"]
+        train_info.pop("targetTrains", None)
+        trains = await self._preview_trains(chat_id)
+        if trains == []:
+            # 검색 범위에 열차가 없으면 예약을 시작하지 않고 시간을 다시 고르게 함
+            msg = Messages.Error.NO_TRAINS_IN_WINDOW.format(
+                depDate=train_info["depDate"],
+                srcLocate=train_info["srcLocate"],
+                dstLocate=train_info["dstLocate"],
+                depTime=train_info["depTime"],
+                maxDepTime=train_info["maxDepTime"],
+                trainTypeShow=train_info["trainTypeShow"],
+            )
+            keyboard = [
+                [
+                    InlineKeyboardButton(
+                        "⬅️시간 다시 선택하기",
+                        callback_data=encode_callback("reselect_time"),
+                    )
+                ]
+            ]
+            await self.send_message(
+                chat_id, msg, reply_markup=InlineKeyboardMarkup(keyboard)
+            )
+            return
 
+        # 시간표를 확인했으면 예약 작업은 이 열차들만 조회
+        train_info["targetTrains"] = (
+            [{"trainNo": t["trainNo"], "depTime": t["depTime"]} for t in trains]
+            if trains
+            else None
+        )
         msg = Messages.Info.CONFIRM_DETAILS.format(
             depDate=train_info["depDate"],
             srcLocate=train_info["srcLocate"],
@@ -584,16 +1017,28 @@ class TelegramBot:
             maxDepTime=train_info["maxDepTime"],
             trainTypeShow=train_info["trainTypeShow"],
             specialInfoShow=train_info["specialInfoShow"],
+            trains=(
+                Messages.Info.CONFIRM_TRAINS.format(
+                    count=len(trains), trains=format_timetable(trains)
+                )
+                if trains
+                else ""
+            ),
         )
 
         keyboard = [
             [
-                InlineKeyboardButton("예", callback_data="confirm_yes"),
-                InlineKeyboardButton("아니오", callback_data="confirm_no"),
+                InlineKeyboardButton(
+                    "예", callback_data=encode_callback("confirm", "yes")
+                ),
+                InlineKeyboardButton(
+                    "아니오", callback_data=encode_callback("confirm", "no")
+                ),
             ],
             [
                 InlineKeyboardButton(
-                    "⬅️시간 다시 선택하기", callback_data="reselect_time"
+                    "⬅️시간 다시 선택하기",
+                    callback_data=encode_callback("reselect_time"),
                 )
             ],
         ]
@@ -604,41 +1049,103 @@ class TelegramBot:
             reply_markup=reply_markup,
         )
 
+    async def _preview_trains(self, chat_id):
+        """검색 범위에 출발하는 열차를 시간표 캐시에서 조회
+
+        비밀번호 확인 때 로그인한 세션으로 노선과 날짜의 시간표를 조회하고, 같은
+        노선과 날짜는 TimetableCache에 저장된 시간표를 사용한다.
+
+        Returns:
+            list[dict] | None: 열차 종류에 맞는 검색 범위의 열차 목록.
+                세션이 없거나 조회에 실패하면 None (열차를 확인하지 않고 예약 진행)
+        """
+        reserve_handler = await self._checked_session(chat_id)
+        if reserve_handler is None:
+            return None
+        train_info = self.userDict[chat_id]["trainInfo"]
+        src, dst, dep_date = (
+            train_info["srcLocate"],
+            train_info["dstLocate"],
+            train_info["depDate"],
+        )
+
+        async def fetch(start, end):
+            return await self.executor.run(
+                reserve_handler.fetch_timetable, src, dst, dep_date, start, end
+            )
+
+        try:
+            timetable = await get_timetable_cache().get(
+                (src, dst, dep_date),
+                train_info["depTime"],
+                train_info["maxDepTime"],
+                fetch,
+            )
+        except Exception as e:
+            print(f"열차 시간표 조회 실패, {chat_id}: {str(e)}")
+            return None
+        return trains_of_type(timetable, train_info["trainType"])
+
     async def _start_reserve(self, chat_id, data):
         try:
-            if data == "confirm_yes":
+            if chat_id in self.runningStatus or self.job_scheduler.position(chat_id):
+                # 확인 버튼을 여러 번 눌러도 예약은 하나만 실행
+                await self._already_doing(chat_id)
+            elif data == "confirm_yes":
                 self.userDict[chat_id]["lastAction"] = 12
+                confirmed_at = datetime.now().timestamp()
                 train_info = self.userDict[chat_id]["trainInfo"]
                 user_info = self.userDict[chat_id]["userInfo"]
-
-                arguments = [
-                    user_info["korailId"],
-                    user_info["korailPw"],
-                    train_info["depDate"],
-                    train_info["srcLocate"],
-                    train_info["dstLocate"],
-                    f"{train_info['depTime']}00",
-                    train_info["trainType"],
-                    train_info["specialInfo"],
-                    chat_id,
-                    train_info["maxDepTime"],
-                ]
-                arguments = [str(argument) for argument in arguments]
-                print(f"Starting reservation, arguments: {arguments}")
-
-                pid = self._start_background_process(arguments)
-
-                self.userDict[chat_id]["pid"] = pid
-                self.runningStatus[chat_id] = {
-                    "pid": pid,
+                # 비밀번호 확인 때 로그인한 세션이 있으면 작업에 넘겨 다시 로그인하지 않음
+                reserve_handler = await self._checked_session(chat_id, take=True)
+                if reserve_handler is None and not user_info.get("korailPw"):
+                    # 재시작 등으로 세션과 비밀번호가 모두 없으면 다시 로그인해야 함
+                    self._reset_user_state(chat_id)
+                    await self.send_message(chat_id, Messages.Error.LOGIN_EXPIRED)
+                    return
+
+                spec = {
+                    "chatId": chat_id,
+                    "username": user_info["korailId"],
+                    "password": user_info.get("korailPw"),
+                    "depDate": train_info["depDate"],
+                    "srcLocate": train_info["srcLocate"],
+                    "dstLocate": train_info["dstLocate"],
+                    "depTime": f"{train_info['depTime']}00",
+                    "trainType": train_info["trainType"],
+                    "specialInfo": train_info["specialInfo"],
+                    "maxDepTime": train_info["maxDepTime"],
+                    "targetTrains": train_info.get("targetTrains"),
+                }
+                job = {
                     "korailId": user_info["korailId"],
+                    "confirmedAt": confirmed_at,
+                    "spec": spec,
                 }
 
                 # msgToSubscribers = f"{user_info['korailId']}의 {train_info['srcLocate']}에서 {train_info['dstLocate']}로 {train_info['depDate']}에 출발하는 열차 예약이 시작되었습니다."
                 # self.sendToSubscribers(msgToSubscribers)
 
-                msg = Messages.Info.RESERVE_STARTED
-                await self.send_message(chat_id, msg)
+                try:
+                    position = await self.job_scheduler.submit(
+                        chat_id,
+                        chat_id,
+                        user_info["korailId"],
+                        {**job, "handler": reserve_handler},
+                    )
+                except QueueFullError:
+                    self._reset_user_state(chat_id)
+                    await self.send_message(chat_id, Messages.Error.RESERVE_QUEUE_FULL)
+                    return
+                if position:
+                    self.store.put_job(
+                        chat_id,
+                        self._job_record(
+                            {**job, "pid": None, "queued": True}, reserve_handler
+                        ),
+                    )
+                    msg = Messages.Info.RESERVE_QUEUED.format(position=position)
+                    await self.send_message(chat_id, msg)
             elif data == "confirm_no":
                 self._reset_user_state(chat_id)
                 msg = Messages.Error.RESERVE_CANCELLED
@@ -647,8 +1154,12 @@ class TelegramBot:
                 msg = Messages.Error.INPUT_WRONG
                 keyboard = [
                     [
-                        InlineKeyboardButton("예", callback_data="confirm_yes"),
-                        InlineKeyboardButton("아니오", callback_data="confirm_no"),
+                        InlineKeyboardButton(
+                            "예", callback_data=encode_callback("confirm", "yes")
+                        ),
+                        InlineKeyboardButton(
+                            "아니오", callback_data=encode_callback("confirm", "no")
+                        ),
                     ]
                 ]
                 reply_markup = InlineKeyboardMarkup(keyboard)
@@ -660,54 +1171,231 @@ class TelegramBot:
             )
             print(f"Error starting reservation, {chat_id}: {str(e)}")
 
-    def _start_background_process(self, arguments):
+    async def _run_job(self, chat_id, payload):
+        """실행 순서가 된 예약 시작 (JobScheduler에서 호출)
+
+        Args:
+            chat_id (int): 텔레그램 채팅방 ID
+            payload (dict): korailId, confirmedAt, spec과 선택적으로 로그인한
+                handler, 시작할 때 보낼 message
+        """
+        spec = payload["spec"]
         try:
-            cmd = ["python", "-m", "telegramBot.worker"] + arguments
-            cwd = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-
-            # Create logs directory if it doesn't exist
-            logs_dir = os.path.join(os.path.dirname(__file__), "..", "..", "logs")
-            os.makedirs(logs_dir, exist_ok=True)
-
-            # Create a log file for the process
-            log_file_path = os.path.join(logs_dir, f"worker_{arguments[-2]}.log")
-            log_file = open(log_file_path, "a")
-
-            process = subprocess.Popen(
-                cmd,
-                stdout=log_file,
-                stderr=log_file,
-                text=True,
-                cwd=cwd,
-                start_new_session=True,  # Create new process group
+            pid = await self._launch_job(spec, payload.get("handler"))
+        except Exception:
+            self.store.delete_job(chat_id)
+            if chat_id in self.userDict:
+                self._reset_user_state(chat_id)
+            await self.send_message(
+                chat_id,
+                "예약 시작 중 오류가 발생했습니다. /start를 입력해 다시 시작해 주세요",
             )
+            raise
+
+        self.runningStatus[chat_id] = {
+            "pid": pid,
+            "korailId": payload["korailId"],
+            "confirmedAt": payload["confirmedAt"],
+        }
+        self.store.put_job(
+            chat_id,
+            self._job_record(
+                {
+                    **self.runningStatus[chat_id],
+                    "spec": spec,
+                    "host": socket.gethostname(),
+                },
+                payload.get("handler"),
+            ),
+        )
+        if chat_id in self.userDict:
+            self.userDict[chat_id]["pid"] = pid
+            self._save_user(chat_id)
+        await self.send_message(
+            chat_id, payload.get("message", Messages.Info.RESERVE_STARTED)
+        )
+        self.progress.start(chat_id)
+
+    async def _launch_job(self, spec, reserve_handler=None):
+        """예약 작업 실행 (서버 내 엔진 또는 worker 프로세스)
+
+        Returns:
+            int | None: 작업을 실행하는 worker의 pid. 서버 내 엔진으로 실행하면 None
+        """
+        if self.engine is not None:
+            print(f"Starting in-process reservation for {spec['chatId']}")
+            self.engine.submit(ReservationJob(**spec, handler=reserve_handler))
+            return None
+
+        spec = dict(spec)
+        if reserve_handler is not None:
+            spec["session"] = reserve_handler.export_session()
+        spec["ipcSocket"] = self.ipc_server.path
+        print(
+            f"Starting reservation for {spec['chatId']}: "
+            f"{spec['srcLocate']} -> {spec['dstLocate']} {spec['depDate']}"
+        )
+        return await self.worker_pool.submit(spec)
+
+    async def restore_state(self):
+        """저장된 대화 상태와 구독자를 불러오고 이 인스턴스가 실행하던 예약을 이어서 진행"""
+        state = await self.executor.run(self.store.load)
+        self.userDict.update(state["users"])
+        for chat_id in state["subscribers"]:
+            if chat_id not in self.subscribes:
+                self.subscribes.append(chat_id)
+
+        jobs = await self.executor.run(self.store.claim_jobs, True)
+        await self._resume_jobs(jobs)
+        print(
+            f"Restored {len(state['users'])} users, {len(self.runningStatus)} running "
+            f"and {self.job_scheduler.waiting} queued reservations"
+        )
+
+    async def _resume_jobs(self, jobs, adopt=True):
+        """저장소에서 가져온 예약을 이어서 실행
+
+        재시작하기 전에 실행한 worker가 아직 예약을 진행중이면(adopt) 감시만 다시
+        시작하고(worker는 새 IPC 서버에 다시 연결해 결과를 보낸다), worker가
+        종료되었거나 서버 내 엔진으로 실행하던 예약과 대기중이던 예약은 저장된 작업
+        정보로 다시 대기열에 넣는다. 종료된 다른 인스턴스에서 가져온 예약의 worker가
+        같은 host에 남아있으면 같은 열차를 중복으로 조회하지 않도록 종료한다.
 
-            # Start a monitoring thread
-            def monitor_process(pid, chat_id):
-                while True:
-                    try:
-                        # Check if process is still running
-                        if os.kill(pid, 0):
-                            time.sleep(5)  # Check every 5 seconds
-                            continue
-                    except OSError:
-                        # Process is dead
-                        if chat_id in self.runningStatus:
-                            del self.runningStatus[chat_id]
-                        if chat_id in self.userDict:
-                            self._reset_user_state(chat_id)
-                        break
-
-            monitor_thread = threading.Thread(
-                target=monitor_process, args=(process.pid, arguments[-2]), daemon=True
+        비밀번호는 저장하지 않으므로 다시 대기열에 넣는 예약은 저장된 세션으로 실행하고,
+        세션이 없거나 만료되었으면 사용자에게 다시 로그인을 요청한다.
+
+        Args:
+            jobs (dict): {chat_id: job} (SQLiteStore.claim_jobs)
+            adopt (bool, optional): 살아있는 worker를 그대로 이어서 사용할지 여부
+        """
+        # 실행중인 worker를 먼저 실행 수에 포함한 뒤, 먼저 확인한 예약부터 다시 대기열에 넣음
+        ordered = sorted(jobs.items(), key=lambda item: item[1]["confirmedAt"])
+        resumed = []
+        for chat_id, job in ordered:
+            pid = job["pid"]
+            alive = (
+                self.engine is None
+                and pid is not None
+                and job.get("host", socket.gethostname()) == socket.gethostname()
+                and is_worker_process(pid)
             )
-            monitor_thread.start()
+            if alive and adopt:
+                print(f"Adopting running worker {pid} for {chat_id}")
+                self.runningStatus[chat_id] = {
+                    "pid": pid,
+                    "korailId": job["korailId"],
+                    "confirmedAt": job["confirmedAt"],
+                }
+                self.supervisor.adopt(pid, chat_id)
+                self.job_scheduler.adopt(chat_id, chat_id, job["korailId"])
+                self.progress.start(chat_id)
+                continue
+            if alive:
+                with suppress(ProcessLookupError):
+                    os.kill(pid, signal.SIGTERM)
+            resumed.append((chat_id, job))
+
+        for chat_id, job in resumed:
+            if not job["spec"].get("session"):
+                # 비밀번호는 저장하지 않으므로 저장된 세션이 없으면 다시 로그인해야 함
+                self.store.delete_job(chat_id)
+                if chat_id in self.userDict:
+                    self._reset_user_state(chat_id)
+                await self.send_message(chat_id, Messages.Error.LOGIN_EXPIRED)
+                continue
+            payload = {
+                "korailId": job["korailId"],
+                "confirmedAt": job["confirmedAt"],
+                # 이전 버전에서 저장한 비밀번호가 있어도 사용하지 않고 세션으로만 복구
+                "spec": {**job["spec"], "password": None},
+                "message": Messages.Info.RESERVE_RESUMED,
+            }
+            try:
+                position = await self.job_scheduler.submit(
+                    chat_id, chat_id, job["korailId"], payload
+                )
+            except QueueFullError:
+                self.store.delete_job(chat_id)
+                if chat_id in self.userDict:
+                    self._reset_user_state(chat_id)
+                await self.send_message(chat_id, Messages.Error.RESERVE_QUEUE_FULL)
+                continue
+            if position:
+                self.store.put_job(
+                    chat_id,
+                    self._job_record(
+                        {
+                            "korailId": job["korailId"],
+                            "confirmedAt": job["confirmedAt"],
+                            "spec": job["spec"],
+                            "pid": None,
+                            "queued": True,
+                        }
+                    ),
+                )
 
-            return process.pid
+    def start_lease_renewal(self):
+        self._lease_task = asyncio.get_running_loop().create_task(self._renew_leases())
 
-        except Exception as e:
-            print(f"Failed to start process: {str(e)}")
-            return False, str(e)
+    async def stop_lease_renewal(self):
+        if self._lease_task is not None:
+            self._lease_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._lease_task
+            self._lease_task = None
+
+    async def _renew_leases(self):
+        """예약 lease를 주기적으로 연장하고 다른 인스턴스와 예약을 주고받음
+
+        - 다른 인스턴스가 lease를 가져간 예약은 이 인스턴스에서 중단
+        - 다른 인스턴스에서 취소를 요청한 예약은 취소하고 사용자에게 알림
+        - 종료된 인스턴스의 lease가 만료된 예약은 가져와서 이어서 실행
+
+        인스턴스가 종료되면 그 예약은 LEASE_TTL + LEASE_RENEW_INTERVAL 안에 다른
+        인스턴스로 넘어간다.
+        """
+        interval = float(os.environ.get("LEASE_RENEW_INTERVAL", "10"))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                local = list(self.runningStatus) + self.job_scheduler.queued_ids()
+                result = await self.executor.run(self.store.renew_leases, local)
+                for chat_id in result["lost"]:
+                    await self._drop_lost_job(chat_id)
+                for chat_id in result["cancel"]:
+                    await self._cancel_requested_job(chat_id)
+                jobs = await self.executor.run(self.store.claim_jobs)
+                if jobs:
+                    await self._resume_jobs(jobs, adopt=False)
+            except Exception as e:
+                print(f"Failed to renew reservation leases: {str(e)}")
+
+    async def _drop_lost_job(self, chat_id):
+        """lease가 만료되어 다른 인스턴스가 가져간 예약을 알림 없이 중단"""
+        print(f"Reservation {chat_id} was taken over by another instance")
+        if not self.job_scheduler.cancel(chat_id) and chat_id in self.runningStatus:
+            with suppress(OSError):
+                await self._stop_reservation(chat_id)
+            self.runningStatus.pop(chat_id, None)
+            self.job_scheduler.release(chat_id)
+            self.progress.finish(chat_id, "다른 서버에서 이어서 진행")
+        # 새로 가져간 인스턴스가 바꾼 대화 상태를 덮어쓰지 않도록 로컬 상태 제거
+        self.userDict.pop(chat_id, None)
+        self.session_store.discard(chat_id)
+
+    async def _cancel_requested_job(self, chat_id):
+        """다른 인스턴스에서 /cancel로 요청한 예약 취소"""
+        self.ensure_user_exists(chat_id)
+        if self.job_scheduler.cancel(chat_id):
+            await self._finish_cancel(chat_id)
+        elif chat_id in self.runningStatus:
+            try:
+                await self._stop_reservation(chat_id)
+            except OSError as e:
+                print(f"프로세스 종료 중 오류 발생: {str(e)}")
+            await self._finish_cancel(chat_id)
+        else:
+            self.store.delete_job(chat_id)
 
     async def _already_doing(self, chat_id):
         train_info = self.userDict[chat_id]["trainInfo"]
@@ -724,54 +1412,77 @@ class TelegramBot:
     async def cancel_func(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         chat_id = update.message.chat_id
         self.ensure_user_exists(chat_id)
-        userPid = self.userDict[chat_id]["pid"]
 
-        if chat_id not in self.runningStatus:
+        if self.job_scheduler.cancel(chat_id):
+            print(f"대기중인 예약 {chat_id}를 취소했습니다.")
+            await self._finish_cancel(chat_id)
+
+        elif chat_id in self.runningStatus:
+            try:
+                await self._stop_reservation(chat_id)
+                await self._finish_cancel(chat_id)
+
+            except OSError as e:
+                print(f"프로세스 종료 중 오류 발생: {str(e)}")
+                msg = "프로세스 종료 중 오류가 발생했습니다. 관리자에게 문의하세요."
+                await self.send_message(chat_id, msg)
+
+        elif await self.executor.run(self.store.request_cancel, chat_id):
+            # 예약을 실행중인 인스턴스가 lease를 연장할 때 취소하고 결과를 알림
+            print(f"다른 인스턴스에 예약 {chat_id}의 취소를 요청했습니다.")
+
+        else:
             msg = "진행중인 예약이 없습니다."
             await self.send_message(chat_id, msg)
-            return None
 
-        elif userPid != 9999999:
-            try:
-                # Try graceful termination first
-                os.kill(userPid, signal.SIGTERM)
+        return None
 
-                # Wait for process to terminate
-                for _ in range(5):  # Wait up to 5 seconds
-                    try:
-                        os.kill(userPid, 0)
-                        time.sleep(1)
-                    except OSError:
-                        break
-                else:
-                    # If process is still running, force kill
-                    os.kill(userPid, signal.SIGKILL)
+    async def _stop_reservation(self, chat_id):
+        """실행중인 예약 작업 종료 (서버 내 엔진 작업 취소 또는 worker 종료)"""
+        if self.engine is not None and self.engine.is_running(chat_id):
+            await self.engine.cancel(chat_id)
+            print(f"실행중인 예약 작업 {chat_id}를 종료했습니다.")
+            return
 
-                print(f"실행중인 프로세스 {userPid}를 종료했습니다.")
+        state = self.runningStatus[chat_id]
+        pid = state["pid"]
+        if pid is None:
+            return
+        # worker가 종료되어도 예약 오류로 알리지 않도록 표시
+        state["stopping"] = True
 
-                # Clean up resources
-                if chat_id in self.runningStatus:
-                    del self.runningStatus[chat_id]
+        # Try graceful termination first
+        os.kill(pid, signal.SIGTERM)
 
-                msgToSubscribers = f'{self.userDict[chat_id]["userInfo"]["korailId"]}의 예약이 종료되었습니다.'
-                await self.broadcast_message(msgToSubscribers)
+        # Wait up to 5 seconds for the supervisor to reap the process
+        if self.supervisor.is_watching(pid):
+            exited = await self.supervisor.wait(pid, timeout=5)
+            if exited is None:
+                # If process is still running, force kill
+                os.kill(pid, signal.SIGKILL)
 
-                self._reset_user_state(chat_id)
-                msg = Messages.Info.RESERVE_FINISHED
-                await self.send_message(chat_id, msg)
+        print(f"실행중인 프로세스 {pid}를 종료했습니다.")
 
-            except OSError as e:
-                print(f"프로세스 종료 중 오류 발생: {str(e)}")
-                msg = "프로세스 종료 중 오류가 발생했습니다. 관리자에게 문의하세요."
-                await self.send_message(chat_id, msg)
+    async def _finish_cancel(self, chat_id):
+        """예약 작업 종료 후 상태 정리 및 알림"""
+        # Clean up resources
+        self._remove_job(chat_id)
 
-        return None
+        msgToSubscribers = (
+            f'{self.userDict[chat_id]["userInfo"]["korailId"]}의 예약이 종료되었습니다.'
+        )
+        await self.broadcast_message(msgToSubscribers)
+
+        self._reset_user_state(chat_id)
+        msg = Messages.Info.RESERVE_FINISHED
+        await self.send_message(chat_id, msg)
 
     async def subscribe_user(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         chat_id = update.message.chat_id
         self.ensure_user_exists(chat_id)
         if chat_id not in self.subscribes:
             self.subscribes.append(chat_id)
+            self.store.add_subscriber(chat_id)
             data = "열차 이용정보 구독 설정이 완료되었습니다."
         else:
             data = "이미 구독했습니다."
@@ -780,7 +1491,7 @@ class TelegramBot:
     async def broadcast_message(self, data):
         """Send message to all subscribers"""
         for chat_id in self.subscribes:
-            await self.send_message(chat_id, data)
+            self.post_message(chat_id, data, priority=PRIORITY_LOW)
 
     async def get_status_info(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         chat_id = update.message.chat_id
@@ -790,8 +1501,70 @@ class TelegramBot:
             state["korailId"] for state in dict.values(self.runningStatus)
         ]
         data = f"총 {count}개의 예약이 실행중입니다. 이용중인 사용자 : {usersKorailIds}"
+        data += f"\n대기중인 예약 : {self.job_scheduler.waiting}개"
+        position = self.job_scheduler.position(chat_id)
+        if position:
+            data += f" (내 대기 순서 : {position}번째)"
+        if self.engine is not None:
+            stats = self.engine.search_hub.stats
+            data += (
+                f"\n열차 검색 : 요청 {stats['requests']}회 중 "
+                f"코레일 조회 {stats['upstream']}회"
+            )
+        counters = (await self.executor.run(get_rate_limiter().stats))["counters"]
+        for kind, counter in counters.items():
+            data += (
+                f"\n요청 제한({kind}) : 허용 {counter['granted']}회, "
+                f"대기 {counter['waited']}회, 버림 {counter['shed']}회"
+            )
+        breaker = await self.executor.run(get_circuit_breaker().snapshot)
+        circuit_labels = {"open": "차단", "half_open": "회복 확인중", "closed": "정상"}
+        global_circuit = breaker["circuits"].get("global", {"state": "closed"})
+        data += f"\n코레일 연결 : {circuit_labels[global_circuit['state']]}"
+        for name, circuit in breaker["circuits"].items():
+            if circuit["state"] == "closed":
+                continue
+            data += f"\n  {name} : {circuit_labels[circuit['state']]}"
+            if circuit["retry_after"]:
+                data += f" ({circuit['retry_after']:.0f}초 후 재시도)"
         await self.send_message(chat_id, data)
 
+    async def get_metrics(self):
+        """운영 지표 (GET /metrics)"""
+        metrics = {
+            "running": len(self.runningStatus),
+            # 상태 파일 잠금을 기다리는 동안 이벤트 루프가 멈추지 않도록 스레드에서 읽음
+            "rate_limiter": await self.executor.run(get_rate_limiter().stats),
+            "korail_sessions": await self.executor.run(session_stats),
+            "http_pool": await self.executor.run(pool_stats),
+            "circuit_breaker": await self.executor.run(get_circuit_breaker().snapshot),
+            "event_loop": self.loop_monitor.stats,
+            "ipc": self.ipc_server.stats,
+            "workers": {
+                **self.supervisor.stats,
+                "recent_exits": list(self.supervisor.exits),
+            },
+            "start_latency": (
+                self.engine.start_latency if self.engine else self.start_latency
+            ).snapshot(),
+            "blocking_executor": dict(self.executor.stats),
+            "store": dict(self.store.stats),
+            "job_scheduler": self.job_scheduler.snapshot(),
+            "dedupe": self.deduplicator.snapshot(),
+            "dispatcher": self.dispatcher.snapshot(),
+            "progress": self.progress.snapshot(),
+            "keyboards": get_keyboard_cache().snapshot(),
+            "timetable": get_timetable_cache().snapshot(),
+        }
+        if self.worker_pool is not None:
+            metrics["worker_pool"] = {
+                **self.worker_pool.stats,
+                "idle": len(self.worker_pool.idle),
+            }
+        if self.engine is not None:
+            metrics["search_hub"] = self.engine.search_hub.stats
+        return metrics
+
     async def cancel_all(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         chat_id = update.message.chat_id
         self.ensure_user_exists(chat_id)
@@ -800,22 +1573,32 @@ class TelegramBot:
         usersKorailIds = [
             state["korailId"] for state in dict.values(self.runningStatus)
         ]
-        userschat_id = dict.keys(self.runningStatus)
+        userschat_id = list(self.runningStatus) + self.job_scheduler.cancel_all()
+
+        # 종료되는 worker의 결과나 종료 알림이 다른 메시지로 전달되지 않도록,
+        # 첫 await 전에 모든 예약을 종료중으로 표시하고 실행중인 예약에서 제거
+        for state in dict.values(self.runningStatus):
+            state["stopping"] = True
+        for user in userschat_id:
+            self._remove_job(user)
 
         for pid in pids:
-            os.kill(pid, signal.SIGTERM)
+            if pid is None:
+                continue
+            with suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGTERM)
             print(f"프로세스 {pid}가 종료되었습니다.")
+        if self.engine is not None:
+            await self.engine.shutdown()
 
         dataForManager = f"총 {count}개의 진행중인 예약을 종료했습니다. 이용중이던 사용자 : {usersKorailIds}"
         await self.send_message(chat_id, dataForManager)
 
         dataForUser = Messages.Error.RESERVE_CANCELLED_BY_ADMIN
         for user in userschat_id:
-            await self.send_message(user, dataForUser)
+            self.post_message(user, dataForUser, priority=PRIORITY_HIGH)
             self.handle_progress(user, 0)
 
-        self.runningStatus = {}
-
     async def get_all_users(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         chat_id = update.message.chat_id
         self.ensure_user_exists(chat_id)
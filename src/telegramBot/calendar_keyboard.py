@@ -7,10 +7,11 @@ from telegram.ext import ContextTypes
 import datetime
 import calendar
 
+from .callback_data import encode_callback
+from .keyboard_cache import get_keyboard_cache
 
-def create_callback_data(action, year, month, day):
-    """Callback data 형식 문자열 제작 (action;year;month;day)"""
-    return ";".join([action, str(year), str(month), str(day)])
+# 일요일부터 시작하는 달력 (calendar.setfirstweekday는 프로세스 전체 설정을 바꾸므로 사용하지 않음)
+_calendar = calendar.Calendar(firstweekday=calendar.SUNDAY)
 
 
 def create_calendar(year=None, month=None):
@@ -32,14 +33,19 @@ def create_calendar(year=None, month=None):
         year = now.year
     if month == None:
         month = now.month
-    data_ignore = create_callback_data("calendar_ignore", year, month, 0)
+    return get_keyboard_cache().get(
+        ("calendar", year, month), lambda: _build_calendar(year, month)
+    )
+
+
+def _build_calendar(year, month):
+    """create_calendar의 키보드를 캐시 없이 새로 만듦"""
+    data_ignore = encode_callback("calendar_ignore")
     keyboard = []
     # First row - Month and Year
     row = []
     row.append(
-        InlineKeyboardButton(
-            f"{str(year)} {month}월", callback_data=data_ignore
-        )
+        InlineKeyboardButton(f"{str(year)} {month}월", callback_data=data_ignore)
     )
     keyboard.append(row)
     # Second row - Week Days
@@ -48,8 +54,7 @@ def create_calendar(year=None, month=None):
         row.append(InlineKeyboardButton(day, callback_data=data_ignore))
     keyboard.append(row)
 
-    calendar.setfirstweekday(calendar.SUNDAY)
-    my_calendar = calendar.monthcalendar(year, month)
+    my_calendar = _calendar.monthdayscalendar(year, month)
     for week in my_calendar:
         row = []
         for day in week:
@@ -59,9 +64,7 @@ def create_calendar(year=None, month=None):
                 row.append(
                     InlineKeyboardButton(
                         str(day),
-                        callback_data=create_callback_data(
-                            "calendar_day", year, month, day
-                        ),
+                        callback_data=encode_callback("calendar_day", year, month, day),
                     )
                 )
         keyboard.append(row)
@@ -69,13 +72,13 @@ def create_calendar(year=None, month=None):
     row = []
     row.append(
         InlineKeyboardButton(
-            "◀️", callback_data=create_callback_data("calendar_prev", year, month, day)
+            "◀️", callback_data=encode_callback("calendar_prev", year, month)
         )
     )
     row.append(InlineKeyboardButton(" ", callback_data=data_ignore))
     row.append(
         InlineKeyboardButton(
-            "▶️", callback_data=create_callback_data("calendar_next", year, month, day)
+            "▶️", callback_data=encode_callback("calendar_next", year, month)
         )
     )
     keyboard.append(row)
@@ -83,7 +86,9 @@ def create_calendar(year=None, month=None):
     return InlineKeyboardMarkup(keyboard)
 
 
-async def handle_calendar_action(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def handle_calendar_action(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, action, args
+):
     """달력 인라인 키보드 callback handler
 
     이전/다음 버튼이 눌리면 새로운 달력을 생성하고, 날짜가 선택되면 해당 날짜를 반환
@@ -91,6 +96,9 @@ async def handle_calendar_action(update: Update, context: ContextTypes.DEFAULT_T
     Args:
         update (telegram.Update): CallbackQueryHandler가 제공하는 업데이트 객체
         context (telegram.ext.CallbackContext): CallbackQueryHandler가 제공하는 컨텍스트 객체
+        action (str): decode_callback으로 검증한 동작 (calendar_day, calendar_prev,
+            calendar_next, calendar_ignore)
+        args (tuple[str, ...]): 동작의 인자 (year, month[, day])
 
     Returns:
         tuple[bool, datetime.datetime | None]: 날짜 선택 여부와 선택된 날짜를 포함하는 튜플
@@ -99,19 +107,19 @@ async def handle_calendar_action(update: Update, context: ContextTypes.DEFAULT_T
     """
     ret_data = (False, None)
     query = update.callback_query
-    print(query.data)
-    (action, year, month, day) = query.data.split(";")
-    curr = datetime.datetime(int(year), int(month), 1)
-
     if action == "calendar_ignore":
-        await query.answer()
-    elif action == "calendar_day":
+        return ret_data
+
+    year, month = int(args[0]), int(args[1])
+    curr = datetime.datetime(year, month, 1)
+
+    if action == "calendar_day":
         await context.bot.edit_message_text(
             text=query.message.text,
             chat_id=query.message.chat_id,
             message_id=query.message.message_id,
         )
-        ret_data = True, datetime.datetime(int(year), int(month), int(day))
+        ret_data = True, datetime.datetime(year, month, int(args[2]))
     elif action == "calendar_prev":
         pre = curr - datetime.timedelta(days=1)
         await context.bot.edit_message_text(
@@ -128,7 +136,5 @@ async def handle_calendar_action(update: Update, context: ContextTypes.DEFAULT_T
             message_id=query.message.message_id,
             reply_markup=create_calendar(int(ne.year), int(ne.month)),
         )
-    else:
-        await query.answer(text="Something went wrong!")
 
     return ret_data
@@ -0,0 +1,163 @@
+import base64
+import datetime
+import hashlib
+import hmac
+import os
+import secrets
+
+VERSION = "1"
+MAX_LENGTH = 64  # Telegram callback_data 최대 길이(byte)
+SEPARATOR = ":"
+SIGNATURE_LENGTH = 8  # base64 8자 = 6 byte
+
+# 버튼 동작 이름과 callback_data에 들어가는 1글자 코드
+ACTIONS = {
+    "start": "s",
+    "login_back": "b",
+    "train_type": "t",
+    "seat_type": "e",
+    "confirm": "c",
+    "calendar_day": "d",
+    "calendar_prev": "p",
+    "calendar_next": "n",
+    "calendar_ignore": "i",
+    "time": "h",
+    "maxtime": "m",
+    "reselect_time": "r",
+    "station": "o",
+}
+_ACTION_NAMES = {code: name for name, code in ACTIONS.items()}
+
+
+class CallbackDataError(ValueError):
+    """형식이 맞지 않거나, 서명이 틀리거나, 오래된 callback_data"""
+
+
+class CallbackCodec:
+    """인라인 버튼의 callback_data를 짧은 서명된 문자열로 만들고 검증하는 codec
+
+    callback_data는 `{버전}{동작 코드}{:인자...}{발급일}.{서명}` 형식이다. 예를 들어
+    달력의 2025년 1월 15일 버튼은 `1d:2025:1:15:fuwz.2YY021x9` 처럼 30 byte 이내로
+    표현된다. 서명은 버전부터 발급일까지를 HMAC-SHA256으로 서명한 값의 앞 6 byte이고,
+    발급일은 날짜의 서수(date.toordinal, 36진수)이다. 키보드 캐시(KeyboardCache)도
+    날짜가 바뀌면 비워지므로, 같은 날 만든 키보드는 사용자끼리 그대로 공유할 수 있다.
+
+    버전이 다르거나(배포 전 키보드), 서명이 맞지 않거나(위조), 발급일이 `max_age_days`
+    보다 오래된 callback_data는 CallbackDataError로 거부한다.
+
+    Args:
+        secret (bytes | str, optional): 서명 키. 기본값은 CALLBACK_SECRET, 없으면 BOTTOKEN.
+            둘 다 없으면 프로세스마다 임의로 만든다 (재시작하면 이전 버튼은 거부됨)
+        max_age_days (int, optional): 버튼을 사용할 수 있는 기간(일).
+            기본값은 CALLBACK_MAX_AGE_DAYS 또는 2
+    """
+
+    def __init__(self, secret=None, max_age_days=None):
+        secret = (
+            secret
+            or os.environ.get("CALLBACK_SECRET")
+            or os.environ.get("BOTTOKEN")
+            or secrets.token_bytes(32)
+        )
+        if isinstance(secret, str):
+            secret = secret.encode()
+        # 봇 토큰을 그대로 쓰지 않도록 용도별 키로 변환
+        self._key = hmac.new(secret, b"callback-data", hashlib.sha256).digest()
+        self.max_age_days = (
+            max_age_days
+            if max_age_days is not None
+            else int(os.environ.get("CALLBACK_MAX_AGE_DAYS", "2"))
+        )
+
+    def encode(self, action, *args):
+        """버튼 동작과 인자를 callback_data 문자열로 변환
+
+        Args:
+            action (str): ACTIONS에 등록된 동작 이름
+            *args (str | int): 동작에 넘길 인자 (":"를 포함할 수 없음)
+
+        Returns:
+            str: 64 byte 이하의 callback_data
+
+        Raises:
+            ValueError: 등록되지 않은 동작이거나 인자가 올바르지 않은 경우
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown callback action: {action}")
+        fields = [str(arg) for arg in args]
+        if any(SEPARATOR in field or "." in field for field in fields):
+            raise ValueError(f"Invalid callback argument: {fields}")
+        payload = SEPARATOR.join(
+            [VERSION + ACTIONS[action], *fields, _base36(_today())]
+        )
+        data = f"{payload}.{self._sign(payload)}"
+        if len(data.encode()) > MAX_LENGTH:
+            raise ValueError(f"Callback data is longer than {MAX_LENGTH} bytes: {data}")
+        return data
+
+    def decode(self, data):
+        """callback_data를 검증하고 버튼 동작과 인자로 변환
+
+        Args:
+            data (str): 받은 callback_data
+
+        Returns:
+            tuple[str, tuple[str, ...]]: 동작 이름과 인자 목록
+
+        Raises:
+            CallbackDataError: 형식, 버전, 서명, 발급일 중 하나라도 맞지 않는 경우
+        """
+        payload, _, signature = (data or "").rpartition(".")
+        if not payload or not payload.startswith(VERSION):
+            raise CallbackDataError(f"Unsupported callback data: {data!r}")
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            raise CallbackDataError(f"Invalid callback signature: {data!r}")
+
+        head, *fields = payload.split(SEPARATOR)
+        action = _ACTION_NAMES.get(head[len(VERSION) :])
+        if action is None or not fields:
+            raise CallbackDataError(f"Unknown callback action: {data!r}")
+        issued = int(fields.pop(), 36)
+        if not 0 <= _today() - issued <= self.max_age_days:
+            raise CallbackDataError(f"Expired callback data: {data!r}")
+        return action, tuple(fields)
+
+    def _sign(self, payload):
+        digest = hmac.new(self._key, payload.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest[:6]).decode()[:SIGNATURE_LENGTH]
+
+
+def _today():
+    # KeyboardCache가 비워지는 기준과 같은 현지 날짜
+    return datetime.date.today().toordinal()
+
+
+def _base36(value):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    text = ""
+    while True:
+        value, remainder = divmod(value, 36)
+        text = digits[remainder] + text
+        if value == 0:
+            return text
+
+
+_callback_codec = None
+
+
+def get_callback_codec():
+    """프로세스에서 공유하는 CallbackCodec 반환"""
+    global _callback_codec
+    if _callback_codec is None:
+        _callback_codec = CallbackCodec()
+    return _callback_codec
+
+
+def encode_callback(action, *args):
+    """get_callback_codec().encode의 축약"""
+    return get_callback_codec().encode(action, *args)
+
+
+def decode_callback(data):
+    """get_callback_codec().decode의 축약"""
+    return get_callback_codec().decode(data)
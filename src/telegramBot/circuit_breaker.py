@@ -0,0 +1,231 @@
+import logging
+import os
+import threading
+import time
+
+from .shared_state import locked_json
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """circuit이 열려 있어 코레일에 요청을 보내지 않은 경우"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"Circuit {name} is open, retry after {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """코레일 전체(global)와 계정별 circuit breaker
+
+    연속으로 `failure_threshold`번 실패하면 circuit을 열고(open), 열려 있는 동안에는
+    요청을 보내지 않고 CircuitOpenError를 발생시킨다. `recovery_timeout`이 지나면
+    한 요청만 보내 회복 여부를 확인하고(half_open), 성공하면 닫고(closed) 실패하면
+    다시 열면서 다음 확인까지의 시간을 두 배로 늘린다.
+
+    코레일 점검이나 장애처럼 모든 요청이 실패하는 동안 모든 예약 작업이 함께 물러나도록,
+    상태는 봇 서버와 worker 프로세스가 같은 상태 파일에서 공유한다.
+
+    Args:
+        failure_threshold (int, optional): circuit을 열 연속 실패 횟수.
+            기본값은 CIRCUIT_FAILURE_THRESHOLD 또는 5
+        recovery_timeout (float, optional): 회복 확인까지 기다릴 시간(초).
+            기본값은 CIRCUIT_RECOVERY_TIMEOUT 또는 30
+        max_recovery_timeout (float, optional): 회복 확인 대기 시간의 최대값(초).
+            기본값은 CIRCUIT_MAX_RECOVERY_TIMEOUT 또는 600
+        probe_timeout (float, optional): 회복 확인 요청의 결과를 기다릴 최대 시간(초).
+            확인 요청을 보낸 프로세스가 종료되어도 이 시간이 지나면 다른 요청이 확인한다.
+        state_file (str): DATA_DIR 아래의 상태 파일 이름
+    """
+
+    def __init__(
+        self,
+        failure_threshold=None,
+        recovery_timeout=None,
+        max_recovery_timeout=None,
+        probe_timeout=60,
+        state_file="circuit.json",
+    ):
+        self.failure_threshold = int(
+            failure_threshold
+            if failure_threshold is not None
+            else os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "5")
+        )
+        self.recovery_timeout = float(
+            recovery_timeout
+            if recovery_timeout is not None
+            else os.environ.get("CIRCUIT_RECOVERY_TIMEOUT", "30")
+        )
+        self.max_recovery_timeout = float(
+            max_recovery_timeout
+            if max_recovery_timeout is not None
+            else os.environ.get("CIRCUIT_MAX_RECOVERY_TIMEOUT", "600")
+        )
+        self.probe_timeout = probe_timeout
+        self.state_file = state_file
+
+    def before_call(self, account):
+        """요청을 보내기 전에 전역/계정 circuit 확인
+
+        열려 있던 circuit의 회복 확인 시간이 되었으면 이 요청을 확인 요청으로 사용한다.
+
+        Raises:
+            CircuitOpenError: circuit이 열려 있거나 다른 요청이 회복을 확인하는 중인 경우
+        """
+        caller = _caller_id()
+        blocked = None
+        with locked_json(self.state_file) as state:
+            circuits = state.setdefault("circuits", {})
+            now = time.time()
+            names = _names(account)
+            for name in names:
+                wait = self._blocked_for(circuits.get(name), now, caller)
+                if wait:
+                    blocked = (name, wait)
+                    _count(state, "blocked")
+                    break
+            else:
+                for name in names:
+                    circuit = circuits.get(name)
+                    if (
+                        circuit
+                        and circuit["state"] != CLOSED
+                        and circuit.get("probe") != caller
+                    ):
+                        circuit.update(state=HALF_OPEN, probe=caller, probe_started=now)
+                        _count(state, "probes")
+                        logger.info(f"Circuit {name} half-open, probing recovery")
+
+        if blocked:
+            raise CircuitOpenError(*blocked)
+
+    def record_success(self, account):
+        """코레일이 응답한 요청 기록. 열려 있던 circuit을 닫는다"""
+        with locked_json(self.state_file) as state:
+            circuits = state.setdefault("circuits", {})
+            for name in _names(account):
+                circuit = circuits.pop(name, None)
+                if circuit and circuit["state"] != CLOSED:
+                    logger.info(f"Circuit {name} closed")
+
+    def record_failure(self, account, scope):
+        """실패한 요청 기록
+
+        Args:
+            account (str): 코레일 계정 아이디
+            scope (str | None): 실패 범위 ("global", "account"). None이면 원인을 알 수
+                없는 실패이므로 실패로 세지 않고 이 요청이 맡은 회복 확인만 취소한다
+        """
+        caller = _caller_id()
+        global_name, account_name = _names(account)
+        blamed = {"global": global_name, "account": account_name}.get(scope)
+
+        with locked_json(self.state_file) as state:
+            circuits = state.setdefault("circuits", {})
+            now = time.time()
+
+            for name in (global_name, account_name):
+                circuit = circuits.get(name)
+                if name == blamed:
+                    self._fail(state, name, now)
+                elif circuit and circuit.get("probe") == caller:
+                    if blamed == account_name:
+                        # 계정 문제로 실패했어도 코레일은 응답했으므로 전역 circuit은 회복
+                        del circuits[name]
+                        logger.info(f"Circuit {name} closed")
+                    else:
+                        # 이 요청으로는 회복 여부를 알 수 없으므로 바로 다시 확인하게 함
+                        circuit.update(
+                            state=OPEN,
+                            probe=None,
+                            opened_at=now - circuit["open_for"],
+                        )
+
+    def snapshot(self):
+        """circuit별 상태와 재시도까지 남은 시간, 누적 카운터"""
+        with locked_json(self.state_file) as state:
+            now = time.time()
+            circuits = {
+                name: {
+                    "state": circuit["state"],
+                    "failures": circuit["failures"],
+                    "retry_after": (
+                        round(
+                            max(0.0, circuit["opened_at"] + circuit["open_for"] - now),
+                            1,
+                        )
+                        if circuit["state"] == OPEN
+                        else 0.0
+                    ),
+                }
+                for name, circuit in state.get("circuits", {}).items()
+            }
+            return {"circuits": circuits, "counters": state.get("counters", {})}
+
+    def _blocked_for(self, circuit, now, caller):
+        """circuit 때문에 기다려야 하는 시간(초). 바로 요청해도 되면 0"""
+        if circuit is None or circuit["state"] == CLOSED:
+            return 0.0
+        if circuit["state"] == OPEN:
+            return max(0.0, circuit["opened_at"] + circuit["open_for"] - now)
+        # half_open: 회복 확인중인 요청의 결과를 기다림
+        if (
+            circuit.get("probe") == caller
+            or now - circuit["probe_started"] > self.probe_timeout
+        ):
+            return 0.0
+        return 1.0
+
+    def _fail(self, state, name, now):
+        circuits = state["circuits"]
+        circuit = circuits.setdefault(
+            name,
+            {"state": CLOSED, "failures": 0, "open_for": self.recovery_timeout},
+        )
+        circuit["failures"] += 1
+
+        if circuit["state"] == HALF_OPEN:
+            open_for = min(self.max_recovery_timeout, circuit["open_for"] * 2)
+        elif (
+            circuit["state"] == CLOSED and circuit["failures"] >= self.failure_threshold
+        ):
+            open_for = circuit["open_for"]
+        else:
+            return
+
+        circuit.update(state=OPEN, opened_at=now, open_for=open_for, probe=None)
+        _count(state, "opened")
+        logger.warning(
+            f"Circuit {name} opened after {circuit['failures']} failures, "
+            f"retry in {open_for:.0f}s"
+        )
+
+
+def _names(account):
+    return "global", f"account:{account}"
+
+
+def _caller_id():
+    return f"{os.getpid()}:{threading.get_ident()}"
+
+
+def _count(state, name):
+    counters = state.setdefault("counters", {})
+    counters[name] = counters.get(name, 0) + 1
+
+
+_circuit_breaker = None
+
+
+def get_circuit_breaker():
+    """프로세스에서 공유하는 CircuitBreaker 반환"""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        _circuit_breaker = CircuitBreaker()
+    return _circuit_breaker
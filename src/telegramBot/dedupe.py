@@ -0,0 +1,125 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateDeduplicator:
+    """Telegram이 다시 보낸 update를 걸러내는 중복 확인기
+
+    webhook 응답이 늦으면 Telegram은 같은 update를 다시 보낸다. 최근 `window`초
+    동안 받은 update_id와 callback query id를 기억해 두었다가 같은 값이 다시
+    들어오면 중복으로 판단한다. 최대 `max_size`개까지만 기억하고 오래된 것부터
+    지운다.
+
+    여러 인스턴스가 webhook을 나누어 받으면 다시 보낸 update가 다른 인스턴스로 갈 수
+    있으므로, `store`를 지정하면 `is_shared_duplicate`로 저장소에서도 확인한다.
+
+    Args:
+        window (float, optional): 기억할 시간(초). 기본값은 DEDUPE_WINDOW 또는 600
+        max_size (int, optional): 기억할 최대 개수. 기본값은 DEDUPE_MAX_SIZE 또는 10000
+        store (MemoryStore, optional): 인스턴스끼리 받은 update를 공유할 저장소
+    """
+
+    def __init__(self, window=None, max_size=None, store=None):
+        self.window = (
+            window
+            if window is not None
+            else float(os.environ.get("DEDUPE_WINDOW", "600"))
+        )
+        self.max_size = (
+            max_size
+            if max_size is not None
+            else int(os.environ.get("DEDUPE_MAX_SIZE", "10000"))
+        )
+        self.store = store
+        self._seen = OrderedDict()
+        self.stats = {
+            "checked": 0,
+            "update_hits": 0,
+            "callback_hits": 0,
+            "shared_hits": 0,
+        }
+
+    def is_duplicate(self, update):
+        """이미 받은 update인지 확인하고, 처음 받은 update면 기록
+
+        Args:
+            update (telegram.Update): 받은 update
+
+        Returns:
+            bool: 최근에 같은 update_id 또는 callback query id를 받았으면 True
+        """
+        now = time.monotonic()
+        self._expire(now)
+        self.stats["checked"] += 1
+
+        keys = _keys(update)
+        for kind, value in keys:
+            if (kind, value) in self._seen:
+                self.stats[f"{kind}_hits"] += 1
+                return True
+
+        for key in keys:
+            self._seen[key] = now
+        while len(self._seen) > self.max_size:
+            self._seen.popitem(last=False)
+        return False
+
+    def is_shared_duplicate(self, update):
+        """다른 인스턴스가 이미 받은 update인지 저장소에서 확인하고, 처음이면 기록
+
+        저장소에 접근하므로 executor에서 호출한다. 저장소에 접근하지 못하면 한 번 더
+        처리하는 편이 update를 버리는 것보다 나으므로 중복이 아닌 것으로 판단한다.
+
+        Returns:
+            bool: 최근에 어느 인스턴스든 같은 update를 받았으면 True
+        """
+        if self.store is None:
+            return False
+        try:
+            claimed = self.store.claim_update(_store_keys(update), self.window)
+        except Exception as e:
+            logger.warning(f"Shared dedupe for {update.update_id} failed: {str(e)}")
+            return False
+        if not claimed:
+            self.stats["shared_hits"] += 1
+        return not claimed
+
+    def forget(self, update):
+        """처리하지 못한 update의 기록을 지워 다시 받을 수 있게 함"""
+        for key in _keys(update):
+            self._seen.pop(key, None)
+
+    def forget_shared(self, update):
+        """저장소의 기록도 지움 (저장소에 접근하므로 executor에서 호출)"""
+        if self.store is None:
+            return
+        try:
+            self.store.release_update(_store_keys(update))
+        except Exception as e:
+            logger.warning(f"Shared dedupe for {update.update_id} failed: {str(e)}")
+
+    def _expire(self, now):
+        threshold = now - self.window
+        while self._seen:
+            key, seen_at = next(iter(self._seen.items()))
+            if seen_at >= threshold:
+                break
+            del self._seen[key]
+
+    def snapshot(self):
+        return {**self.stats, "size": len(self._seen)}
+
+
+def _keys(update):
+    keys = [("update", update.update_id)]
+    if update.callback_query is not None:
+        keys.append(("callback", update.callback_query.id))
+    return keys
+
+
+def _store_keys(update):
+    return [f"{kind}:{value}" for kind, value in _keys(update)]
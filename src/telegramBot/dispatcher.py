@@ -0,0 +1,252 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from datetime import timedelta
+
+from telegram.error import RetryAfter
+
+from .rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# 숫자가 작을수록 먼저 보낸다
+PRIORITY_HIGH = 0  # 예약 결과, 관리자 강제 종료 알림
+PRIORITY_NORMAL = 1  # 사용자 입력에 대한 응답
+PRIORITY_LOW = 2  # 구독자 알림 (broadcast)
+
+
+class MessageDispatcher:
+    """텔레그램 메시지를 요청 제한에 맞춰 여러 채팅에 동시에 보내는 발송기
+
+    보낼 메시지를 채팅별 대기열에 넣고, `workers`개의 task가 우선순위가 높은
+    채팅부터 꺼내 보낸다. 같은 채팅의 메시지는 넣은 순서대로 하나씩 보내고,
+    채팅마다 `chat_interval`초 간격을 두며, 전체 발송량은 token bucket으로
+    초당 `rate`개로 제한한다. Telegram이 429(RetryAfter)로 응답하면 알려준
+    시간만큼 모든 발송을 멈췄다가 같은 메시지를 다시 보낸다.
+
+    Args:
+        bot (telegram.Bot): 메시지를 보낼 봇
+        rate (float, optional): 전체 초당 발송 수. 기본값은 TELEGRAM_RATE 또는 25
+            (Telegram 제한은 초당 30개)
+        chat_interval (float, optional): 같은 채팅에 보내는 최소 간격(초).
+            기본값은 TELEGRAM_CHAT_INTERVAL 또는 1
+        workers (int, optional): 동시에 보내는 task 수. 기본값은 TELEGRAM_SEND_WORKERS 또는 8
+        max_retries (int, optional): 429를 받았을 때 다시 보낼 최대 횟수. 기본값 3
+    """
+
+    def __init__(self, bot, rate=None, chat_interval=None, workers=None, max_retries=3):
+        self.bot = bot
+        rate = (
+            rate if rate is not None else float(os.environ.get("TELEGRAM_RATE", "25"))
+        )
+        self.chat_interval = (
+            chat_interval
+            if chat_interval is not None
+            else float(os.environ.get("TELEGRAM_CHAT_INTERVAL", "1"))
+        )
+        self.workers = (
+            workers
+            if workers is not None
+            else int(os.environ.get("TELEGRAM_SEND_WORKERS", "8"))
+        )
+        self.max_retries = max_retries
+        self._bucket = TokenBucket(rate, rate)
+        self._paused_until = 0.0
+        self._chats = {}
+        # 채팅별 마지막 발송 시각. 대기열이 비어 채팅이 지워진 뒤에도 간격을 지키기 위함
+        self._last_sent = {}
+        self._ready = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+        self.stats = {
+            "sent": 0,
+            "failed": 0,
+            "retry_after": 0,
+            "pending": 0,
+            "max_delay_ms": 0.0,
+        }
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self, timeout=5):
+        """남은 메시지를 `timeout`초 동안 보낸 뒤 발송 task 종료"""
+        deadline = time.monotonic() + timeout
+        while self.stats["pending"] and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for chat in self._chats.values():
+            for item in chat["queue"]:
+                if not item["future"].done():
+                    item["future"].set_result(None)
+        self._chats.clear()
+
+    def submit(self, chat_id, text, reply_markup=None, priority=PRIORITY_NORMAL):
+        """메시지를 대기열에 넣고 바로 반환
+
+        Returns:
+            asyncio.Future: 보낸 telegram.Message. 보내지 못하면 None
+        """
+        return self.request(
+            chat_id, "send_message", priority, text=text, reply_markup=reply_markup
+        )
+
+    async def send(self, chat_id, text, reply_markup=None, priority=PRIORITY_NORMAL):
+        """메시지를 대기열에 넣고 보낼 때까지 기다림
+
+        Returns:
+            telegram.Message | None: 보낸 메시지. 보내지 못하면 None
+        """
+        return await self.submit(chat_id, text, reply_markup, priority)
+
+    def request(self, chat_id, method, priority=PRIORITY_NORMAL, **kwargs):
+        """메시지 전송 외의 채팅 단위 API 호출(edit_message_text, pin_chat_message 등)을
+        같은 순서와 발송 제한으로 실행하도록 대기열에 넣음
+
+        Args:
+            chat_id (int): 텔레그램 채팅방 ID
+            method (str): 호출할 telegram.Bot 메서드 이름
+            priority (int, optional): 우선순위. 기본값 PRIORITY_NORMAL
+            **kwargs: chat_id 외에 메서드에 넘길 인자
+
+        Returns:
+            asyncio.Future: 메서드의 반환값. 실패하면 None
+        """
+        future = asyncio.get_running_loop().create_future()
+        chat = self._chats.get(chat_id)
+        delay = 0
+        if chat is None:
+            chat = self._chats[chat_id] = {
+                "queue": deque(),
+                "busy": False,
+                "scheduled": False,
+            }
+            # 방금 보낸 채팅이면 남은 chat_interval 뒤에 발송
+            last_sent = self._last_sent.get(chat_id)
+            if last_sent is not None:
+                delay = last_sent + self.chat_interval - time.monotonic()
+        chat["queue"].append(
+            {
+                "method": method,
+                "kwargs": kwargs,
+                "priority": priority,
+                "queuedAt": time.monotonic(),
+                "future": future,
+            }
+        )
+        self.stats["pending"] += 1
+        self._schedule(chat_id, delay)
+        return future
+
+    def _schedule(self, chat_id, delay=0):
+        """보낼 메시지가 있는 채팅을 `delay`초 뒤 발송 순서에 넣음"""
+        chat = self._chats.get(chat_id)
+        if chat is None or chat["busy"] or chat["scheduled"]:
+            return
+        if not chat["queue"]:
+            del self._chats[chat_id]
+            return
+        chat["scheduled"] = True
+
+        def push():
+            heapq.heappush(
+                self._ready,
+                (chat["queue"][0]["priority"], next(self._seq), chat_id),
+            )
+            self._wakeup.set()
+
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, push)
+        else:
+            push()
+
+    async def _work(self):
+        while True:
+            while not self._ready:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            _, _, chat_id = heapq.heappop(self._ready)
+            chat = self._chats[chat_id]
+            chat["scheduled"] = False
+            chat["busy"] = True
+            item = chat["queue"][0]
+            try:
+                await self._acquire()
+                message = await self._send(chat_id, item)
+            except RetryAfter as e:
+                delay = e.retry_after
+                if isinstance(delay, timedelta):
+                    delay = delay.total_seconds()
+                self.stats["retry_after"] += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                item["retries"] = item.get("retries", 0) + 1
+                logger.warning(
+                    f"Telegram flood control for {chat_id}, retry in {delay}s"
+                )
+                if item["retries"] <= self.max_retries:
+                    # 같은 메시지를 맨 앞에 둔 채로 다시 발송 순서에 넣음
+                    chat["busy"] = False
+                    self._schedule(chat_id, delay)
+                    continue
+                self._finish(chat, None)
+                self.stats["failed"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to {item['method']} for {chat_id}: {str(e)}")
+                self._finish(chat, None)
+                self.stats["failed"] += 1
+            else:
+                self._finish(chat, message)
+                self.stats["sent"] += 1
+            chat["busy"] = False
+            self._mark_sent(chat_id)
+            self._schedule(chat_id, self.chat_interval)
+
+    def _mark_sent(self, chat_id):
+        now = time.monotonic()
+        self._last_sent[chat_id] = now
+        if len(self._last_sent) > 1024:
+            # chat_interval이 지난 기록은 더 이상 필요 없음
+            threshold = now - self.chat_interval
+            self._last_sent = {
+                chat_id: sent
+                for chat_id, sent in self._last_sent.items()
+                if sent >= threshold
+            }
+
+    async def _acquire(self):
+        """전체 발송 예산에서 token 하나를 사용 (429로 멈춘 동안에는 대기)"""
+        while True:
+            now = time.monotonic()
+            self._bucket.refill(time.time())
+            wait = max(self._paused_until - now, self._bucket.wait_time())
+            if wait <= 0:
+                self._bucket.take()
+                return
+            await asyncio.sleep(wait)
+
+    async def _send(self, chat_id, item):
+        delay_ms = (time.monotonic() - item["queuedAt"]) * 1000
+        self.stats["max_delay_ms"] = max(self.stats["max_delay_ms"], delay_ms)
+        return await getattr(self.bot, item["method"])(
+            chat_id=chat_id, **item["kwargs"]
+        )
+
+    def _finish(self, chat, result):
+        item = chat["queue"].popleft()
+        self.stats["pending"] -= 1
+        if not item["future"].done():
+            item["future"].set_result(result)
+
+    def snapshot(self):
+        return {**self.stats, "chats": len(self._chats)}
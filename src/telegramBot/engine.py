@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from dataclasses import dataclass, field
+
+from .errors import LoginRequiredError
+from .korail_client import ReserveHandler
+from .poll_scheduler import PollScheduler
+from .rate_limiter import RateLimitExceeded
+from .search_hub import SearchCoalescer
+from .worker_pool import LatencyRecorder
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReservationJob:
+    """엔진에서 실행되는 예약 작업 정보
+
+    필드 이름은 ReserveHandler.reserve의 인자와 worker 실행 인자를 그대로 따른다.
+    """
+
+    chatId: int
+    username: str
+    # 저장소에서 복구한 예약은 비밀번호 없이 저장된 세션(session)으로 실행
+    password: str | None
+    depDate: str
+    srcLocate: str
+    dstLocate: str
+    depTime: str
+    trainType: str
+    specialInfo: str
+    maxDepTime: str
+    # 예약 확인 때 시간표로 확인한 열차 (trainNo, depTime). 있으면 이 열차들만 조회
+    targetTrains: list | None = None
+    # 봇에서 로그인 확인에 사용한 ReserveHandler. 있으면 다시 로그인하지 않음
+    handler: ReserveHandler | None = field(default=None, repr=False)
+    # ReserveHandler.export_session으로 저장한 세션. handler가 없으면 이 세션으로 복구
+    session: dict | None = field(default=None, repr=False)
+    attempts: int = 0
+    startedAt: float = field(default_factory=time.time)
+    task: asyncio.Task | None = field(default=None, repr=False)
+
+
+class ReservationEngine:
+    """FastAPI 프로세스 안에서 예약 작업을 asyncio task로 실행하는 엔진
+
+    예약마다 `telegramBot.worker` 프로세스를 띄우는 대신, 하나의 이벤트 루프에서
+    모든 예약 작업을 task로 실행한다. korail2 호출은 blocking이므로 스레드에서
+    실행하고, 조회 간격 대기는 asyncio.sleep으로 처리한다.
+
+    Args:
+        on_complete (Callable[[int, int, str], Awaitable]): 작업이 끝났을 때 호출할
+            코루틴 함수. (chat_id, status, reserveInfo)를 인자로 받으며, status 값은
+            `/completion` 엔드포인트와 동일하다.
+        max_retries (int, optional): 예약 루프가 예외로 끝났을 때 재시도할 횟수. 기본값 3
+        on_progress (Callable[[dict], Awaitable], optional): 조회할 때마다 호출할 코루틴
+            함수. worker가 IPC로 보내는 것과 같은 형식의 이벤트(attempt, backoff)를 받는다.
+    """
+
+    def __init__(self, on_complete, max_retries=3, on_progress=None):
+        self.on_complete = on_complete
+        self.on_progress = on_progress
+        self.max_retries = max_retries
+        self.jobs = {}
+        self.search_hub = SearchCoalescer()
+        # 노선별 좌석 반환 기록을 모든 작업이 함께 쓰도록 scheduler 공유
+        self.scheduler = PollScheduler()
+        self._keepalive_task = None
+        # 작업 등록부터 첫 검색까지 걸린 시간
+        self.start_latency = LatencyRecorder()
+
+    def submit(self, job: ReservationJob):
+        """예약 작업을 엔진에 등록하고 바로 실행"""
+        if job.chatId in self.jobs:
+            raise ValueError(f"Chat ID {job.chatId}의 예약이 이미 실행중입니다")
+        job.task = asyncio.create_task(self._run(job), name=f"reservation-{job.chatId}")
+        self.jobs[job.chatId] = job
+        if self._keepalive_task is None or self._keepalive_task.done():
+            self._keepalive_task = asyncio.create_task(
+                self._keep_sessions_alive(), name="session-keepalive"
+            )
+        return job
+
+    def is_running(self, chat_id):
+        return chat_id in self.jobs
+
+    async def cancel(self, chat_id):
+        """실행중인 예약 작업 취소
+
+        Returns:
+            bool: 취소할 작업이 있었으면 True
+        """
+        job = self.jobs.pop(chat_id, None)
+        if job is None:
+            return False
+        job.task.cancel()
+        with suppress(asyncio.CancelledError):
+            await job.task
+        logger.info(f"Reservation job for {chat_id} cancelled")
+        return True
+
+    async def shutdown(self):
+        """서버 종료 시 실행중인 모든 작업 취소"""
+        for chat_id in list(self.jobs):
+            await self.cancel(chat_id)
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._keepalive_task
+
+    async def _keep_sessions_alive(self, poll_interval=30):
+        """실행중인 작업들의 코레일 세션을 검색 루프 밖에서 주기적으로 갱신"""
+        while self.jobs:
+            await asyncio.sleep(poll_interval)
+            for job in list(self.jobs.values()):
+                if job.handler is None or job.handler.korail_client is None:
+                    continue
+                try:
+                    await asyncio.to_thread(job.handler.session.maybe_refresh)
+                except Exception as e:
+                    logger.warning(
+                        f"Session keep-alive for {job.chatId} failed: {str(e)}"
+                    )
+
+    async def _run(self, job: ReservationJob):
+        handler = job.handler = job.handler or ReserveHandler()
+        handler.scheduler = self.scheduler
+        status, reserveInfo = 0, ""
+        try:
+            if handler.korail_client is None:
+                if job.session:
+                    await asyncio.to_thread(
+                        handler.restore_session, job.session, job.password
+                    )
+                elif job.password is None:
+                    raise LoginRequiredError("저장된 코레일 세션이 없습니다")
+                elif not await asyncio.to_thread(
+                    handler.login, job.username, job.password
+                ):
+                    raise Exception("Failed to login")
+
+            handler._update_reserve_info(
+                job.depDate,
+                job.srcLocate,
+                job.dstLocate,
+                job.depTime,
+                job.trainType,
+                job.specialInfo,
+                job.maxDepTime,
+                job.targetTrains,
+            )
+            logger.info(f"{handler.reserveInfo} 작업 시작")
+
+            for retry in range(self.max_retries):
+                try:
+                    reservation = await self._attempt_reservation(job, handler)
+                    if reservation:
+                        status, reserveInfo = 1, str(reservation)
+                    break
+                except (asyncio.CancelledError, LoginRequiredError):
+                    raise
+                except Exception as e:
+                    logger.error(f"Reservation attempt {retry + 1} failed: {str(e)}")
+                    if retry + 1 >= self.max_retries:
+                        raise
+
+        except asyncio.CancelledError:
+            raise
+        except LoginRequiredError as e:
+            logger.info(f"Reservation job for {job.chatId} needs login: {str(e)}")
+            status, reserveInfo = -2, str(e)
+        except Exception as e:
+            logger.error(f"Reservation job for {job.chatId} failed: {str(e)}")
+            status, reserveInfo = 0, f"예약 중 오류 발생: {str(e)}"
+
+        finally:
+            self._release_search_key(job)
+
+        # 취소된 작업은 jobs에서 이미 제거되었으므로 결과를 알리지 않는다
+        if self.jobs.pop(job.chatId, None) is not None:
+            await self.on_complete(job.chatId, status, reserveInfo)
+
+    def _release_search_key(self, job: ReservationJob):
+        """같은 검색 조건을 쓰는 다른 작업이 없으면 공유 검색 캐시 제거"""
+        key = _search_key(job)
+        if not any(
+            _search_key(other) == key
+            for other in self.jobs.values()
+            if other is not job
+        ):
+            self.search_hub.evict(key)
+
+    async def _attempt_reservation(self, job: ReservationJob, handler: ReserveHandler):
+        """ReserveHandler._attempt_reservation과 같은 검색→예약 루프의 asyncio 버전"""
+        while True:
+            stop_reason = self.scheduler.stop_reason(
+                handler.reserveInfo, handler.searchRequests
+            )
+            if stop_reason:
+                break
+
+            if job.attempts == 0:
+                self.start_latency.record(time.time() - job.startedAt)
+            try:
+                # 같은 조건을 검색하는 작업끼리 upstream 검색 결과를 공유
+                trains, coverage = await self.search_hub.search(
+                    handler.search_key(),
+                    lambda: _fetch_trains(handler),
+                    coverage=handler.search_coverage(),
+                )
+                reservation = await asyncio.to_thread(
+                    handler.poll_once, trains, coverage
+                )
+                if reservation:
+                    return reservation
+
+                job.attempts += 1
+                # 남은 요청 예산을 상태 파일에서 읽으므로 스레드에서 계산
+                delay = await asyncio.to_thread(handler.next_interval)
+                await self._emit(
+                    job,
+                    "attempt",
+                    attempt=job.attempts,
+                    trains=handler.lastTrainCount,
+                    delay=delay,
+                )
+                await asyncio.sleep(delay)
+
+            except RateLimitExceeded as e:
+                # 요청 예산이 부족해 이번 검색을 건너뛴 경우는 에러로 세지 않음
+                logger.info(f"요청 제한으로 검색을 건너뜁니다: {str(e)}")
+                delay = await asyncio.to_thread(handler.next_interval)
+                await self._emit(job, "backoff", reason="rate_limit", delay=delay)
+                await asyncio.sleep(delay)
+
+            except LoginRequiredError:
+                raise
+
+            except Exception as e:
+                logger.warning(f"예약 시도 중 오류 발생: {str(e)}")
+                # 원인별 대기 (세션 만료면 다시 로그인하므로 스레드에서 실행)
+                delay = await asyncio.to_thread(handler.error_delay, e)
+                await self._emit(job, "backoff", reason="error", delay=delay)
+                await asyncio.sleep(delay)
+
+        logger.info(f"{stop_reason} (시도 횟수 {job.attempts})")
+        return None
+
+    async def _emit(self, job: ReservationJob, type, **data):
+        """진행 상황 이벤트 전달 (표시용이므로 실패해도 예약은 계속 진행)"""
+        if self.on_progress is None:
+            return
+        try:
+            await self.on_progress(
+                {"type": type, "chatId": job.chatId, "ts": time.time(), **data}
+            )
+        except Exception as e:
+            logger.warning(f"Progress event for {job.chatId} failed: {str(e)}")
+
+
+def _search_key(job: ReservationJob):
+    return (job.srcLocate, job.dstLocate, job.depDate, job.depTime, job.trainType)
+
+
+async def _fetch_trains(handler: ReserveHandler):
+    """공유 검색 계층이 실행할 검색. 열차 목록과 실제로 조회한 범위의 끝을 반환"""
+    trains = await asyncio.to_thread(handler.fetch_trains)
+    return trains, handler.lastCoverage
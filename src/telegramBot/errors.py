@@ -0,0 +1,106 @@
+import json
+
+import requests
+from korail2 import KorailError, NeedToLoginError
+
+
+class KorailCallError(Exception):
+    """코레일 요청 실패의 기본 클래스
+
+    실패 원인별로 하위 클래스를 나누어, 예약 루프가 원인에 맞게 대기 시간을 정하고
+    circuit breaker가 어느 범위(전체/계정)의 실패로 기록할지 정할 수 있게 한다.
+
+    Attributes:
+        scope (str | None): circuit breaker에 기록할 범위.
+            "global"이면 코레일 전체, "account"이면 해당 계정, None이면 기록하지 않음
+        backoff_factor (float): 다음 조회까지 평소 조회 간격의 몇 배를 기다릴지
+        cause (Exception): 원래 발생한 예외
+    """
+
+    scope = None
+    backoff_factor = 2
+
+    def __init__(self, message, cause=None):
+        super().__init__(message)
+        self.cause = cause
+
+
+class NetworkError(KorailCallError):
+    """연결 실패, timeout 등 코레일 서버에 닿지 못한 경우"""
+
+    scope = "global"
+
+
+class ServiceUnavailableError(KorailCallError):
+    """코레일 점검 시간이거나 서버가 정상 응답(JSON)을 주지 못하는 경우"""
+
+    scope = "global"
+    backoff_factor = 4
+
+
+class ThrottledError(KorailCallError):
+    """요청이 너무 많아 코레일이 계정의 요청을 거부한 경우"""
+
+    scope = "account"
+    backoff_factor = 4
+
+
+class AuthError(KorailCallError):
+    """세션이 만료되어 다시 로그인해야 하는 경우"""
+
+    scope = "account"
+    backoff_factor = 1
+
+
+class KorailRequestError(KorailCallError):
+    """코레일이 정상 응답했지만 요청을 처리하지 못한 경우 (잘못된 역 이름 등)"""
+
+
+class UnexpectedError(KorailCallError):
+    """분류되지 않은 예외"""
+
+
+class LoginRequiredError(Exception):
+    """세션이 만료되었지만 비밀번호가 없어 다시 로그인할 수 없는 경우
+
+    비밀번호는 저장소에 저장하지 않으므로, 재시작한 뒤 저장된 세션으로 이어서
+    실행하는 예약에서 발생한다. 사용자가 /start로 다시 로그인해야 한다.
+    """
+
+
+def classify(error):
+    """korail2/requests 예외를 KorailCallError 하위 클래스로 분류
+
+    Args:
+        error (Exception): 코레일 요청 중 발생한 예외
+
+    Returns:
+        KorailCallError: 분류된 예외. 이미 분류된 예외면 그대로 반환
+    """
+    if isinstance(error, KorailCallError):
+        return error
+    message = str(error)
+
+    if isinstance(error, NeedToLoginError):
+        return AuthError(message, error)
+    if isinstance(error, KorailError):
+        if "점검" in (error.msg or ""):
+            return ServiceUnavailableError(message, error)
+        if "과다" in (error.msg or "") or "비정상" in (error.msg or ""):
+            return ThrottledError(message, error)
+        return KorailRequestError(message, error)
+
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        if error.response.status_code == 429:
+            return ThrottledError(message, error)
+        if error.response.status_code >= 500:
+            return ServiceUnavailableError(message, error)
+    if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return NetworkError(message, error)
+    # 점검 페이지 등 JSON이 아닌 응답을 받으면 korail2에서 JSON 파싱이 실패한다
+    if isinstance(error, json.JSONDecodeError):
+        return ServiceUnavailableError(
+            f"Invalid response from Korail: {message}", error
+        )
+
+    return UnexpectedError(message, error)
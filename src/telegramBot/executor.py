@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+logger = logging.getLogger(__name__)
+
+
+class BlockingExecutor:
+    """blocking 호출(코레일 로그인, 프로세스 실행 등)을 이벤트 루프 밖에서 실행하는 스레드 풀
+
+    크기가 제한된 풀에서 실행하므로 느린 호출이 몰려도 스레드가 무한히 늘어나지
+    않는다. 호출마다 timeout을 두어 응답이 없는 호출을 기다리다 사용자의 요청이
+    멈추지 않게 한다. timeout이 지나도 이미 실행중인 스레드를 멈출 수는 없으므로,
+    호출 결과는 버려지고 스레드는 호출이 끝난 뒤 풀로 돌아간다.
+
+    Args:
+        max_workers (int, optional): 최대 스레드 수. 기본값은 BLOCKING_POOL_SIZE 또는 8
+        timeout (float, optional): 기본 timeout(초). 기본값은 BLOCKING_CALL_TIMEOUT 또는 15
+    """
+
+    def __init__(self, max_workers=None, timeout=None):
+        self.max_workers = (
+            max_workers
+            if max_workers is not None
+            else int(os.environ.get("BLOCKING_POOL_SIZE", "8"))
+        )
+        self.timeout = (
+            timeout
+            if timeout is not None
+            else float(os.environ.get("BLOCKING_CALL_TIMEOUT", "15"))
+        )
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="blocking"
+        )
+        self._lock = threading.Lock()
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "active": 0,
+            "max_duration": 0.0,
+        }
+
+    async def run(self, fn, *args, timeout=None, **kwargs):
+        """fn(*args, **kwargs)를 스레드 풀에서 실행하고 결과를 기다림
+
+        Raises:
+            asyncio.TimeoutError: timeout(초) 안에 호출이 끝나지 않은 경우
+        """
+        loop = asyncio.get_running_loop()
+        self._count("submitted")
+        future = loop.run_in_executor(
+            self._pool, partial(self._call, fn, *args, **kwargs)
+        )
+        try:
+            return await asyncio.wait_for(
+                future, timeout if timeout is not None else self.timeout
+            )
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            logger.warning(f"Blocking call {_name(fn)} timed out")
+            raise
+
+    def _call(self, fn, *args, **kwargs):
+        self._count("active")
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+            self._count("completed")
+            return result
+        except Exception:
+            self._count("failed")
+            raise
+        finally:
+            duration = time.monotonic() - started
+            with self._lock:
+                self.stats["active"] -= 1
+                self.stats["max_duration"] = max(self.stats["max_duration"], duration)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class LoopLagMonitor:
+    """이벤트 루프가 막혀있던 시간(loop lag)을 측정
+
+    `interval`마다 깨어나도록 sleep한 뒤 실제로 깨어난 시각과의 차이를 잰다.
+    이벤트 루프에서 blocking 호출이 실행되면 그 시간만큼 늦게 깨어나므로,
+    이 값이 크면 모든 사용자의 webhook 처리가 그만큼 밀렸다는 뜻이다.
+
+    Args:
+        interval (float, optional): 측정 주기(초). 기본값 0.5
+        warn_threshold (float, optional): 경고 로그를 남길 지연 시간(초).
+            기본값은 LOOP_LAG_WARN 또는 0.1
+    """
+
+    def __init__(self, interval=0.5, warn_threshold=None):
+        self.interval = interval
+        self.warn_threshold = (
+            warn_threshold
+            if warn_threshold is not None
+            else float(os.environ.get("LOOP_LAG_WARN", "0.1"))
+        )
+        self.last = 0.0
+        self.max = 0.0
+        self.stalls = 0
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.last = lag
+            self.max = max(self.max, lag)
+            if lag >= self.warn_threshold:
+                self.stalls += 1
+                logger.warning(f"Event loop was blocked for {lag * 1000:.0f}ms")
+
+    @property
+    def stats(self):
+        return {
+            "last_ms": round(self.last * 1000, 1),
+            "max_ms": round(self.max * 1000, 1),
+            "stalls": self.stalls,
+        }
+
+
+def _name(fn):
+    return getattr(fn, "__qualname__", repr(fn))
+
+
+_executor = None
+
+
+def get_executor():
+    """프로세스에서 공유하는 BlockingExecutor 반환"""
+    global _executor
+    if _executor is None:
+        _executor = BlockingExecutor()
+    return _executor
@@ -0,0 +1,161 @@
+import logging
+import os
+import threading
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .shared_state import locked_json
+
+logger = logging.getLogger(__name__)
+
+STATS_FILE = "http_pool.json"
+
+
+class PooledAdapter(HTTPAdapter):
+    """모든 세션이 함께 쓰는 keep-alive 연결 풀
+
+    연결 풀은 host별로 만들어지고 연결은 요청이 끝나면 풀로 돌아가므로, 같은
+    host로 가는 다음 요청은 DNS 조회와 TCP/TLS handshake 없이 기존 연결을 그대로
+    사용한다. 쿠키는 세션(requests.Session)에 저장되고 연결에는 저장되지 않으므로,
+    계정마다 세션을 따로 만들어도 연결은 안전하게 공유할 수 있다.
+
+    timeout을 지정하지 않은 요청(korail2의 요청 등)에는 기본 timeout을 적용한다.
+
+    Args:
+        pool_connections (int, optional): 연결 풀을 유지할 host 수.
+            기본값은 HTTP_POOL_CONNECTIONS 또는 10
+        pool_maxsize (int, optional): host별로 유지할 최대 연결 수.
+            기본값은 HTTP_POOL_MAXSIZE 또는 20
+        timeout (float, optional): 기본 요청 timeout(초). 기본값은 HTTP_TIMEOUT 또는 10
+    """
+
+    def __init__(self, pool_connections=None, pool_maxsize=None, timeout=None):
+        self.timeout = (
+            timeout
+            if timeout is not None
+            else float(os.environ.get("HTTP_TIMEOUT", "10"))
+        )
+        super().__init__(
+            pool_connections=(
+                pool_connections
+                if pool_connections is not None
+                else int(os.environ.get("HTTP_POOL_CONNECTIONS", "10"))
+            ),
+            pool_maxsize=(
+                pool_maxsize
+                if pool_maxsize is not None
+                else int(os.environ.get("HTTP_POOL_MAXSIZE", "20"))
+            ),
+            # 연결 단계에서 실패한 요청은 서버에 도달하지 않았으므로 한 번 다시 시도
+            max_retries=Retry(total=1, connect=1, read=0, status=0),
+        )
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+        return super().send(request, timeout=timeout, **kwargs)
+
+    def stats(self):
+        """host별 연결 수와 요청 수, 연결 재사용 비율"""
+        hosts = {}
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                "connections": pool.num_connections,
+                "requests": pool.num_requests,
+            }
+        connections = sum(host["connections"] for host in hosts.values())
+        requests_ = sum(host["requests"] for host in hosts.values())
+        return {
+            "connections": connections,
+            "requests": requests_,
+            "reuse_ratio": _reuse_ratio(connections, requests_),
+            "hosts": hosts,
+        }
+
+
+class RebasedAdapter(BaseAdapter):
+    """`origin`으로 시작하는 요청을 `base_url`로 바꿔 공유 연결 풀로 보내는 adapter
+
+    korail2처럼 요청 주소가 코드에 고정된 라이브러리를 로컬의 가짜 서버
+    (benchmarks/fake_korail.py) 등으로 보낼 때 세션에 mount해서 사용한다.
+
+    Args:
+        origin (str): 바꿀 주소의 앞부분 (예: "https://smart.letskorail.com:443")
+        base_url (str): 대신 보낼 주소 (예: "http://127.0.0.1:8765")
+    """
+
+    def __init__(self, origin, base_url):
+        super().__init__()
+        self.origin = origin
+        self.base_url = base_url.rstrip("/")
+
+    def send(self, request, **kwargs):
+        request.url = self.base_url + request.url[len(self.origin) :]
+        return get_adapter().send(request, **kwargs)
+
+    def close(self):
+        # 공유 연결 풀은 닫지 않음
+        pass
+
+
+_adapter = None
+_adapter_lock = threading.Lock()
+
+
+def get_adapter():
+    """프로세스에서 공유하는 PooledAdapter 반환"""
+    global _adapter
+    with _adapter_lock:
+        if _adapter is None:
+            _adapter = PooledAdapter()
+        return _adapter
+
+
+def new_session(headers=None):
+    """공유 연결 풀을 사용하는 requests.Session 생성
+
+    세션을 close하면 공유 연결 풀도 닫히므로 이 함수로 만든 세션은 close하지 않는다.
+
+    Args:
+        headers (Mapping, optional): 세션 기본 헤더에 추가할 헤더
+    """
+    session = requests.Session()
+    adapter = get_adapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def record_pool_stats():
+    """현재 프로세스의 연결 수와 요청 수를 공유 상태 파일에 누적 (worker 종료 시)"""
+    stats = get_adapter().stats()
+    try:
+        with locked_json(STATS_FILE) as state:
+            state["connections"] = state.get("connections", 0) + stats["connections"]
+            state["requests"] = state.get("requests", 0) + stats["requests"]
+    except OSError as e:
+        logger.warning(f"Failed to record HTTP pool stats: {str(e)}")
+
+
+def pool_stats():
+    """현재 프로세스의 연결 풀 현황과 종료된 worker들의 누적 재사용 비율"""
+    with locked_json(STATS_FILE) as state:
+        finished = dict(state)
+    finished["reuse_ratio"] = _reuse_ratio(
+        finished.get("connections", 0), finished.get("requests", 0)
+    )
+    return {"current": get_adapter().stats(), "workers": finished}
+
+
+def _reuse_ratio(connections, requests_):
+    if not requests_:
+        return 0.0
+    return round(1 - connections / requests_, 3)
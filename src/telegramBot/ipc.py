@@ -0,0 +1,262 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from .shared_state import data_path
+
+logger = logging.getLogger(__name__)
+
+# frame: 4바이트 big-endian 길이 + UTF-8 JSON
+_HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 1 << 20
+
+
+def default_socket_path():
+    """봇 서버의 Unix socket 경로
+
+    개발/운영 서버나 여러 인스턴스(INSTANCE_ID)가 같은 DATA_DIR을 써도 겹치지 않게
+    구분한다.
+    """
+    name = "bot-dev.sock" if os.environ.get("IS_DEV") == "true" else "bot.sock"
+    if os.environ.get("INSTANCE_ID"):
+        name = f"bot-{os.environ['INSTANCE_ID']}.sock"
+    return os.environ.get("IPC_SOCKET") or data_path(name)
+
+
+def encode_frame(message):
+    body = json.dumps(message, ensure_ascii=False).encode()
+    return _HEADER.pack(len(body)) + body
+
+
+def _recv_exactly(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("IPC connection closed")
+        data += chunk
+    return data
+
+
+def read_frame(sock):
+    """blocking socket에서 frame 하나를 읽어 dict로 반환"""
+    (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    if size > MAX_FRAME_SIZE:
+        raise ValueError(f"IPC frame too large: {size}")
+    return json.loads(_recv_exactly(sock, size))
+
+
+async def read_frame_async(reader):
+    """asyncio stream에서 frame 하나를 읽어 dict로 반환. 연결이 끊어졌으면 None"""
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise ValueError(f"IPC frame too large: {size}")
+    return json.loads(await reader.readexactly(size))
+
+
+class IpcServer:
+    """worker 프로세스가 보내는 예약 이벤트를 받는 Unix socket 서버
+
+    worker마다 연결 하나를 유지하고 이벤트를 frame 단위로 받는다. `ack`가 요청된
+    이벤트(예약 성공/실패)는 받는 즉시 응답하고 on_event는 별도 task로 처리한다.
+    결과 메시지 전송은 발송 제한 때문에 오래 걸릴 수 있으므로, 처리가 끝날 때까지
+    기다리면 worker가 ack timeout 뒤에 같은 이벤트를 다시 보내게 된다. worker가
+    ack를 받지 못해 다시 보낸 이벤트는 (pid, seq)로 구분해 한 번만 처리한다.
+
+    Args:
+        on_event (Callable[[dict], Awaitable]): 이벤트를 처리할 코루틴 함수
+        path (str, optional): socket 경로. 기본값은 IPC_SOCKET 또는 DATA_DIR/bot.sock
+    """
+
+    def __init__(self, on_event, path=None):
+        self.on_event = on_event
+        self.path = path or default_socket_path()
+        self._server = None
+        self._tasks = set()
+        # ack를 요청한 이벤트의 (pid, seq). 다시 보낸 이벤트를 거르기 위해 최근 것만 기억
+        self._acked = OrderedDict()
+        self.stats = {
+            "connections": 0,
+            "events": {},
+            "duplicates": 0,
+            "latency_ms_max": 0.0,
+        }
+        self._latency_total = 0.0
+        self._latency_count = 0
+
+    async def start(self):
+        # 이전 실행에서 남은 socket 파일 제거
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        # socket으로 예약 결과를 조작할 수 없도록 소유자만 접근
+        os.chmod(self.path, 0o600)
+        logger.info(f"IPC server listening on {self.path}")
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        # 이미 ack한 결과는 전송을 마치고 종료
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def _handle(self, reader, writer):
+        self.stats["connections"] += 1
+        try:
+            while True:
+                event = await read_frame_async(reader)
+                if event is None:
+                    break
+                if not event.get("ack"):
+                    self._record(event)
+                    await self._dispatch(event)
+                    continue
+
+                key = (event["pid"], event["seq"])
+                if key in self._acked:
+                    self.stats["duplicates"] += 1
+                else:
+                    self._acked[key] = None
+                    while len(self._acked) > 1024:
+                        self._acked.popitem(last=False)
+                    self._record(event)
+                    task = asyncio.create_task(self._dispatch(event))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                writer.write(encode_frame({"ack": event["seq"]}))
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"IPC connection error: {str(e)}")
+        finally:
+            writer.close()
+
+    async def _dispatch(self, event):
+        try:
+            await self.on_event(event)
+        except Exception as e:
+            logger.error(f"Failed to handle IPC event {event}: {str(e)}")
+
+    def _record(self, event):
+        events = self.stats["events"]
+        events[event["type"]] = events.get(event["type"], 0) + 1
+        latency = max(0.0, (time.time() - event["ts"]) * 1000)
+        self._latency_total += latency
+        self._latency_count += 1
+        self.stats["latency_ms_max"] = max(self.stats["latency_ms_max"], latency)
+        self.stats["latency_ms_avg"] = self._latency_total / self._latency_count
+
+
+class IpcClient:
+    """worker 프로세스에서 봇 서버로 예약 이벤트를 보내는 클라이언트
+
+    연결을 유지하며 이벤트를 보내고, 연결이 끊어지면 다음 이벤트를 보낼 때 다시
+    연결한다. 봇 서버가 살아있는지 알 수 있도록 `heartbeat_interval`마다 heartbeat를
+    보낸다.
+
+    Args:
+        path (str): 봇 서버의 socket 경로
+        chat_id (int | str): 이벤트를 보낼 예약의 채팅 ID
+        heartbeat_interval (float, optional): heartbeat 주기(초).
+            기본값은 IPC_HEARTBEAT_INTERVAL 또는 5
+        ack_timeout (float, optional): ack를 기다릴 최대 시간(초). 기본값 2
+    """
+
+    def __init__(self, path, chat_id, heartbeat_interval=None, ack_timeout=2):
+        self.path = path
+        self.chat_id = chat_id
+        self.heartbeat_interval = (
+            heartbeat_interval
+            if heartbeat_interval is not None
+            else float(os.environ.get("IPC_HEARTBEAT_INTERVAL", "5"))
+        )
+        self.ack_timeout = ack_timeout
+        self._sock = None
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def send(self, type, ack=False, **data):
+        """이벤트 전송
+
+        Args:
+            type (str): 이벤트 종류 ("started", "searching", "attempt", "backoff",
+                "train_found", "reserved", "failed", "heartbeat")
+            ack (bool, optional): 봇 서버가 이벤트를 받았다는 응답을 기다릴지 여부
+
+        Returns:
+            bool: 전송했으면(ack를 요청했으면 ack까지 받았으면) True
+        """
+        with self._lock:
+            self._seq += 1
+            event = {
+                "type": type,
+                "chatId": self.chat_id,
+                "pid": os.getpid(),
+                "seq": self._seq,
+                "ts": time.time(),
+                "ack": ack,
+                **data,
+            }
+            # 봇 서버가 재시작되어 연결이 끊어졌을 수 있으므로 한 번 다시 연결
+            for _ in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(encode_frame(event))
+                    if ack:
+                        while read_frame(self._sock).get("ack") != self._seq:
+                            pass
+                    return True
+                except (OSError, ValueError) as e:
+                    logger.warning(f"IPC send failed: {str(e)}")
+                    self._close()
+                except BaseException:
+                    # 종료 signal 등으로 중단되면 frame 일부만 보냈을 수 있으므로 연결을
+                    # 닫아 다음 이벤트는 새 연결로 보냄
+                    self._close()
+                    raise
+            return False
+
+    def start_heartbeat(self):
+        """별도 스레드에서 heartbeat 전송 시작"""
+
+        def run():
+            while not self._stop.wait(self.heartbeat_interval):
+                self.send("heartbeat")
+
+        threading.Thread(target=run, name="ipc-heartbeat", daemon=True).start()
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            self._close()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.ack_timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+
+    def _close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
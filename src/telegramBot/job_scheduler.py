@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import os
+import time
+
+from .rate_limiter import get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """대기열이 가득 차서 예약을 받을 수 없는 경우"""
+
+
+class JobScheduler:
+    """예약 작업의 실행 순서와 동시 실행 수를 정하는 scheduler
+
+    동시에 실행하는 예약 수를 코레일 요청 예산에 맞춰 제한하고, 자리가 없으면
+    대기열에 넣었다가 자리가 나는 대로 실행한다. 대기열에서는 실행중인 예약이
+    적은 사용자의 예약을 먼저 실행하고(같으면 먼저 들어온 순서), 사용자나 계정의
+    한도에 걸린 예약은 건너뛰어 뒤의 예약이 막히지 않게 한다.
+
+    기본 동시 실행 수는 모든 예약이 최소 조회 간격(POLL_MIN_INTERVAL)으로 조회해도
+    전체 요청 예산(KORAIL_RATE_GLOBAL)의 80%를 넘지 않는 수이고, 계정별 한도도
+    같은 방식으로 계정 예산(KORAIL_RATE_ACCOUNT)에서 정한다.
+
+    Args:
+        start_job (Callable[[int, dict], Awaitable]): 예약을 실행할 코루틴 함수.
+            (job_id, payload)를 인자로 받는다.
+        capacity (int, optional): 동시에 실행할 예약 수.
+            기본값은 RESERVE_MAX_CONCURRENT 또는 요청 예산으로 계산한 값
+        per_user (int, optional): 사용자별 동시 실행 수. 기본값은 RESERVE_MAX_PER_USER 또는 1
+        per_account (int, optional): 코레일 계정별 동시 실행 수.
+            기본값은 RESERVE_MAX_PER_ACCOUNT 또는 계정 요청 예산으로 계산한 값
+        max_queue (int, optional): 대기열 최대 길이. 기본값은 RESERVE_MAX_QUEUE 또는 100
+        rate_limiter (RateLimiter, optional): 요청 예산을 확인할 제한기
+    """
+
+    def __init__(
+        self,
+        start_job,
+        capacity=None,
+        per_user=None,
+        per_account=None,
+        max_queue=None,
+        rate_limiter=None,
+    ):
+        self.start_job = start_job
+        limiter = rate_limiter or get_rate_limiter()
+        min_interval = float(os.environ.get("POLL_MIN_INTERVAL", "1"))
+        self.capacity = _limit(
+            capacity,
+            "RESERVE_MAX_CONCURRENT",
+            int(limiter.global_rate * min_interval * 0.8),
+        )
+        self.per_user = _limit(per_user, "RESERVE_MAX_PER_USER", 1)
+        self.per_account = _limit(
+            per_account,
+            "RESERVE_MAX_PER_ACCOUNT",
+            int(limiter.account_rate * min_interval),
+        )
+        self.max_queue = _limit(max_queue, "RESERVE_MAX_QUEUE", 100)
+        self.running = {}
+        self._waiting = []
+        self.stats = {"submitted": 0, "queued": 0, "started": 0, "rejected": 0}
+
+    async def submit(self, job_id, user, account, payload):
+        """예약을 대기열에 넣고 자리가 있으면 바로 실행
+
+        Args:
+            job_id (int): 예약 ID (채팅 ID)
+            user (int): 사용자 (채팅 ID)
+            account (str): 코레일 계정 아이디
+            payload (dict): start_job에 넘길 작업 정보
+
+        Returns:
+            int: 대기 순서. 바로 실행했으면 0
+
+        Raises:
+            QueueFullError: 대기열이 가득 찬 경우
+        """
+        if len(self._waiting) >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise QueueFullError(f"Reservation queue is full ({self.max_queue})")
+
+        self.stats["submitted"] += 1
+        self._waiting.append(
+            {
+                "jobId": job_id,
+                "user": user,
+                "account": account,
+                "payload": payload,
+                "queuedAt": time.time(),
+            }
+        )
+        await self._dispatch()
+        position = self.position(job_id)
+        if position:
+            self.stats["queued"] += 1
+            logger.info(f"Reservation {job_id} queued at {position}")
+        return position or 0
+
+    def adopt(self, job_id, user, account):
+        """이미 실행중인 예약을 실행 수에 포함 (서버 재시작 후 복구한 worker)"""
+        self.running[job_id] = {"jobId": job_id, "user": user, "account": account}
+
+    def position(self, job_id):
+        """대기 순서 (1부터). 대기중이 아니면 None"""
+        for index, entry in enumerate(self._ordered()):
+            if entry["jobId"] == job_id:
+                return index + 1
+        return None
+
+    def cancel(self, job_id):
+        """대기중인 예약을 대기열에서 제거
+
+        Returns:
+            bool: 대기열에 있었으면 True
+        """
+        for entry in self._waiting:
+            if entry["jobId"] == job_id:
+                self._waiting.remove(entry)
+                return True
+        return False
+
+    def cancel_all(self):
+        """대기중인 모든 예약을 제거하고 예약 ID 목록 반환"""
+        job_ids = [entry["jobId"] for entry in self._waiting]
+        self._waiting.clear()
+        return job_ids
+
+    def release(self, job_id):
+        """실행이 끝난 예약의 자리를 비우고 대기중인 예약 실행"""
+        if self.running.pop(job_id, None) is not None:
+            asyncio.get_running_loop().create_task(self._dispatch())
+
+    def queued_ids(self):
+        return [entry["jobId"] for entry in self._waiting]
+
+    @property
+    def waiting(self):
+        return len(self._waiting)
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            "running": len(self.running),
+            "waiting": len(self._waiting),
+            "capacity": self.capacity,
+            "per_user": self.per_user,
+            "per_account": self.per_account,
+        }
+
+    def _count(self, key, value):
+        return sum(1 for entry in self.running.values() if entry[key] == value)
+
+    def _ordered(self):
+        # 실행중인 예약이 적은 사용자 먼저, 같으면 먼저 들어온 순서
+        return sorted(
+            self._waiting,
+            key=lambda entry: (self._count("user", entry["user"]), entry["queuedAt"]),
+        )
+
+    def _next(self):
+        for entry in self._ordered():
+            if (
+                self._count("user", entry["user"]) < self.per_user
+                and self._count("account", entry["account"]) < self.per_account
+            ):
+                return entry
+        return None
+
+    async def _dispatch(self):
+        while len(self.running) < self.capacity:
+            entry = self._next()
+            if entry is None:
+                return
+            # 실행을 기다리는 동안 다른 dispatch가 같은 자리를 쓰지 않도록 먼저 기록
+            self._waiting.remove(entry)
+            self.running[entry["jobId"]] = entry
+            self.stats["started"] += 1
+            try:
+                await self.start_job(entry["jobId"], entry["payload"])
+            except Exception as e:
+                logger.error(f"Failed to start reservation {entry['jobId']}: {str(e)}")
+                self.running.pop(entry["jobId"], None)
+
+
+def _limit(value, name, default):
+    if value is not None:
+        return value
+    if os.environ.get(name):
+        return int(os.environ[name])
+    return max(1, default)
@@ -0,0 +1,72 @@
+import datetime
+import os
+from collections import OrderedDict
+
+
+class KeyboardCache:
+    """만들어 둔 인라인 키보드를 다시 쓰기 위한 LRU 캐시
+
+    달력과 시간 선택 키보드는 같은 입력이면 항상 같은 버튼을 만들고,
+    InlineKeyboardMarkup은 만든 뒤에 바뀌지 않으므로 여러 사용자가 그대로 공유해도
+    된다. 최대 `max_size`개까지 기억하고 가장 오래 쓰지 않은 것부터 지우며, 날짜가
+    바뀌면 오늘을 기준으로 만든 키보드가 남지 않도록 모두 지운다.
+
+    Args:
+        max_size (int, optional): 기억할 최대 키보드 수. 기본값은 KEYBOARD_CACHE_SIZE 또는 128
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = (
+            max_size
+            if max_size is not None
+            else int(os.environ.get("KEYBOARD_CACHE_SIZE", "128"))
+        )
+        self._entries = OrderedDict()
+        self._day = datetime.date.today()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "resets": 0}
+
+    def get(self, key, build):
+        """캐시된 키보드를 반환하고, 없으면 build()로 만들어 저장
+
+        Args:
+            key (tuple): 키보드를 구분하는 값 (예: ("calendar", year, month))
+            build (Callable[[], InlineKeyboardMarkup]): 키보드를 만드는 함수
+
+        Returns:
+            InlineKeyboardMarkup: 캐시된 또는 새로 만든 키보드
+        """
+        today = datetime.date.today()
+        if today != self._day:
+            self._entries.clear()
+            self._day = today
+            self.stats["resets"] += 1
+
+        markup = self._entries.get(key)
+        if markup is not None:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return markup
+
+        self.stats["misses"] += 1
+        markup = self._entries[key] = build()
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+        return markup
+
+    def clear(self):
+        self._entries.clear()
+
+    def snapshot(self):
+        return {**self.stats, "size": len(self._entries)}
+
+
+_keyboard_cache = None
+
+
+def get_keyboard_cache():
+    """프로세스에서 공유하는 KeyboardCache 반환"""
+    global _keyboard_cache
+    if _keyboard_cache is None:
+        _keyboard_cache = KeyboardCache()
+    return _keyboard_cache
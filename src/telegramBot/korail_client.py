@@ -2,17 +2,55 @@ import os
 import requests
 import time
 import sys
+from datetime import datetime, timedelta
 from korail2 import Korail
-from korail2 import ReserveOption, TrainType, SoldOutError, NoResultsError
+from korail2 import (
+    ReserveOption,
+    TrainType,
+    SoldOutError,
+    NoResultsError,
+)
+from korail2.korail2 import KORAIL_DOMAIN
 from .messages import Messages
+from .rate_limiter import get_rate_limiter, RateLimitExceeded
+from .poll_scheduler import PollScheduler, departure_window
+from .session_keeper import SessionKeeper
+from .http_pool import RebasedAdapter, new_session
+from .circuit_breaker import get_circuit_breaker, CircuitOpenError
+from .errors import (
+    AuthError,
+    KorailCallError,
+    KorailRequestError,
+    LoginRequiredError,
+    classify,
+)
+from .timetable import timetable_entry
 
 sys.setrecursionlimit(10**7)
 
+# 봇 서버로 예약 결과를 보내는 세션 (연결을 재사용하도록 모든 callback이 공유)
+callback_session = new_session()
+
+
+def train_departure(train):
+    """열차의 출발 일시 (datetime)"""
+    return datetime.strptime(train.dep_date + train.dep_time, "%Y%m%d%H%M%S")
+
+
+def train_arrival(train):
+    """열차의 도착 일시 (datetime)"""
+    return datetime.strptime(train.arr_date + train.arr_time, "%Y%m%d%H%M%S")
+
 
 class ReserveHandler:
-    def __init__(self):
+    def __init__(self, scheduler=None):
         self.korail_client = None
-        self.s = requests.session()
+        self.rate_limiter = get_rate_limiter()
+        self.breaker = get_circuit_breaker()
+        # 조회 간격과 조회 예산은 scheduler가 정함 (분당 100회 이상이면 이상탐지에 걸림)
+        self.scheduler = scheduler or PollScheduler(self.rate_limiter)
+        self.max_search_pages = 15  # 검색 시간 범위를 덮기 위한 최대 연속 조회 횟수
+        self.session = SessionKeeper(self)
         self.reserveInfo = {
             "depDate": "",
             "depTime": "",
@@ -21,31 +59,117 @@ class ReserveHandler:
             "special": "",
             "reserveSuc": False,
         }
-        self.interval = 1  # sec 분당 100회 이상이면 이상탐지에 걸림
         self.loginSuc = False
         self.txtGoHour = "000000"
         self.specialVal = ""
         self.chatId = ""  # Telegram Chat bot에서 callback 받을때 전달 받아야 함
-
-        self.s.headers.update(
-            {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-                "Upgrade-Insecure-Requests": "1",
-                "Referer": "http://www.letskorail.com/",
-                "Sec-Fetch-Dest": "document",
-                "Sec-Fetch-User": "?1",
-                "Sec-Fetch-Mode": "navigate",
-                "Sec-Fetch-Site": "cross-site",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Origin": "http://www.letskorail.com",
-            }
-        )
+        # 봇 서버로 예약 이벤트를 보내는 IpcClient (worker 프로세스에서 설정)
+        self.reporter = None
+        # 예약 결과(성공, 실패, 오류)를 봇 서버로 보냈는지 여부
+        self.resultSent = False
+        # 마지막 검색에서 받은 좌석이 있는 열차 수 (진행 상황 표시용)
+        self.lastTrainCount = None
+        # 마지막 검색이 실제로 조회한 범위의 끝 (HHMM, 일부 페이지만 받으면 search_coverage보다 짧음)
+        self.lastCoverage = None
+        # 지금까지 보낸 검색 요청 수 (페이지마다 셈, 조회 예산은 이 값으로 계산)
+        self.searchRequests = 0
 
     def login(self, username, password):
-        self.korail_client = Korail(username, password, auto_login=False)
-        self.loginSuc = self.korail_client.login()
+        self.korail_client = self._new_client(username, password)
+        self.loginSuc = self.call_korail("login", self.korail_client.login)
+        if self.loginSuc:
+            self.session.mark_logged_in()
         return self.loginSuc
 
+    def call_korail(self, kind, fn, *args, **kwargs):
+        """circuit breaker와 요청 제한기를 거쳐 코레일 요청 실행
+
+        검색 결과 없음, 매진처럼 코레일이 정상 응답한 예외는 그대로 발생시키고,
+        그 밖의 예외는 errors.classify로 분류하여 발생시킨다.
+
+        Args:
+            kind (str): 요청 종류 ("search", "reserve", "login" 등)
+            fn (Callable): 호출할 korail2 메서드
+
+        Raises:
+            CircuitOpenError: circuit이 열려 있어 요청하지 않은 경우
+            RateLimitExceeded: 요청 예산이 부족해 요청을 버린 경우
+            KorailCallError: 요청이 실패한 경우 (원인별 하위 클래스)
+        """
+        account = self.korail_client.korail_id
+        self.breaker.before_call(account)
+        self.rate_limiter.acquire(account, kind)
+        if kind == "search":
+            self.searchRequests += 1
+        try:
+            result = fn(*args, **kwargs)
+        except (NoResultsError, SoldOutError):
+            self.breaker.record_success(account)
+            raise
+        except Exception as e:
+            error = classify(e)
+            if isinstance(error, KorailRequestError):
+                self.breaker.record_success(account)
+            else:
+                self.breaker.record_failure(account, error.scope)
+            raise error from e
+        self.breaker.record_success(account)
+        return result
+
+    def _new_client(self, username, password):
+        client = Korail(username, password, auto_login=False)
+        # korail2는 클래스 속성으로 세션을 공유하므로, 한 프로세스에서 여러 계정을
+        # 다루는 경우 쿠키가 섞이지 않도록 인스턴스마다 세션을 새로 만든다
+        # 연결은 공유 연결 풀에서 재사용한다
+        client._session = new_session(Korail._session.headers)
+        base_url = os.environ.get("KORAIL_BASE_URL")
+        if base_url:
+            # 코레일 대신 지정한 서버로 요청 (benchmarks/fake_korail.py 등)
+            client._session.mount(
+                KORAIL_DOMAIN, RebasedAdapter(KORAIL_DOMAIN, base_url)
+            )
+        return client
+
+    def export_session(self):
+        """로그인된 코레일 세션을 다른 프로세스에 넘길 수 있는 dict로 반환
+
+        Returns:
+            dict: 계정 아이디, 세션 key, 쿠키, 회원 정보
+        """
+        client = self.korail_client
+        return {
+            "korailId": client.korail_id,
+            "key": client._key,
+            "cookies": client._session.cookies.get_dict(),
+            "membershipNumber": client.membership_number,
+            "name": client.name,
+            "email": client.email,
+            "loggedInAt": self.session.logged_in_at,
+        }
+
+    def restore_session(self, session, password=None):
+        """export_session으로 받은 세션으로 로그인 없이 코레일 클라이언트 생성
+
+        Args:
+            session (dict): export_session의 반환값
+            password (str, optional): 세션이 만료되었을 때 다시 로그인하기 위한 비밀번호.
+                없으면(저장소에서 복구한 예약) 세션이 살아있는지 먼저 확인한다
+
+        Raises:
+            LoginRequiredError: 비밀번호 없이 복구한 세션이 이미 만료된 경우
+        """
+        self.korail_client = self._new_client(session["korailId"], password)
+        self.korail_client._session.cookies.update(session["cookies"])
+        self.korail_client._key = session["key"]
+        self.korail_client.membership_number = session["membershipNumber"]
+        self.korail_client.name = session["name"]
+        self.korail_client.email = session["email"]
+        self.korail_client.logined = True
+        self.loginSuc = True
+        self.session.mark_logged_in(session.get("loggedInAt"))
+        if password is None and not self.session.is_valid():
+            raise LoginRequiredError("저장된 코레일 세션이 만료되었습니다")
+
     def reserve(
         self,
         depDate,
@@ -56,6 +180,7 @@ class ReserveHandler:
         special=ReserveOption.GENERAL_FIRST,
         chatId="",
         maxDepTime="2400",
+        targetTrains=None,
     ):
         """코레일 홈페이지로 기차표 예약을 시도
 
@@ -68,12 +193,21 @@ class ReserveHandler:
             special (ReserveOption, optional): 예약 옵션 (예: 일반석, 일등석). 기본값은 ReserveOption.GENERAL_FIRST.
             chatId (str, optional): 예약 상태 업데이트를 전송할 채팅 ID. 기본값은 빈 문자열.
             maxDepTime (str, optional): 최대 출발 시간, 형식은 'HHMM'. 기본값은 "2400".
+            targetTrains (list[dict], optional): 예약 확인 때 시간표로 확인한 열차
+                (trainNo, depTime). 있으면 이 열차들만 조회하고 예약한다.
 
         Returns:
             bool: 예약이 성공하면 True, 그렇지 않으면 False.
         """
         self._update_reserve_info(
-            depDate, srcLocate, dstLocate, depTime, trainType, special, maxDepTime
+            depDate,
+            srcLocate,
+            dstLocate,
+            depTime,
+            trainType,
+            special,
+            maxDepTime,
+            targetTrains,
         )
         self.chatId = chatId
         currentTime = time.strftime("%H:%M:%S", time.localtime(time.time()))
@@ -86,7 +220,15 @@ class ReserveHandler:
         return reserveOne
 
     def _update_reserve_info(
-        self, depDate, srcLocate, dstLocate, depTime, trainType, special, maxDepTime
+        self,
+        depDate,
+        srcLocate,
+        dstLocate,
+        depTime,
+        trainType,
+        special,
+        maxDepTime,
+        targetTrains=None,
     ):
         self.reserveInfo.update(
             {
@@ -97,93 +239,343 @@ class ReserveHandler:
                 "trainType": trainType,
                 "special": special,
                 "maxDepTime": maxDepTime,
+                "targetTrains": targetTrains or None,
             }
         )
 
     def _attempt_reservation(self):
         reserveOne = None
-        max_attempts = 1000  # 최대 시도 횟수
         attempt_count = 0
-        last_error_time = time.time()
-        error_count = 0
 
-        while not reserveOne and attempt_count < max_attempts:
-            try:
-                trains = self._search_trains()
-                for train in trains:
-                    print(f"열차 발견 : {train} <- 에 대한 예약을 시작합니다.")
-                    reserveOne = self._try_reserve(train)
-                    if reserveOne:
-                        self.reserveInfo["reserveSuc"] = True
-                        break
-
-                # 에러 카운트 리셋
-                if (
-                    time.time() - last_error_time > 300
-                ):  # 5분 이상 에러가 없으면 카운트 리셋
-                    error_count = 0
+        while not reserveOne:
+            stop_reason = self.scheduler.stop_reason(
+                self.reserveInfo, self.searchRequests
+            )
+            if stop_reason:
+                break
 
+            try:
+                if attempt_count == 0:
+                    self.emit("searching")
+                reserveOne = self.poll_once()
                 attempt_count += 1
-                time.sleep(self.interval)
+                delay = 0.0 if reserveOne else self.next_interval()
+                self.emit(
+                    "attempt",
+                    attempt=attempt_count,
+                    trains=self.lastTrainCount,
+                    delay=delay,
+                )
+                if not reserveOne:
+                    time.sleep(delay)
+
+            except RateLimitExceeded as e:
+                # 요청 예산이 부족해 이번 검색을 건너뛴 경우는 에러로 세지 않음
+                print(f"요청 제한으로 검색을 건너뜁니다: {str(e)}")
+                delay = self.next_interval()
+                self.emit("backoff", reason="rate_limit", delay=delay)
+                time.sleep(delay)
+
+            except LoginRequiredError:
+                raise
 
             except Exception as e:
-                error_count += 1
-                last_error_time = time.time()
                 print(f"예약 시도 중 오류 발생: {str(e)}")
-
-                # 연속 에러가 10회 이상 발생하면 세션 재로그인
-                if error_count >= 10:
-                    print("연속 에러 발생으로 세션 재로그인 시도")
-                    try:
-                        self.login(
-                            self.korail_client.username, self.korail_client.password
-                        )
-                        error_count = 0
-                    except Exception as login_error:
-                        print(f"세션 재로그인 실패: {str(login_error)}")
-                        if self.chatId:
-                            self.sendBotStateChange(
-                                self.chatId,
-                                "세션 오류로 인해 예약이 중단되었습니다.",
-                                0,
-                            )
-                        raise
-
-                time.sleep(self.interval * 2)  # 에러 발생시 대기 시간 증가
+                delay = self.error_delay(e)
+                self.emit("backoff", reason="error", delay=delay)
+                time.sleep(delay)
 
         if not reserveOne:
-            print(f"최대 시도 횟수({max_attempts})를 초과했습니다.")
+            print(f"{stop_reason} (시도 횟수 {attempt_count})")
             if self.chatId:
-                self.sendBotStateChange(
-                    self.chatId, "최대 시도 횟수를 초과하여 예약이 중단되었습니다.", 0
-                )
+                self.sendBotStateChange(self.chatId, stop_reason, 0)
 
         return reserveOne
 
+    def next_interval(self):
+        """scheduler가 정한 다음 조회까지의 대기 시간(초)"""
+        return self.scheduler.next_interval(
+            self.reserveInfo, self.korail_client.korail_id, self.searchRequests
+        )
+
+    def error_delay(self, error):
+        """조회 중 발생한 에러의 원인에 따라 다음 조회까지 기다릴 시간(초)
+
+        circuit이 열려 있으면 회복 확인 시각까지 기다리고, 세션이 만료되었으면
+        다시 로그인한 뒤 바로 조회한다. 그 밖의 에러는 원인별 배수만큼 조회 간격을 늘린다.
+        """
+        if isinstance(error, CircuitOpenError):
+            return error.retry_after
+        error = classify(error)
+        if isinstance(error, AuthError):
+            self.session.mark_down()
+            if self.session.refresh():
+                return 0.0
+        return self.next_interval() * error.backoff_factor
+
+    def poll_once(self, trains=None, coverage=None):
+        """열차를 한 번 검색하고, 조건에 맞는 열차에 순서대로 예약을 시도
+
+        Args:
+            trains (list[Train], optional): 공유 검색 계층 등에서 이미 받아온 검색 결과.
+                None이면 직접 검색한다.
+            coverage (str, optional): trains가 실제로 덮는 검색 범위의 끝 (HHMM)
+
+        Returns:
+            Reservation | None: 예약에 성공하면 예약 정보, 그렇지 않으면 None
+        """
+        if trains is None:
+            trains = self.fetch_trains()
+            coverage = self.lastCoverage
+        self._record_churn(trains, coverage)
+        self.lastTrainCount = len(trains)
+        for train in self.filter_trains(trains):
+            print(f"열차 발견 : {train} <- 에 대한 예약을 시작합니다.")
+            self.emit("train_found", train=str(train))
+            reserveOne = self._try_reserve(train)
+            if reserveOne:
+                self.reserveInfo["reserveSuc"] = True
+                return reserveOne
+        return None
+
+    def _record_churn(self, trains, coverage):
+        """검색 결과의 좌석 있는 열차 수를 scheduler에 기록 (좌석 반환 빈도 계산용)
+
+        공유 검색 결과는 이 예약보다 넓은 범위를, 일부 페이지만 받은 결과는 좁은 범위를
+        덮으므로, 이 예약의 검색 범위를 모두 덮은 결과에서 그 범위의 열차만 센다.
+        """
+        wanted = self.search_coverage()
+        if coverage is not None and coverage < wanted:
+            return
+        # 예약할 열차가 정해져 있으면 coverage가 마지막 열차의 출발 시각이므로,
+        # coverage와 비교하지 않고 fetch_trains가 조회한 범위의 끝과 비교
+        window_end = self._search_window_end()
+        trains = [train for train in trains if train_departure(train) < window_end]
+        self.scheduler.record_search(self.search_key(), trains, coverage=wanted)
+
     def _search_trains(self):
-        try:
-            trains = self.korail_client.search_train(
-                self.reserveInfo["srcLocate"],
-                self.reserveInfo["dstLocate"],
-                self.reserveInfo["depDate"],
-                self.reserveInfo["depTime"],
-                train_type=self.reserveInfo["trainType"],
-            )
-            timeL = "".join(str(trains[0]).split("(")[1].split("~")[0].split(":"))
-            if int(timeL) >= int(self.reserveInfo["maxDepTime"]):
-                trains = []
-        except NoResultsError:
-            trains = []
+        return self.filter_trains(self.fetch_trains())
+
+    def search_key(self):
+        """같은 검색 결과를 공유할 수 있는 검색 조건 key"""
+        return (
+            self.reserveInfo["srcLocate"],
+            self.reserveInfo["dstLocate"],
+            self.reserveInfo["depDate"],
+            self.reserveInfo["depTime"],
+            self.reserveInfo["trainType"],
+        )
+
+    def fetch_trains(self, include_no_seats=False):
+        """코레일에 열차 검색 요청 (예약 조건 필터링 전의 결과)
+
+        코레일은 한 번에 일부 열차만 돌려주므로, 마지막 열차의 출발 시각 이후로
+        이어서 조회하여 검색 시간 범위(depTime~maxDepTime)를 모두 덮는다.
+        예약할 열차(targetTrains)가 정해져 있으면 마지막 열차가 나올 때까지만 조회한다.
+        두 번째 페이지부터 요청 제한이나 일시적인 오류로 조회하지 못하면 받은 열차까지만
+        반환하고, 실제로 조회한 범위의 끝을 lastCoverage에 기록한다.
+
+        Args:
+            include_no_seats (bool, optional): 매진된 열차도 포함할지 여부. 기본값 False
+
+        Returns:
+            list[Train]: 출발 시각 순의 열차 목록. 검색 결과가 없으면 빈 리스트
+        """
+        trains, unreached = self._search_pages(
+            "search",
+            self.reserveInfo["srcLocate"],
+            self.reserveInfo["dstLocate"],
+            self.reserveInfo["depDate"],
+            self.reserveInfo["depTime"],
+            self._search_window_end(),
+            self.reserveInfo["trainType"],
+            partial=True,
+        )
+        self.lastCoverage = (
+            unreached.strftime("%H%M") if unreached else self.search_coverage()
+        )
+
+        if not include_no_seats:
+            trains = [train for train in trains if train.has_seat()]
         return trains
 
+    def fetch_timetable(self, srcLocate, dstLocate, depDate, start, end):
+        """매진 여부와 관계없이 [start, end) 범위에 출발하는 모든 종류의 열차 조회
+
+        Args:
+            srcLocate (str): 출발역
+            dstLocate (str): 도착역
+            depDate (str): 출발 날짜 (YYYYMMDD)
+            start (str): 범위 시작 (HHMM)
+            end (str): 범위 끝 (HHMM, 2400까지)
+
+        Returns:
+            list[dict]: 출발 시각 순의 timetable.timetable_entry 목록
+        """
+        date = datetime.strptime(depDate, "%Y%m%d")
+        window_end = date + timedelta(hours=int(end[:2]), minutes=int(end[2:4]))
+        trains, _ = self._search_pages(
+            "timetable",
+            srcLocate,
+            dstLocate,
+            depDate,
+            f"{start[:4]}00",
+            window_end,
+            TrainType.ALL,
+        )
+        return [
+            timetable_entry(train)
+            for train in trains
+            if train_departure(train) < window_end
+        ]
+
+    def _search_window_end(self):
+        """fetch_trains가 조회하는 범위의 끝 (이 시각 전에 출발하는 열차까지 조회)"""
+        _, window_end = departure_window(self.reserveInfo)
+        targets = self.reserveInfo.get("targetTrains")
+        if targets:
+            last_departure = datetime.strptime(
+                self.reserveInfo["depDate"] + max(t["depTime"] for t in targets),
+                "%Y%m%d%H%M%S",
+            )
+            window_end = min(window_end, last_departure + timedelta(minutes=1))
+        return window_end
+
+    def search_coverage(self):
+        """fetch_trains가 덮는 검색 범위의 끝 (HHMM, 공유 검색 계층의 coverage)"""
+        targets = self.reserveInfo.get("targetTrains")
+        if not targets:
+            return self.reserveInfo["maxDepTime"]
+        return min(
+            self.reserveInfo["maxDepTime"], max(t["depTime"] for t in targets)[:4]
+        )
+
+    def _search_pages(
+        self,
+        kind,
+        srcLocate,
+        dstLocate,
+        depDate,
+        dep_time,
+        window_end,
+        train_type,
+        partial=False,
+    ):
+        """마지막 열차의 출발 시각 이후로 이어서 조회해 window_end까지의 열차를 모음
+
+        Args:
+            partial (bool, optional): 두 번째 페이지부터 요청 제한이나 일시적인 오류로
+                조회하지 못하면 이미 받은 열차를 반환할지 여부. 기본값 False
+
+        Returns:
+            tuple[list[Train], datetime | None]: 열차 목록과, 조회하지 못한 범위의 시작
+                (window_end까지 모두 조회했으면 None)
+        """
+        trains = []
+        seen = set()
+
+        for _ in range(self.max_search_pages):
+            try:
+                page = self.call_korail(
+                    kind,
+                    self.korail_client.search_train,
+                    srcLocate,
+                    dstLocate,
+                    depDate,
+                    dep_time,
+                    train_type=train_type,
+                    include_no_seats=True,
+                )
+            except NoResultsError:
+                break
+            except (RateLimitExceeded, CircuitOpenError, KorailCallError) as e:
+                # 첫 페이지가 실패했거나 세션이 만료되었으면 조회 실패로 처리
+                if not (partial and trains) or isinstance(e, AuthError):
+                    raise
+                print(f"{dep_time} 이후 열차는 조회하지 못했습니다: {str(e)}")
+                return trains, datetime.strptime(depDate + dep_time, "%Y%m%d%H%M%S")
+
+            for train in page:
+                if train.train_no not in seen:
+                    seen.add(train.train_no)
+                    trains.append(train)
+
+            # 마지막 열차가 검색 범위 끝을 넘었거나 다음 날 열차이면 조회 종료
+            next_departure = train_departure(page[-1]) + timedelta(minutes=1)
+            if (
+                next_departure >= window_end
+                or next_departure.strftime("%Y%m%d") != depDate
+            ):
+                break
+            dep_time = next_departure.strftime("%H%M%S")
+        else:
+            # 최대 조회 횟수 안에 window_end까지 덮지 못함
+            return trains, datetime.strptime(depDate + dep_time, "%Y%m%d%H%M%S")
+        return trains, None
+
+    def filter_trains(self, trains):
+        """검색 결과 중 이 예약의 출발 시각 범위와 좌석 옵션에 맞는 열차만 선택"""
+        start, end = departure_window(self.reserveInfo)
+        trains = [train for train in trains if start <= train_departure(train) < end]
+        targets = self.reserveInfo.get("targetTrains")
+        if targets:
+            numbers = {t["trainNo"] for t in targets}
+            trains = [train for train in trains if train.train_no in numbers]
+
+        special = self.reserveInfo["special"]
+        if special == ReserveOption.GENERAL_ONLY:
+            return [train for train in trains if train.has_general_seat()]
+        if special == ReserveOption.SPECIAL_ONLY:
+            return [train for train in trains if train.has_special_seat()]
+        return [train for train in trains if train.has_seat()]
+
     def _try_reserve(self, train):
-        try:
-            return self.korail_client.reserve(train, option=self.reserveInfo["special"])
-        except SoldOutError:
-            print("예약을 놓쳤습니다. 다음 열차를 찾습니다.")
-            return None
+        for retry in range(2):
+            try:
+                return self.call_korail(
+                    "reserve",
+                    self.korail_client.reserve,
+                    train,
+                    option=self.reserveInfo["special"],
+                )
+            except SoldOutError:
+                print("예약을 놓쳤습니다. 다음 열차를 찾습니다.")
+                return None
+            except AuthError:
+                # 세션이 끊어진 상태로 좌석을 발견한 경우, 바로 갱신하고 한 번 더 시도
+                print("세션이 만료되어 다시 로그인 후 예약을 재시도합니다.")
+                self.session.mark_down()
+                if retry or not self.session.refresh():
+                    raise
+
+    def emit(self, type, **data):
+        """봇 서버로 진행 상황 이벤트 전송 (worker 프로세스가 아니면 무시)"""
+        if self.reporter is not None:
+            self.reporter.send(type, **data)
+
+    def _report_result(self, status, reserveInfo):
+        """예약 결과를 IPC로 전송하고 봇 서버가 받았는지 확인
+
+        Returns:
+            bool: 봇 서버가 결과를 받았으면 True. False면 HTTP callback으로 전송해야 함
+        """
+        if self.reporter is None:
+            return False
+        return self.reporter.send(
+            "reserved" if status == 1 else "failed",
+            ack=True,
+            status=status,
+            reserveInfo=reserveInfo,
+        )
+
+    def _callback_url(self, chatId):
+        port = os.getenv("CALLBACK_PORT") or (
+            8390 if os.getenv("IS_DEV", "false") == "true" else 8391
+        )
+        return f"http://127.0.0.1:{port}/completion/{chatId}"
 
     def sendReservationStatus(self, reserveInfo):
+        self.resultSent = True
         result = self.reserveInfo["reserveSuc"]
 
         if result == "wrong":
@@ -193,25 +585,26 @@ class ReserveHandler:
         else:
             status = 0  # Failed status
 
-        port = 8390 if os.getenv("IS_DEV", "false") == "true" else 8391
-        # port = 8391
-        callbackUrl = f"http://127.0.0.1:{port}/completion/{self.chatId}"
         print(self.chatId, reserveInfo, status)
+        if self._report_result(status, str(reserveInfo)):
+            return None
+        callbackUrl = self._callback_url(self.chatId)
         param = {"status": status, "reserveInfo": str(reserveInfo)}
-        s = requests.session()
-        s.post(callbackUrl, params=param, verify=False)
+        callback_session.post(callbackUrl, params=param, verify=False)
         return None
 
     def sendBotStateChange(self, chatId, msg, status):
+        self.resultSent = True
         try:
-            port = 8390 if os.getenv("IS_DEV", "false") == "true" else 8391
-            callbackUrl = f"http://127.0.0.1:{port}/completion/{chatId}"
+            if self._report_result(status, msg):
+                return
+            callbackUrl = self._callback_url(chatId)
             param = {"status": status, "reserveInfo": msg}
 
             # 최대 3번까지 재시도
             for attempt in range(3):
                 try:
-                    response = self.s.post(
+                    response = callback_session.post(
                         callbackUrl, params=param, verify=False, timeout=5
                     )
                     response.raise_for_status()
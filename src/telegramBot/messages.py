@@ -86,14 +86,24 @@ class Messages:
 열차종류 : {trainTypeShow}
 객실종류 : {specialInfoShow}
 ===================
-
+{trains}
 '예'를 선택하시면 예약을 시작합니다.
 '아니오'를 선택하시면 작업을 취소합니다.
 예약 완료에 오랜 시간이 걸릴 수 있습니다.
+"""
+        CONFIRM_TRAINS: str = """
+검색 범위의 열차 ({count}대, 매진 포함)
+{trains}
+===================
 """
         RESERVE_STARTED: str = """
 예약 프로그램 동작이 시작되었습니다. 예약에 성공하면 알려드리겠습니다.
 진행중인 예약을 그만 두시고 싶으시면 /cancel을 입력해주세요.
+"""
+        RESERVE_QUEUED: str = """
+다른 예약이 많아 대기열에 등록되었습니다. (대기 순서 : {position}번째)
+순서가 되면 예약을 시작하고 알려드리겠습니다.
+대기 순서는 /status 로 확인할 수 있고, 대기를 그만 두시려면 /cancel을 입력해주세요.
 """
         HELP_MESSAGE: str = """
 - 예약 시작 : /start
@@ -118,15 +128,51 @@ https://www.letskorail.com/ebizprd/EbizPrdTicketpr13500W_pr13510.do
 코레일톡 → 오른쪽 상단 메뉴 → 승차권 예매 → 예약 승차권 조회/취소
 """
         RESERVE_FINISHED: str = "예약이 취소되었습니다."
+        RESERVE_RESUMED: str = """
+서버가 재시작되어 진행중이던 예약을 다시 시작했습니다.
+진행중인 예약을 그만 두시고 싶으시면 /cancel을 입력해주세요.
+"""
+        RESERVE_PROGRESS: str = """
+[예약 진행 상황] {state}
+===================
+조회 횟수 : {attempts}회
+마지막 조회 : {lastSearch}
+좌석이 있는 열차 : {trains}대
+다음 조회까지 : {backoff}
+===================
+{updatedAt} 기준
+"""
 
     class Error:
         RESERVE_CANCELLED: str = "예약 작업이 취소되었습니다."
+        NO_TRAINS_IN_WINDOW: str = """
+{depDate} {srcLocate} → {dstLocate} 구간에는 {depTime} ~ {maxDepTime} 사이에 출발하는 {trainTypeShow} 열차가 없습니다.
+시간을 다시 선택해 주세요.
+"""
+        STATION_SUGGEST: str = """
+'{station}' 역을 찾을 수 없습니다.
+아래에서 원하시는 역을 선택하시거나, 역 이름을 다시 입력해주세요.
+"""
+        STATION_NOT_FOUND: str = """
+'{station}' 역을 찾을 수 없습니다. 역 이름을 다시 입력해주세요.
+['역' 을 제외한 이름을 입력해주세요.] (ex_ 광명)
+"""
+        STATION_SAME: str = "출발역과 도착역이 같습니다. 도착역을 다시 입력해주세요."
+        CALLBACK_EXPIRED: str = (
+            "만료되었거나 올바르지 않은 버튼입니다. 가장 최근 메시지의 버튼을 눌러주세요."
+        )
         RESERVE_CANCELLED_BY_ADMIN: str = (
             "관리자에 의해 실행중이던 예약이 강제 종료됩니다."
         )
+        RESERVE_QUEUE_FULL: str = (
+            "대기중인 예약이 너무 많아 예약을 시작할 수 없습니다. 잠시 후 다시 시도해 주세요."
+        )
         RESERVE_WRONG: str = (
             "차편을 찾을 수 없거나, 검색에 문제가 생겼습니다. 처음부터 다시 시도해 주세요."
         )
+        LOGIN_EXPIRED: str = (
+            "코레일 로그인이 만료되어 예약을 이어서 진행할 수 없습니다. /start를 입력해 다시 로그인해 주세요."
+        )
         RESERVE_FAILED: str = """
 알수 없는 오류로 예매에 실패했습니다. 처음부터 다시 시도해주세요.
 * 문제가 없는데 계속 반복되는 경우, 이미 해당 열차 예약을 성공한 상태일 수 있습니다. 장바구니를 확인해 보세요.
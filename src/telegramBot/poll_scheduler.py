@@ -0,0 +1,153 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from .rate_limiter import get_rate_limiter
+
+
+class PollScheduler:
+    """예약별 조회 간격과 조회 예산을 정하는 scheduler
+
+    조회 간격은 다음 값으로 정한다.
+    - 출발까지 남은 시간: 출발이 멀수록 간격을 늘린다 (6시간 후 2배, 약 1주 후 6배)
+    - 노선의 좌석 반환 빈도: 최근 취소표가 자주 나온 노선일수록 간격을 줄인다
+    - 남은 요청 예산: 전역/계정 token이 절반 이하로 남으면 간격을 늘린다
+
+    예약 하나가 쓸 수 있는 검색 요청 수(budget)는 고정이므로, 출발이 먼 예약은
+    천천히 조회하며 예산을 아끼고 출발이 임박한 예약에 예산을 집중해서 쓴다.
+    검색 범위를 여러 페이지로 나누어 조회하면 페이지마다 예산을 쓴다.
+
+    Args:
+        rate_limiter (RateLimiter, optional): 남은 요청 예산을 확인할 제한기
+        min_interval (float, optional): 최소 조회 간격(초). 기본값은 POLL_MIN_INTERVAL 또는 1
+        max_interval (float, optional): 최대 조회 간격(초). 기본값은 POLL_MAX_INTERVAL 또는 30
+        budget (int, optional): 예약 하나의 최대 검색 요청 수. 기본값은 RESERVE_ATTEMPT_BUDGET 또는 1000
+        churn_window (float, optional): 좌석 반환 빈도를 계산할 기간(초). 기본값 1800
+    """
+
+    def __init__(
+        self,
+        rate_limiter=None,
+        min_interval=None,
+        max_interval=None,
+        budget=None,
+        churn_window=1800,
+    ):
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.min_interval = (
+            min_interval
+            if min_interval is not None
+            else float(os.environ.get("POLL_MIN_INTERVAL", "1"))
+        )
+        self.max_interval = (
+            max_interval
+            if max_interval is not None
+            else float(os.environ.get("POLL_MAX_INTERVAL", "30"))
+        )
+        self.budget = (
+            budget
+            if budget is not None
+            else int(os.environ.get("RESERVE_ATTEMPT_BUDGET", "1000"))
+        )
+        self.churn_window = churn_window
+        self._lock = threading.Lock()
+        self._last_seen = {}
+        self._releases = {}
+
+    def record_search(self, route_key, trains, coverage=""):
+        """검색 결과로 노선의 좌석 반환을 기록
+
+        좌석이 있는 열차 수가 같은 검색 범위의 직전 검색보다 늘어나면 좌석이 반환된
+        것으로 본다. 검색 범위가 다른 예약끼리 열차 수를 비교하지 않도록 직전 검색은
+        `(route_key, coverage)`마다 기억한다.
+
+        Args:
+            route_key (tuple): 노선 key (ReserveHandler.search_key)
+            trains (list[Train]): 검색 범위 안의 좌석이 있는 열차
+            coverage (str, optional): 열차를 센 검색 범위의 끝 (HHMM)
+        """
+        count = len(trains)
+        with self._lock:
+            previous = self._last_seen.get((route_key, coverage))
+            self._last_seen[(route_key, coverage)] = count
+            if previous is not None and count > previous:
+                releases = self._releases.setdefault(route_key, deque())
+                releases.append(time.time())
+
+    def release_rate(self, route_key):
+        """최근 churn_window 동안의 시간당 좌석 반환 횟수"""
+        with self._lock:
+            releases = self._releases.get(route_key)
+            if not releases:
+                return 0.0
+            threshold = time.time() - self.churn_window
+            while releases and releases[0] < threshold:
+                releases.popleft()
+            return len(releases) * 3600 / self.churn_window
+
+    def next_interval(self, reserveInfo, account, requests=0):
+        """다음 조회까지 기다릴 시간(초)
+
+        Args:
+            reserveInfo (dict): ReserveHandler.reserveInfo
+            account (str): 코레일 계정 아이디
+            requests (int, optional): 지금까지 보낸 검색 요청 수
+
+        Returns:
+            float: 조회 간격(초)
+        """
+        now = datetime.now()
+        start, _ = departure_window(reserveInfo)
+        hours_to_departure = max(0.0, (start - now).total_seconds() / 3600)
+
+        interval = self.min_interval * (1 + math.log2(1 + hours_to_departure / 6))
+
+        route_key = _route_key(reserveInfo)
+        interval /= 1 + self.release_rate(route_key) / 6
+
+        remaining = self.rate_limiter.remaining_ratio(account)
+        if remaining < 0.5:
+            interval *= 1 + (0.5 - remaining) * 4
+
+        # 조회 예산이 10% 이하로 남으면 남은 예산을 더 오래 나누어 사용
+        if self.budget - requests <= self.budget * 0.1:
+            interval *= 2
+
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def stop_reason(self, reserveInfo, requests):
+        """더 이상 조회하지 않아야 하는 이유. 계속 조회해도 되면 None
+
+        Args:
+            reserveInfo (dict): ReserveHandler.reserveInfo
+            requests (int): 지금까지 보낸 검색 요청 수 (ReserveHandler.searchRequests)
+        """
+        if requests >= self.budget:
+            return "최대 시도 횟수를 초과하여 예약이 중단되었습니다."
+        _, end = departure_window(reserveInfo)
+        if datetime.now() >= end:
+            return "검색 시간 범위의 열차가 모두 출발하여 예약이 중단되었습니다."
+        return None
+
+
+def departure_window(reserveInfo):
+    """예약 조건의 출발 시각 범위 (시작, 끝) 반환"""
+    date = datetime.strptime(reserveInfo["depDate"], "%Y%m%d")
+    dep_time = str(reserveInfo["depTime"]).ljust(6, "0")
+    start = date + timedelta(hours=int(dep_time[:2]), minutes=int(dep_time[2:4]))
+    max_dep_time = str(reserveInfo.get("maxDepTime") or "2400")
+    end = date + timedelta(hours=int(max_dep_time[:2]), minutes=int(max_dep_time[2:4]))
+    return start, end
+
+
+def _route_key(reserveInfo):
+    return (
+        reserveInfo["srcLocate"],
+        reserveInfo["dstLocate"],
+        reserveInfo["depDate"],
+        reserveInfo["depTime"],
+        reserveInfo["trainType"],
+    )
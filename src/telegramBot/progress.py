@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+
+from .dispatcher import PRIORITY_LOW, PRIORITY_NORMAL
+from .messages import Messages
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressBoard:
+    """실행중인 예약마다 하나의 진행 상황 메시지를 고정해 두고 제자리에서 수정
+
+    예약이 시작되면 진행 상황 메시지를 보내 채팅방 상단에 고정하고, worker나
+    엔진이 보낸 조회 이벤트는 상태에만 반영해 두었다가 `interval`초에 한 번만
+    메시지를 수정한다. 그 사이에 들어온 이벤트는 다음 수정에 합쳐지고, 내용이
+    바뀌지 않았으면 수정하지 않는다. 메시지 전송과 수정은 모두 MessageDispatcher를
+    거치므로 다른 메시지와 순서가 섞이지 않고 발송 제한도 함께 지킨다.
+
+    Args:
+        dispatcher (MessageDispatcher): 메시지를 보낼 발송기
+        interval (float, optional): 같은 메시지를 수정하는 최소 간격(초).
+            기본값은 PROGRESS_EDIT_INTERVAL 또는 15
+    """
+
+    def __init__(self, dispatcher, interval=None):
+        self.dispatcher = dispatcher
+        self.interval = (
+            interval
+            if interval is not None
+            else float(os.environ.get("PROGRESS_EDIT_INTERVAL", "15"))
+        )
+        self._boards = {}
+        self.stats = {"created": 0, "edits": 0, "coalesced": 0, "unchanged": 0}
+
+    def start(self, chat_id):
+        """진행 상황 메시지를 보내고 고정 (이미 있으면 무시)"""
+        if chat_id in self._boards:
+            return
+        board = {
+            "messageId": None,
+            "fields": {
+                "state": "조회 준비중",
+                "attempts": 0,
+                "lastSearch": None,
+                "trains": None,
+                "backoff": None,
+                "updatedAt": time.time(),
+            },
+            "rendered": None,
+            "lastEdit": 0.0,
+            "timer": None,
+            "inflight": None,
+            "finished": False,
+        }
+        self._boards[chat_id] = board
+        board["rendered"] = _render(board["fields"])
+        future = self.dispatcher.request(
+            chat_id, "send_message", PRIORITY_NORMAL, text=board["rendered"]
+        )
+        future.add_done_callback(
+            lambda done: self._created(chat_id, board, done.result())
+        )
+        self.stats["created"] += 1
+
+    def update(self, chat_id, **fields):
+        """진행 상황을 반영하고 수정 예약 (여러 번 호출해도 interval마다 한 번만 수정)
+
+        Args:
+            chat_id (int): 텔레그램 채팅방 ID
+            **fields: state, attempts, lastSearch(time.time()), trains, backoff(초)
+        """
+        board = self._boards.get(chat_id)
+        if board is None:
+            return
+        board["fields"].update(fields, updatedAt=time.time())
+        self._schedule(chat_id, board)
+
+    def finish(self, chat_id, state="예약 종료"):
+        """마지막 상태로 메시지를 수정하고 고정 해제"""
+        board = self._boards.pop(chat_id, None)
+        if board is None:
+            return
+        if board["timer"] is not None:
+            board["timer"].cancel()
+            board["timer"] = None
+        board["finished"] = True
+        board["fields"].update(state=state, backoff=None, updatedAt=time.time())
+        if board["messageId"] is not None:
+            self._close(chat_id, board)
+
+    def _created(self, chat_id, board, message):
+        if message is None:
+            # 메시지를 보내지 못했으면 수정할 대상이 없으므로 진행 상황 표시 중단
+            if self._boards.get(chat_id) is board:
+                del self._boards[chat_id]
+            return
+        board["messageId"] = message.message_id
+        board["lastEdit"] = time.monotonic()
+        if board["finished"]:
+            # 메시지가 전송되기 전에 예약이 끝난 경우
+            self._close(chat_id, board, pinned=False)
+            return
+        self.dispatcher.request(
+            chat_id,
+            "pin_chat_message",
+            PRIORITY_LOW,
+            message_id=board["messageId"],
+            disable_notification=True,
+        )
+        self._schedule(chat_id, board)
+
+    def _schedule(self, chat_id, board):
+        if board["messageId"] is None:
+            return
+        if board["timer"] is not None:
+            self.stats["coalesced"] += 1
+            return
+        delay = max(0.0, board["lastEdit"] + self.interval - time.monotonic())
+        board["timer"] = asyncio.get_running_loop().call_later(
+            delay, self._flush, chat_id, board
+        )
+
+    def _flush(self, chat_id, board):
+        board["timer"] = None
+        if self._boards.get(chat_id) is not board:
+            return
+        if board["inflight"] is not None and not board["inflight"].done():
+            # 이전 수정이 아직 발송 대기중이면 다음 주기에 합쳐서 수정
+            board["lastEdit"] = time.monotonic()
+            self._schedule(chat_id, board)
+            return
+        self._edit(chat_id, board, PRIORITY_LOW)
+
+    def _edit(self, chat_id, board, priority):
+        text = _render(board["fields"])
+        if text == board["rendered"]:
+            self.stats["unchanged"] += 1
+            return
+        board["rendered"] = text
+        board["lastEdit"] = time.monotonic()
+        board["inflight"] = self.dispatcher.request(
+            chat_id,
+            "edit_message_text",
+            priority,
+            message_id=board["messageId"],
+            text=text,
+        )
+        self.stats["edits"] += 1
+
+    def _close(self, chat_id, board, pinned=True):
+        self._edit(chat_id, board, PRIORITY_NORMAL)
+        if pinned:
+            self.dispatcher.request(
+                chat_id,
+                "unpin_chat_message",
+                PRIORITY_NORMAL,
+                message_id=board["messageId"],
+            )
+
+    def snapshot(self):
+        return {**self.stats, "active": len(self._boards)}
+
+
+def _render(fields):
+    def clock(ts):
+        return datetime.fromtimestamp(ts).strftime("%H:%M:%S") if ts else "-"
+
+    return Messages.Info.RESERVE_PROGRESS.format(
+        state=fields["state"],
+        attempts=fields["attempts"],
+        lastSearch=clock(fields["lastSearch"]),
+        trains="-" if fields["trains"] is None else fields["trains"],
+        backoff="-" if fields["backoff"] is None else f"{fields['backoff']:.0f}초",
+        updatedAt=clock(fields["updatedAt"]),
+    )
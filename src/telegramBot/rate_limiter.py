@@ -0,0 +1,189 @@
+import logging
+import os
+import time
+
+from .shared_state import locked_json
+
+logger = logging.getLogger(__name__)
+
+# 예산이 부족할 때 기다리지 않고 버릴 수 있는 요청 종류.
+# 로그인과 예약은 항상 순서를 기다리고, 검색은 다음 주기에 다시 하면 되므로 버린다.
+SHEDDABLE_KINDS = {"search"}
+
+
+class RateLimitExceeded(Exception):
+    """요청 예산이 부족해 요청을 보내지 않고 버린 경우"""
+
+    def __init__(self, account, kind, wait):
+        super().__init__(
+            f"Rate limit exceeded for {kind} ({account}), {wait:.2f}s until next token"
+        )
+        self.account = account
+        self.kind = kind
+        self.wait = wait
+
+
+class TokenBucket:
+    """초당 `rate`개씩 채워지고 최대 `capacity`개까지 쌓이는 token bucket
+
+    Args:
+        rate (float): 초당 채워지는 token 수
+        capacity (float): 최대로 쌓일 수 있는 token 수 (순간 허용량)
+        tokens (float, optional): 현재 token 수. None이면 capacity
+        updated (float, optional): 마지막으로 token을 계산한 시각 (time.time())
+    """
+
+    def __init__(self, rate, capacity, tokens=None, updated=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity if tokens is None else tokens
+        self.updated = time.time() if updated is None else updated
+
+    def refill(self, now=None):
+        now = time.time() if now is None else now
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount=1):
+        """amount개의 token이 쌓일 때까지 기다려야 하는 시간(초)"""
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount=1):
+        self.tokens -= amount
+
+
+class RateLimiter:
+    """모든 코레일 요청(검색, 예약, 로그인)이 거쳐가는 전역/계정별 요청 제한기
+
+    봇 서버와 worker 프로세스가 같은 상태 파일을 잠가서 사용하므로, 실행중인
+    프로세스 수와 관계없이 전체 요청량과 계정별 요청량이 함께 제한된다.
+
+    Args:
+        global_rate (float): 전체 초당 요청 수. 기본값은 KORAIL_RATE_GLOBAL 또는 10
+        global_burst (float): 전체 순간 허용량. 기본값은 KORAIL_RATE_GLOBAL_BURST 또는 20
+        account_rate (float): 계정별 초당 요청 수. 기본값은 KORAIL_RATE_ACCOUNT 또는 1.5
+            (분당 100회 이상이면 이상탐지에 걸리므로 분당 90회)
+        account_burst (float): 계정별 순간 허용량. 기본값은 KORAIL_RATE_ACCOUNT_BURST 또는 5
+        max_wait (float): 버릴 수 있는 요청이 순서를 기다릴 최대 시간(초).
+            기본값은 KORAIL_RATE_MAX_WAIT 또는 5
+        state_file (str): DATA_DIR 아래의 상태 파일 이름
+    """
+
+    def __init__(
+        self,
+        global_rate=None,
+        global_burst=None,
+        account_rate=None,
+        account_burst=None,
+        max_wait=None,
+        state_file="ratelimit.json",
+    ):
+        self.global_rate = _env_float("KORAIL_RATE_GLOBAL", 10, global_rate)
+        self.global_burst = _env_float("KORAIL_RATE_GLOBAL_BURST", 20, global_burst)
+        self.account_rate = _env_float("KORAIL_RATE_ACCOUNT", 1.5, account_rate)
+        self.account_burst = _env_float("KORAIL_RATE_ACCOUNT_BURST", 5, account_burst)
+        self.max_wait = _env_float("KORAIL_RATE_MAX_WAIT", 5, max_wait)
+        self.state_file = state_file
+
+    def acquire(self, account, kind):
+        """요청을 보내기 전에 전역 예산과 계정 예산에서 token을 하나씩 사용
+
+        token이 부족하면 채워질 때까지 기다린다. 검색처럼 버릴 수 있는 요청은
+        max_wait 이상 기다려야 하면 RateLimitExceeded를 발생시킨다.
+
+        Args:
+            account (str): 코레일 계정 아이디
+            kind (str): 요청 종류 ("search", "reserve", "login" 등)
+
+        Returns:
+            float: 순서를 기다린 시간(초)
+        """
+        waited = 0.0
+        while True:
+            with locked_json(self.state_file) as state:
+                buckets = state.setdefault("buckets", {})
+                counters = state.setdefault("counters", {}).setdefault(
+                    kind, {"granted": 0, "waited": 0, "shed": 0, "wait_sec": 0.0}
+                )
+                now = time.time()
+                global_bucket = self._load(buckets, "global", now)
+                account_bucket = self._load(buckets, f"account:{account}", now)
+                wait = max(global_bucket.wait_time(), account_bucket.wait_time())
+
+                if wait == 0:
+                    global_bucket.take()
+                    account_bucket.take()
+                    self._store(buckets, "global", global_bucket)
+                    self._store(buckets, f"account:{account}", account_bucket)
+                    counters["granted"] += 1
+                    if waited:
+                        counters["waited"] += 1
+                        counters["wait_sec"] += waited
+                    return waited
+
+                if kind in SHEDDABLE_KINDS and waited + wait > self.max_wait:
+                    counters["shed"] += 1
+                    shed = True
+                else:
+                    shed = False
+
+            if shed:
+                raise RateLimitExceeded(account, kind, wait)
+            time.sleep(wait)
+            waited += wait
+
+    def stats(self):
+        """요청 종류별 카운터와 남은 token 수"""
+        with locked_json(self.state_file) as state:
+            now = time.time()
+            buckets = state.get("buckets", {})
+            tokens = {
+                name: round(self._load(buckets, name, now).tokens, 2)
+                for name in buckets
+            }
+            return {"counters": state.get("counters", {}), "tokens": tokens}
+
+    def remaining_ratio(self, account):
+        """계정 예산과 전역 예산 중 더 적게 남은 쪽의 비율 (0~1)"""
+        with locked_json(self.state_file) as state:
+            now = time.time()
+            buckets = state.get("buckets", {})
+            global_bucket = self._load(buckets, "global", now)
+            account_bucket = self._load(buckets, f"account:{account}", now)
+        return min(
+            global_bucket.tokens / global_bucket.capacity,
+            account_bucket.tokens / account_bucket.capacity,
+        )
+
+    def _load(self, buckets, name, now):
+        if name == "global":
+            rate, capacity = self.global_rate, self.global_burst
+        else:
+            rate, capacity = self.account_rate, self.account_burst
+        tokens, updated = buckets.get(name, (None, None))
+        bucket = TokenBucket(rate, capacity, tokens, updated)
+        bucket.refill(now)
+        return bucket
+
+    def _store(self, buckets, name, bucket):
+        buckets[name] = (bucket.tokens, bucket.updated)
+
+
+def _env_float(name, default, value=None):
+    if value is not None:
+        return float(value)
+    return float(os.environ.get(name, default))
+
+
+_rate_limiter = None
+
+
+def get_rate_limiter():
+    """프로세스에서 공유하는 RateLimiter 반환"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import os
+import time
+
+from .circuit_breaker import CircuitOpenError
+from .errors import KorailCallError
+
+logger = logging.getLogger(__name__)
+
+
+class SearchCoalescer:
+    """동일한 조건의 열차 검색을 하나의 upstream 요청으로 합치는 공유 검색 계층
+
+    `(srcLocate, dstLocate, depDate, depTime, trainType)` key가 같은 예약들은
+    같은 검색 결과를 받는다. 검색이 진행중이면 그 결과를 함께 기다리고, 최근
+    `ttl`초 안에 받은 결과가 있으면 다시 요청하지 않고 그 결과를 사용한다.
+    최대 출발 시각이나 좌석 옵션 같은 예약별 조건은 받은 쪽에서
+    `ReserveHandler.filter_trains`로 적용한다.
+
+    검색 결과는 요청한 예약의 최대 출발 시각(coverage)까지만 조회되므로, 공유된
+    결과가 자신의 검색 범위를 덮지 못하는 예약은 직접 조회하고 그 결과를 공유한다.
+    일부 페이지만 조회한 결과는 실제로 조회한 범위까지만 덮는 것으로 저장한다.
+
+    연결 실패나 점검처럼 코레일 전체의 문제로 검색이 실패하면 함께 기다리던 예약 모두
+    에러를 받는다. 세션 만료나 계정별 요청 제한처럼 검색한 예약의 계정에 한정된 에러는
+    검색한 예약만 받고, 함께 기다리던 예약은 다시 검색한다.
+
+    Args:
+        ttl (float, optional): 검색 결과를 재사용할 시간(초). 기본값은 환경변수
+            SEARCH_CACHE_TTL 또는 1초
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = (
+            ttl if ttl is not None else float(os.environ.get("SEARCH_CACHE_TTL", "1"))
+        )
+        self._inflight = {}
+        self._cache = {}
+        self.stats = {
+            "requests": 0,
+            "upstream": 0,
+            "coalesced": 0,
+            "cached": 0,
+            "retried": 0,
+        }
+
+    async def search(self, key, fetch, coverage=""):
+        """key에 해당하는 검색 결과 반환
+
+        Args:
+            key (tuple): 검색 조건 key (ReserveHandler.search_key)
+            fetch (Callable[[], Awaitable[tuple[list, str]]]): 공유 결과가 없을 때 실제
+                검색을 수행할 코루틴 함수. 열차 목록과 실제로 조회한 범위의 끝
+                (HHMM 형식)을 반환한다
+            coverage (str, optional): 필요한 검색 범위의 끝
+                (ReserveHandler.search_coverage, HHMM 형식)
+
+        Returns:
+            tuple[list[Train], str]: 검색된 열차 목록과 그 결과가 덮는 검색 범위의 끝
+        """
+        self.stats["requests"] += 1
+
+        while True:
+            cached = self._cache.get(key)
+            if (
+                cached
+                and time.monotonic() - cached[0] < self.ttl
+                and cached[2] >= coverage
+            ):
+                self.stats["cached"] += 1
+                return cached[1], cached[2]
+
+            # 검색 요청은 별도 task로 실행하여, 먼저 요청한 예약이 취소되어도
+            # 같은 결과를 기다리는 다른 예약에는 영향이 없도록 한다
+            inflight = self._inflight.get(key)
+            owner = inflight is None or inflight[1] < coverage
+            if owner:
+                self.stats["upstream"] += 1
+                task = asyncio.ensure_future(fetch())
+                self._inflight[key] = (task, coverage)
+                task.add_done_callback(lambda t, key=key: self._on_fetched(key, t))
+            else:
+                self.stats["coalesced"] += 1
+                task = inflight[0]
+            try:
+                return await asyncio.shield(task)
+            except Exception as e:
+                if owner or _shared_error(e):
+                    raise
+                # 다른 예약의 세션이나 요청 제한 때문에 실패한 검색이므로 다시 검색
+                logger.info(f"Retrying search for {key} after {type(e).__name__}")
+                self.stats["retried"] += 1
+
+    def _on_fetched(self, key, task):
+        if self._inflight.get(key, (None,))[0] is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.warning(f"Search for {key} failed: {task.exception()}")
+            return
+        trains, coverage = task.result()
+        cached = self._cache.get(key)
+        if (
+            cached is None
+            or cached[2] <= coverage
+            or (time.monotonic() - cached[0] >= self.ttl)
+        ):
+            self._cache[key] = (time.monotonic(), trains, coverage)
+
+    def evict(self, key):
+        """더 이상 구독하는 예약이 없는 key의 캐시 제거"""
+        self._cache.pop(key, None)
+
+
+def _shared_error(error):
+    """함께 기다리던 예약에도 그대로 전달할 검색 에러인지 여부
+
+    연결 실패, 점검 등 코레일 전체(global)의 문제만 전달한다.
+    """
+    if isinstance(error, CircuitOpenError):
+        return error.name == "global"
+    return isinstance(error, KorailCallError) and error.scope == "global"
@@ -0,0 +1,168 @@
+import logging
+import os
+import threading
+import time
+
+from .errors import AuthError, LoginRequiredError
+from .shared_state import locked_json
+
+logger = logging.getLogger(__name__)
+
+STATS_FILE = "sessions.json"
+
+
+class SessionKeeper:
+    """코레일 세션의 수명을 추적하고 만료 전에 미리 갱신하는 관리자
+
+    세션은 로그인 후 `ttl`의 80%가 지나면 새로 로그인한 클라이언트로 교체하고,
+    `check_interval`마다 예약 목록 조회로 세션이 살아있는지 확인한다. 갱신은
+    새 클라이언트로 로그인한 뒤 교체하므로, 갱신 중에도 검색 루프는 기존 세션으로
+    계속 동작한다.
+
+    세션이 끊어진 횟수와 시간은 모든 프로세스가 공유하는 상태 파일에 기록된다.
+
+    Args:
+        handler (ReserveHandler): 세션을 관리할 ReserveHandler
+        ttl (float, optional): 세션 수명 추정치(초). 기본값은 KORAIL_SESSION_TTL 또는 1200
+        check_interval (float, optional): 세션 유효성 확인 주기(초).
+            기본값은 KORAIL_SESSION_CHECK_INTERVAL 또는 300
+    """
+
+    refresh_ratio = 0.8
+
+    def __init__(self, handler, ttl=None, check_interval=None):
+        self.handler = handler
+        self.ttl = (
+            ttl
+            if ttl is not None
+            else float(os.environ.get("KORAIL_SESSION_TTL", "1200"))
+        )
+        self.check_interval = (
+            check_interval
+            if check_interval is not None
+            else float(os.environ.get("KORAIL_SESSION_CHECK_INTERVAL", "300"))
+        )
+        self.logged_in_at = None
+        self.last_checked_at = None
+        self.down_since = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def mark_logged_in(self, logged_in_at=None):
+        self.logged_in_at = logged_in_at or time.time()
+        self.last_checked_at = time.time()
+
+    def mark_down(self):
+        """세션이 끊어진 것을 확인한 시점 기록"""
+        if self.down_since is None:
+            self.down_since = time.time()
+            _record_stats(outages=1)
+
+    def is_valid(self):
+        """가벼운 요청(예약 목록 조회)으로 세션이 살아있는지 확인"""
+        client = self.handler.korail_client
+        try:
+            self.handler.call_korail("session", client.reservations)
+            return True
+        except AuthError:
+            return False
+        finally:
+            self.last_checked_at = time.time()
+
+    def maybe_refresh(self):
+        """만료가 가까워졌거나 세션이 끊어졌으면 갱신 (검색 루프 밖에서 주기적으로 호출)
+
+        Returns:
+            bool: 세션을 갱신했으면 True
+        """
+        if self.logged_in_at is None or not self.can_login():
+            # 비밀번호 없이 복구한 세션은 다시 로그인할 수 없으므로 만료될 때까지 사용
+            return False
+        now = time.time()
+        if now - self.logged_in_at >= self.ttl * self.refresh_ratio:
+            return self.refresh()
+        if now - self.last_checked_at >= self.check_interval and not self.is_valid():
+            self.mark_down()
+            return self.refresh()
+        return False
+
+    def can_login(self):
+        """비밀번호가 있어 세션이 만료되어도 다시 로그인할 수 있는지 여부"""
+        return self.handler.korail_client.korail_pw is not None
+
+    def refresh(self):
+        """새 클라이언트로 로그인한 뒤 기존 클라이언트와 교체
+
+        다른 스레드가 이미 갱신중이면 그 갱신이 끝날 때까지 기다린다.
+
+        Returns:
+            bool: 세션을 사용할 수 있는 상태가 되었으면 True
+
+        Raises:
+            LoginRequiredError: 비밀번호가 없어 다시 로그인할 수 없는 경우
+        """
+        if not self.can_login():
+            raise LoginRequiredError("코레일 세션이 만료되어 다시 로그인해야 합니다")
+        requested_at = time.time()
+        with self._refresh_lock:
+            # 기다리는 동안 다른 스레드가 갱신을 끝냈으면 다시 로그인하지 않음
+            if self.logged_in_at and self.logged_in_at >= requested_at:
+                return True
+
+            old_client = self.handler.korail_client
+            client = self.handler._new_client(
+                old_client.korail_id, old_client.korail_pw
+            )
+            started = time.time()
+            try:
+                success = self.handler.call_korail("login", client.login)
+            except Exception as e:
+                logger.warning(f"Session refresh failed: {str(e)}")
+                success = False
+
+            if not success:
+                _record_stats(refresh_failures=1)
+                return False
+
+            self.handler.korail_client = client
+            self.mark_logged_in()
+            downtime = 0.0
+            if self.down_since is not None:
+                downtime = time.time() - self.down_since
+                self.down_since = None
+            _record_stats(refreshes=1, downtime_sec=downtime)
+            logger.info(
+                f"Korail session refreshed in {time.time() - started:.2f}s"
+                + (f" after {downtime:.1f}s down" if downtime else "")
+            )
+            return True
+
+    def start_background(self, poll_interval=30):
+        """별도 스레드에서 주기적으로 maybe_refresh 실행 (worker 프로세스용)"""
+
+        def run():
+            while not self._stop.wait(poll_interval):
+                try:
+                    self.maybe_refresh()
+                except Exception as e:
+                    logger.warning(f"Session keep-alive error: {str(e)}")
+
+        threading.Thread(target=run, name="session-keeper", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def _record_stats(**deltas):
+    try:
+        with locked_json(STATS_FILE) as state:
+            for name, value in deltas.items():
+                state[name] = state.get(name, 0) + value
+    except OSError as e:
+        logger.warning(f"Failed to record session stats: {str(e)}")
+
+
+def session_stats():
+    """모든 프로세스의 세션 갱신 횟수, 실패 횟수, 끊김 횟수와 시간"""
+    with locked_json(STATS_FILE) as state:
+        return dict(state)
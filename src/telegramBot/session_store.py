@@ -0,0 +1,53 @@
+import os
+import time
+
+
+class SessionStore:
+    """로그인 확인에 사용한 코레일 세션을 예약 작업에 넘겨주기 위한 단기 저장소
+
+    비밀번호 확인 단계에서 로그인한 ReserveHandler를 chat_id별로 보관했다가, 예약이
+    시작되면 작업에 넘겨주어 다시 로그인하지 않고 바로 검색을 시작하게 한다.
+    오래된 세션은 만료되었을 수 있으므로 `ttl`초가 지나면 넘겨주지 않는다.
+
+    Args:
+        ttl (float, optional): 세션을 보관할 시간(초). 기본값은 KORAIL_SESSION_HANDOFF_TTL 또는 600
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = (
+            ttl
+            if ttl is not None
+            else float(os.environ.get("KORAIL_SESSION_HANDOFF_TTL", "600"))
+        )
+        self._sessions = {}
+
+    def put(self, chat_id, reserve_handler):
+        """로그인에 성공한 ReserveHandler 보관"""
+        self._prune()
+        self._sessions[chat_id] = (time.monotonic(), reserve_handler)
+
+    def take(self, chat_id):
+        """보관된 ReserveHandler를 꺼냄. 없거나 만료되었으면 None"""
+        stored = self._sessions.pop(chat_id, None)
+        if stored is None or time.monotonic() - stored[0] > self.ttl:
+            return None
+        return stored[1]
+
+    def peek(self, chat_id):
+        """보관된 ReserveHandler를 꺼내지 않고 반환. 없거나 만료되었으면 None"""
+        stored = self._sessions.get(chat_id)
+        if stored is None or time.monotonic() - stored[0] > self.ttl:
+            return None
+        return stored[1]
+
+    def discard(self, chat_id):
+        self._sessions.pop(chat_id, None)
+
+    def _prune(self):
+        threshold = time.monotonic() - self.ttl
+        for chat_id in [
+            chat_id
+            for chat_id, (stored_at, _) in self._sessions.items()
+            if stored_at < threshold
+        ]:
+            del self._sessions[chat_id]
@@ -0,0 +1,46 @@
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+
+# 봇 서버와 worker 프로세스가 함께 사용하는 상태 파일 디렉토리
+DATA_DIR = os.environ.get(
+    "DATA_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "data")
+)
+
+
+def data_path(name):
+    """DATA_DIR 아래의 파일 경로 반환 (디렉토리가 없으면 생성)"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
+
+
+@contextmanager
+def locked_json(name):
+    """여러 프로세스가 함께 쓰는 JSON 상태 파일을 잠근 상태로 읽고 수정
+
+    with 블록 안에서 dict를 수정하면 블록이 정상 종료될 때 파일에 저장된다.
+    블록에서 예외가 발생하면 저장하지 않는다.
+
+    Example:
+        >>> with locked_json("ratelimit.json") as state:
+        ...     state["count"] = state.get("count", 0) + 1
+    """
+    path = data_path(name)
+    with open(path + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            try:
+                with open(path) as f:
+                    state = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                state = {}
+
+            yield state
+
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
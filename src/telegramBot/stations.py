@@ -0,0 +1,199 @@
+import os
+import re
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from .callback_data import encode_callback
+
+# 코레일 여객 취급역 (KTX, ITX, 새마을, 무궁화, 누리로 정차역)
+# 목록에 없는 역은 EXTRA_STATIONS 환경변수(콤마로 구분)로 추가할 수 있다
+# fmt: off
+KORAIL_STATIONS = (
+    # 경부선
+    "서울", "용산", "영등포", "광명", "수원", "오산", "서정리", "평택", "성환",
+    "천안", "천안아산", "전의", "조치원", "오송", "부강", "신탄진", "대전",
+    "서대전", "옥천", "이원", "지탄", "심천", "각계", "영동", "황간", "추풍령",
+    "김천", "김천구미", "구미", "사곡", "약목", "왜관", "신동", "서대구", "대구",
+    "동대구", "경산", "남성현", "청도", "상동", "밀양", "삼랑진", "원동", "물금",
+    "화명", "구포", "사상", "부산", "행신", "신경주", "울산",
+    # 호남선, 전라선
+    "계룡", "연산", "논산", "강경", "함열", "익산", "김제", "신태인", "정읍",
+    "백양사", "장성", "극락강", "광주", "광주송정", "나주", "다시", "함평",
+    "무안", "몽탄", "일로", "임성리", "목포", "공주", "삼례", "전주", "신리",
+    "임실", "오수", "남원", "곡성", "구례구", "순천", "여천", "여수EXPO",
+    # 경전선
+    "진영", "창원중앙", "창원", "마산", "중리", "함안", "군북", "반성", "진주",
+    "완사", "북천", "횡천", "하동", "진상", "광양", "벌교", "조성", "예당",
+    "득량", "보성", "명봉", "이양", "능주", "화순", "남평", "효천", "서광주",
+    # 중앙선, 동해선
+    "청량리", "상봉", "덕소", "양평", "용문", "지평", "석불", "일신", "매곡",
+    "양동", "서원주", "원주", "신림", "봉양", "제천", "단양", "풍기", "영주",
+    "안동", "의성", "군위", "영천", "하양", "경주", "포항", "태화강", "북울산",
+    "남창", "기장", "신해운대", "센텀", "부전", "좌천", "월내", "덕하", "호계",
+    "입실", "불국사", "안강", "영덕",
+    # 강릉선, 영동선, 태백선
+    "만종", "횡성", "둔내", "평창", "진부", "강릉", "정동진", "묵호", "동해",
+    "삼척", "도계", "신기", "태백", "철암", "석포", "승부", "양원", "분천",
+    "현동", "임기", "춘양", "봉화", "고한", "사북", "민둥산", "예미", "영월",
+    "석항", "쌍룡", "연당", "입석리", "도담",
+    # 장항선
+    "아산", "온양온천", "신창", "도고온천", "신례원", "예산", "삽교", "화양",
+    "홍성", "광천", "청소", "대천", "웅천", "판교", "서천", "장항", "군산",
+    "대야", "탕정", "배방",
+    # 충북선, 중부내륙선, 경북선
+    "오근장", "청주", "청주공항", "증평", "도안", "음성", "주덕", "충주",
+    "삼탄", "부발", "가남", "감곡장호원", "앙성온천", "살미", "수안보온천",
+    "연풍", "문경", "아포", "옥산", "청리", "상주", "함창", "점촌", "용궁",
+    "개포", "예천",
+    # 경춘선
+    "평내호평", "마석", "청평", "가평", "강촌", "남춘천", "춘천",
+)
+# fmt: on
+
+# 사용자가 자주 입력하는 다른 이름
+STATION_ALIASES = {
+    "송정리": "광주송정",
+    "통도사": "울산",
+    "울산통도사": "울산",
+    "여수": "여수EXPO",
+    "여수엑스포": "여수EXPO",
+    "엑스포": "여수EXPO",
+    "오대산": "진부",
+    "진부오대산": "진부",
+    "구미김천": "김천구미",
+    "아산천안": "천안아산",
+    "온양": "온양온천",
+    "도고": "도고온천",
+    "장호원": "감곡장호원",
+    "감곡": "감곡장호원",
+    "수안보": "수안보온천",
+}
+
+
+class StationIndex:
+    """역 이름 검증과 자동완성을 위한 색인
+
+    역 이름과 다른 이름을 정규화(공백, 괄호, 끝의 '역' 제거)해 prefix trie와
+    글자 2-gram 색인에 넣어 두고, 사용자가 입력한 이름을 코레일 조회 없이 바로
+    확인한다. 정확히 일치하면 그 역을, 아니면 입력으로 시작하는 역과 2-gram이
+    많이 겹치는 역을 추천한다.
+
+    Args:
+        stations (Iterable[str], optional): 역 이름 목록. 기본값은 KORAIL_STATIONS와
+            EXTRA_STATIONS(콤마로 구분)
+        aliases (dict[str, str], optional): 다른 이름 -> 역 이름. 기본값 STATION_ALIASES
+    """
+
+    def __init__(self, stations=None, aliases=None):
+        if stations is None:
+            extra = os.environ.get("EXTRA_STATIONS", "")
+            stations = KORAIL_STATIONS + tuple(
+                name.strip() for name in extra.split(",") if name.strip()
+            )
+        aliases = STATION_ALIASES if aliases is None else aliases
+        self.stations = tuple(dict.fromkeys(stations))
+        self._station_set = frozenset(self.stations)
+        self._names = {}
+        for name in self.stations:
+            self._names[normalize(name)] = name
+        for alias, name in aliases.items():
+            if name in self.stations:
+                self._names.setdefault(normalize(alias), name)
+
+        self._trie = {}
+        self._grams = {}
+        for key, name in self._names.items():
+            node = self._trie
+            for char in key:
+                node = node.setdefault(char, {})
+                node.setdefault("", set()).add(name)
+            for gram in _bigrams(key):
+                self._grams.setdefault(gram, set()).add(name)
+
+    def lookup(self, text):
+        """입력한 이름에 해당하는 역 이름. 없으면 None"""
+        return self._names.get(normalize(text))
+
+    def __contains__(self, name):
+        return name in self._station_set
+
+    def suggest(self, text, limit=6):
+        """입력한 이름과 비슷한 역 이름 목록 (가까운 순)
+
+        입력으로 시작하는 역을 짧은 이름부터 먼저 추천하고, 남은 자리는 2-gram
+        Dice 계수가 0.3 이상인 역으로 채운다.
+
+        Args:
+            text (str): 사용자가 입력한 이름
+            limit (int, optional): 최대 추천 수. 기본값 6
+
+        Returns:
+            list[str]: 추천 역 이름
+        """
+        key = normalize(text)
+        if not key:
+            return []
+
+        node = self._trie
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                break
+        prefixed = sorted(node[""], key=lambda name: (len(name), name)) if node else []
+
+        grams = _bigrams(key)
+        scores = {}
+        for gram in grams:
+            for name in self._grams.get(gram, ()):
+                scores[name] = scores.get(name, 0) + 1
+        similar = []
+        for name, common in scores.items():
+            score = 2 * common / (len(grams) + len(_bigrams(normalize(name))))
+            if score >= 0.3:
+                similar.append((-score, len(name), name))
+        similar.sort()
+
+        result = list(dict.fromkeys(prefixed + [name for _, _, name in similar]))
+        return result[:limit]
+
+
+def create_station_keyboard(role, names):
+    """추천 역 선택을 위한 인라인 키보드 생성
+
+    Args:
+        role (str): "src"(출발역) 또는 "dst"(도착역)
+        names (list[str]): 추천 역 이름
+
+    Returns:
+        InlineKeyboardMarkup: 역 이름 버튼을 3개씩 배치한 인라인 키보드 마크업
+    """
+    buttons = [
+        InlineKeyboardButton(name, callback_data=encode_callback("station", role, name))
+        for name in names
+    ]
+    return InlineKeyboardMarkup([buttons[i : i + 3] for i in range(0, len(buttons), 3)])
+
+
+def normalize(text):
+    """비교용 이름 (공백, 괄호, 끝의 '역' 제거, 영문은 대문자)"""
+    text = re.sub(r"[\s()\[\]·.\-]", "", str(text)).upper()
+    if len(text) > 1 and text.endswith("역"):
+        text = text[:-1]
+    return text
+
+
+def _bigrams(text):
+    # 한 글자 이름도 비교할 수 있도록 앞뒤에 경계 문자를 붙임
+    padded = f"^{text}$"
+    return {padded[i : i + 2] for i in range(len(padded) - 1)}
+
+
+_station_index = None
+
+
+def get_station_index():
+    """프로세스에서 공유하는 StationIndex 반환"""
+    global _station_index
+    if _station_index is None:
+        _station_index = StationIndex()
+    return _station_index
@@ -0,0 +1,480 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from .shared_state import data_path
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryStore:
+    """아무것도 저장하지 않는 저장소 (STATE_BACKEND=memory)
+
+    SQLiteStore와 같은 메서드를 가지며, 다른 저장소를 추가할 때의 기준이 된다.
+    """
+
+    stats = {}
+
+    def load(self):
+        """저장된 대화 상태와 구독자 목록
+
+        Returns:
+            dict: {"users": {chat_id: dict}, "subscribers": [chat_id]}
+        """
+        return {"users": {}, "subscribers": []}
+
+    def get_user(self, chat_id):
+        """저장된 대화 상태. 없으면 None"""
+        return None
+
+    def claim_jobs(self, include_own=False):
+        """소유한 인스턴스가 없거나 lease가 만료된 예약을 이 인스턴스 소유로 가져옴
+
+        Args:
+            include_own (bool, optional): 이 인스턴스 이름으로 저장된 예약도 가져올지
+                여부 (재시작한 인스턴스가 자신의 예약을 복구할 때)
+
+        Returns:
+            dict: {chat_id: job}
+        """
+        return {}
+
+    def renew_leases(self, chat_ids):
+        """이 인스턴스가 소유한 예약의 lease 연장
+
+        Args:
+            chat_ids (Iterable[int]): 이 인스턴스에서 실행중이거나 대기중인 예약
+
+        Returns:
+            dict: {"cancel": 다른 인스턴스에서 취소를 요청한 예약,
+                "lost": lease가 만료되어 다른 인스턴스가 가져간 예약}
+        """
+        return {"cancel": [], "lost": []}
+
+    def request_cancel(self, chat_id):
+        """다른 인스턴스가 실행중인 예약의 취소 요청
+
+        Returns:
+            bool: 다른 인스턴스가 실행중인 예약이 있으면 True
+        """
+        return False
+
+    def get_session(self, chat_id, max_age):
+        """로그인 확인 때 저장한 코레일 세션. 없거나 max_age초보다 오래되었으면 None"""
+        return None
+
+    def put_user(self, chat_id, state):
+        pass
+
+    def put_job(self, chat_id, job):
+        pass
+
+    def put_session(self, chat_id, session):
+        """로그인 확인에 사용한 코레일 세션 저장 (None이면 삭제)
+
+        같은 채팅의 다음 update를 다른 인스턴스가 받아도 그 세션으로 예약을 시작한다.
+        """
+        pass
+
+    def delete_job(self, chat_id):
+        pass
+
+    def add_subscriber(self, chat_id):
+        pass
+
+    def claim_update(self, keys, window):
+        """여러 인스턴스 중 처음 받은 인스턴스만 update를 처리하도록 기록
+
+        Args:
+            keys (list[str]): update_id, callback query id로 만든 key
+            window (float): key를 기억할 시간(초)
+
+        Returns:
+            bool: 최근 `window`초 동안 어느 인스턴스도 같은 key를 받지 않았으면 True
+        """
+        return True
+
+    def release_update(self, keys):
+        """처리하지 못한 update의 기록을 지워 다시 받을 수 있게 함"""
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteStore(MemoryStore):
+    """대화 상태, 실행중인 예약, 구독자, 로그인 확인 세션을 SQLite(WAL)에 저장하는 저장소
+
+    쓰기는 바로 실행하지 않고 모아두었다가 `flush_interval`마다 별도 스레드에서
+    하나의 transaction으로 저장하므로, 텔레그램 update 처리 중에는 디스크를 기다리지
+    않는다. 같은 대상을 여러 번 수정하면 마지막 값만 저장한다.
+
+    여러 인스턴스가 같은 DB를 사용할 수 있다. 예약마다 실행하는 인스턴스(owner)와
+    lease 만료 시각을 기록하고, 실행하는 인스턴스는 `lease_ttl`이 지나기 전에
+    lease를 연장한다. 인스턴스가 종료되어 lease가 만료된 예약은 다른 인스턴스가
+    `claim_jobs`로 가져가 이어서 실행한다.
+
+    코레일 비밀번호는 저장하지 않지만, 예약을 이어서 실행하기 위한 코레일 세션이
+    저장되므로 DB 파일은 소유자만 읽을 수 있게 만든다.
+
+    Args:
+        path (str, optional): DB 파일 경로. 기본값은 STATE_DB 또는 DATA_DIR/state.db
+            (개발 서버는 state-dev.db)
+        flush_interval (float, optional): 쓰기를 모아서 저장하는 주기(초).
+            기본값은 STATE_FLUSH_INTERVAL 또는 0.2
+        instance_id (str, optional): 이 인스턴스의 이름. 기본값은 INSTANCE_ID 또는
+            host 이름 (개발 서버는 뒤에 -dev)
+        lease_ttl (float, optional): 예약 lease 유지 시간(초). 기본값은 LEASE_TTL 또는 30
+    """
+
+    def __init__(
+        self, path=None, flush_interval=None, instance_id=None, lease_ttl=None
+    ):
+        name = "state-dev.db" if os.environ.get("IS_DEV") == "true" else "state.db"
+        self.path = path or os.environ.get("STATE_DB") or data_path(name)
+        self.flush_interval = (
+            flush_interval
+            if flush_interval is not None
+            else float(os.environ.get("STATE_FLUSH_INTERVAL", "0.2"))
+        )
+        self.instance_id = instance_id or default_instance_id()
+        self.lease_ttl = (
+            lease_ttl
+            if lease_ttl is not None
+            else float(os.environ.get("LEASE_TTL", "30"))
+        )
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self.stats = {"queued": 0, "coalesced": 0, "written": 0, "batches": 0}
+
+        self._conn = self._connect()
+        self._thread = threading.Thread(
+            target=self._run, name="state-store", daemon=True
+        )
+        self._thread.start()
+
+    def _connect(self):
+        # 코레일 세션이 저장되므로 처음 만들 때부터 소유자만 접근하도록 생성
+        os.close(os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600))
+        os.chmod(self.path, 0o600)
+        # 다른 인스턴스가 쓰는 동안에는 잠금이 풀릴 때까지 기다림
+        conn = sqlite3.connect(
+            self.path, timeout=10, check_same_thread=False, isolation_level=None
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS users (
+                chat_id INTEGER PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS jobs (
+                chat_id INTEGER PRIMARY KEY,
+                job TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                owner TEXT,
+                lease_expires REAL NOT NULL DEFAULT 0,
+                cancel_requested INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS subscribers (
+                chat_id INTEGER PRIMARY KEY
+            );
+            CREATE TABLE IF NOT EXISTS sessions (
+                chat_id INTEGER PRIMARY KEY,
+                session TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS updates (
+                key TEXT PRIMARY KEY,
+                seen_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS updates_seen_at ON updates (seen_at);
+            """)
+        # lease 기록 전에 만든 DB에 column 추가
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, definition in (
+            ("owner", "TEXT"),
+            ("lease_expires", "REAL NOT NULL DEFAULT 0"),
+            ("cancel_requested", "INTEGER NOT NULL DEFAULT 0"),
+        ):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+        return conn
+
+    def load(self):
+        self.flush()
+        with self._write_lock:
+            users = {
+                chat_id: json.loads(state)
+                for chat_id, state in self._conn.execute(
+                    "SELECT chat_id, state FROM users"
+                )
+            }
+            subscribers = [
+                chat_id
+                for (chat_id,) in self._conn.execute("SELECT chat_id FROM subscribers")
+            ]
+        return {"users": users, "subscribers": subscribers}
+
+    def get_user(self, chat_id):
+        self.flush()
+        with self._write_lock:
+            row = self._conn.execute(
+                "SELECT state FROM users WHERE chat_id = ?", (chat_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_session(self, chat_id, max_age):
+        self.flush()
+        with self._write_lock:
+            row = self._conn.execute(
+                "SELECT session FROM sessions WHERE chat_id = ? AND updated_at >= ?",
+                (chat_id, time.time() - max_age),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def claim_jobs(self, include_own=False):
+        self.flush()
+        now = time.time()
+        with self._write_lock:
+            # 다른 인스턴스가 같은 예약을 동시에 가져가지 않도록 쓰기 잠금을 잡고 확인
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT chat_id, job FROM jobs "
+                    "WHERE (owner IS NOT :me AND lease_expires < :now) "
+                    "OR (:own AND owner IS :me)",
+                    {"me": self.instance_id, "now": now, "own": include_own},
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE jobs SET owner = ?, lease_expires = ? WHERE chat_id = ?",
+                    [
+                        (self.instance_id, now + self.lease_ttl, chat_id)
+                        for chat_id, _ in rows
+                    ],
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+        if rows:
+            logger.info(f"Claimed reservations {[chat_id for chat_id, _ in rows]}")
+        return {chat_id: json.loads(job) for chat_id, job in rows}
+
+    def renew_leases(self, chat_ids):
+        # 아직 저장되지 않은 예약을 잃은 것으로 판단하지 않도록 먼저 저장
+        self.flush()
+        with self._write_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET lease_expires = ? WHERE owner = ?",
+                    (time.time() + self.lease_ttl, self.instance_id),
+                )
+                rows = self._conn.execute(
+                    "SELECT chat_id, cancel_requested FROM jobs WHERE owner = ?",
+                    (self.instance_id,),
+                ).fetchall()
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+        owned = {chat_id for chat_id, _ in rows}
+        return {
+            "cancel": [chat_id for chat_id, cancel in rows if cancel],
+            "lost": [chat_id for chat_id in chat_ids if chat_id not in owned],
+        }
+
+    def request_cancel(self, chat_id):
+        self.flush()
+        with self._write_lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 "
+                "WHERE chat_id = ? AND owner IS NOT ? AND lease_expires >= ?",
+                (chat_id, self.instance_id, time.time()),
+            )
+        return cursor.rowcount > 0
+
+    def put_user(self, chat_id, state):
+        # 호출한 뒤에 dict가 바뀌어도 지금 상태가 저장되도록 바로 직렬화
+        self._queue("users", chat_id, json.dumps(state))
+
+    def put_job(self, chat_id, job):
+        self._queue("jobs", chat_id, json.dumps(job))
+
+    def delete_job(self, chat_id):
+        self._queue("jobs", chat_id, None)
+
+    def put_session(self, chat_id, session):
+        self._queue(
+            "sessions", chat_id, None if session is None else json.dumps(session)
+        )
+
+    def add_subscriber(self, chat_id):
+        self._queue("subscribers", chat_id, "")
+
+    def claim_update(self, keys, window):
+        # 다른 인스턴스가 같은 update를 동시에 기록하지 않도록 쓰기 잠금을 잡고 확인
+        now = time.time()
+        with self._write_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "DELETE FROM updates WHERE seen_at < ?", (now - window,)
+                )
+                seen = self._conn.execute(
+                    "SELECT 1 FROM updates WHERE key IN "
+                    f"({', '.join('?' * len(keys))})",
+                    keys,
+                ).fetchone()
+                if seen is None:
+                    self._conn.executemany(
+                        "INSERT INTO updates (key, seen_at) VALUES (?, ?)",
+                        [(key, now) for key in keys],
+                    )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+        return seen is None
+
+    def release_update(self, keys):
+        with self._write_lock:
+            self._conn.executemany(
+                "DELETE FROM updates WHERE key = ?", [(key,) for key in keys]
+            )
+
+    def _queue(self, table, chat_id, value):
+        with self._lock:
+            self.stats["queued"] += 1
+            if (table, chat_id) in self._pending:
+                self.stats["coalesced"] += 1
+            self._pending[(table, chat_id)] = value
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait()
+            # 잠시 기다렸다가 그 사이에 쌓인 쓰기를 함께 저장
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write state: {str(e)}")
+
+    def flush(self):
+        """쌓인 쓰기를 하나의 transaction으로 저장
+
+        여러 스레드가 동시에 flush해도 먼저 꺼낸 batch가 나중에 저장되어 새 값을
+        덮어쓰지 않도록, batch를 꺼낼 때부터 COMMIT까지 `_write_lock`을 잡는다.
+        """
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._wakeup.clear()
+            if not batch:
+                return
+
+            now = time.time()
+            try:
+                self._conn.execute("BEGIN")
+                for (table, chat_id), value in batch.items():
+                    if table == "users":
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO users (chat_id, state, updated_at) "
+                            "VALUES (?, ?, ?)",
+                            (chat_id, value, now),
+                        )
+                    elif table == "sessions":
+                        if value is None:
+                            self._conn.execute(
+                                "DELETE FROM sessions WHERE chat_id = ?", (chat_id,)
+                            )
+                        else:
+                            self._conn.execute(
+                                "INSERT OR REPLACE INTO sessions "
+                                "(chat_id, session, updated_at) VALUES (?, ?, ?)",
+                                (chat_id, value, now),
+                            )
+                    elif table == "subscribers":
+                        self._conn.execute(
+                            "INSERT OR IGNORE INTO subscribers (chat_id) VALUES (?)",
+                            (chat_id,),
+                        )
+                    elif value is None:
+                        # 다른 인스턴스가 가져간 예약은 지우지 않음
+                        self._conn.execute(
+                            "DELETE FROM jobs WHERE chat_id = ? "
+                            "AND (owner IS NULL OR owner = ?)",
+                            (chat_id, self.instance_id),
+                        )
+                    else:
+                        self._conn.execute(
+                            "INSERT INTO jobs "
+                            "(chat_id, job, updated_at, owner, lease_expires) "
+                            "VALUES (?, ?, ?, ?, ?) "
+                            "ON CONFLICT (chat_id) DO UPDATE SET "
+                            "job = excluded.job, updated_at = excluded.updated_at, "
+                            "owner = excluded.owner, "
+                            "lease_expires = excluded.lease_expires "
+                            "WHERE jobs.owner IS NULL OR jobs.owner = excluded.owner "
+                            "OR jobs.lease_expires < excluded.updated_at",
+                            (
+                                chat_id,
+                                value,
+                                now,
+                                self.instance_id,
+                                now + self.lease_ttl,
+                            ),
+                        )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                # BEGIN이 실패한 경우에는 되돌릴 transaction이 없음
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                # 저장하지 못한 쓰기는 다음 주기에 다시 시도 (그 사이 새로 쌓인 값이 우선)
+                with self._lock:
+                    self._pending = {**batch, **self._pending}
+                raise
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        self._conn.close()
+
+
+def default_instance_id():
+    """INSTANCE_ID 또는 host 이름 (개발 서버는 뒤에 -dev)
+
+    같은 host에서 인스턴스를 여러 개 실행하면 INSTANCE_ID를 인스턴스마다 다르게
+    지정해야 한다. 재시작해도 같은 이름을 쓰면 자신이 실행하던 예약을 바로 복구한다.
+    """
+    if os.environ.get("INSTANCE_ID"):
+        return os.environ["INSTANCE_ID"]
+    suffix = "-dev" if os.environ.get("IS_DEV") == "true" else ""
+    return socket.gethostname() + suffix
+
+
+def create_store():
+    """STATE_BACKEND 설정에 맞는 저장소 생성 (sqlite 또는 memory)"""
+    backend = os.environ.get("STATE_BACKEND", "sqlite")
+    if backend == "memory":
+        return MemoryStore()
+    if backend == "sqlite":
+        return SQLiteStore()
+    raise ValueError(f"Unknown STATE_BACKEND: {backend}")
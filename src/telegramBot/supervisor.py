@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import os
+import signal
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessSupervisor:
+    """worker 프로세스의 종료를 이벤트 루프에서 바로 감지하고 회수(reap)하는 감시자
+
+    worker마다 pidfd를 열어 이벤트 루프에 등록하므로, 프로세스가 종료되는 즉시
+    루프 스레드에서 종료 코드와 자원 사용량을 회수하고 on_exit를 호출한다.
+    감시하는 프로세스 수가 늘어나도 스레드나 주기적인 확인이 늘어나지 않는다.
+    pidfd를 쓸 수 없는 환경(Linux 5.3 미만, macOS)에서는 SIGCHLD를 받을 때마다
+    감시중인 프로세스를 확인한다.
+
+    서버가 재시작되기 전에 실행한 worker는 자식 프로세스가 아니므로 `adopt`로
+    감시한다. 이 경우 종료 코드와 자원 사용량은 알 수 없다.
+
+    Args:
+        on_exit (Callable[[int, dict], Awaitable]): 프로세스가 종료되었을 때 호출할
+            코루틴 함수. (chat_id, exit_info)를 인자로 받는다.
+        history (int, optional): 보관할 최근 종료 기록 수. 기본값 20
+    """
+
+    def __init__(self, on_exit, history=20):
+        self.on_exit = on_exit
+        self._watched = {}
+        self._waiters = {}
+        self._sigchld_installed = False
+        self.exits = deque(maxlen=history)
+        self.stats = {"watched": 0, "exited": 0, "crashed": 0}
+
+    def watch(self, process, chat_id, on_exit=None):
+        """subprocess.Popen으로 실행한 worker 감시 시작 (이벤트 루프 스레드에서 호출)
+
+        Args:
+            process (subprocess.Popen): 감시할 프로세스
+            chat_id (int | None): 프로세스가 실행하는 예약의 채팅 ID
+            on_exit (Callable, optional): 이 프로세스에만 사용할 종료 처리 함수
+        """
+        loop = asyncio.get_running_loop()
+        pid = process.pid
+        entry = {
+            "process": process,
+            "chatId": chat_id,
+            "startedAt": time.time(),
+            "pidfd": None,
+            "onExit": on_exit or self.on_exit,
+        }
+        self._watched[pid] = entry
+        self.stats["watched"] += 1
+
+        try:
+            entry["pidfd"] = os.pidfd_open(pid)
+            loop.add_reader(entry["pidfd"], self._reap, pid)
+        except (AttributeError, OSError):
+            self._install_sigchld(loop)
+            # 등록하기 전에 이미 종료되었을 수 있으므로 한 번 확인
+            self._reap(pid)
+
+    def adopt(self, pid, chat_id, on_exit=None, poll_interval=5):
+        """이전 실행에서 시작한 worker 감시 시작 (이벤트 루프 스레드에서 호출)
+
+        자식 프로세스가 아니므로 SIGCHLD를 받을 수 없어, pidfd를 쓸 수 없으면
+        `poll_interval`마다 프로세스가 살아있는지 확인한다.
+
+        Args:
+            pid (int): 감시할 프로세스 ID
+            chat_id (int | None): 프로세스가 실행하는 예약의 채팅 ID
+            on_exit (Callable, optional): 이 프로세스에만 사용할 종료 처리 함수
+            poll_interval (float, optional): pidfd가 없을 때 확인 주기(초). 기본값 5
+        """
+        loop = asyncio.get_running_loop()
+        entry = {
+            "process": None,
+            "chatId": chat_id,
+            "startedAt": time.time(),
+            "pidfd": None,
+            "timer": None,
+            "onExit": on_exit or self.on_exit,
+        }
+        self._watched[pid] = entry
+        self.stats["watched"] += 1
+
+        try:
+            entry["pidfd"] = os.pidfd_open(pid)
+            loop.add_reader(entry["pidfd"], self._reap, pid)
+        except (AttributeError, OSError):
+
+            def poll():
+                self._reap(pid)
+                if pid in self._watched:
+                    entry["timer"] = loop.call_later(poll_interval, poll)
+
+            poll()
+
+    def is_watching(self, pid):
+        return pid in self._watched
+
+    async def wait(self, pid, timeout=None):
+        """프로세스가 종료될 때까지 기다림
+
+        Returns:
+            dict | None: 종료 정보. 감시중이 아니거나 timeout이 지나면 None
+        """
+        if pid not in self._watched:
+            return None
+        future = self._waiters.setdefault(
+            pid, asyncio.get_running_loop().create_future()
+        )
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _install_sigchld(self, loop):
+        if not self._sigchld_installed:
+            loop.add_signal_handler(signal.SIGCHLD, self._reap_all)
+            self._sigchld_installed = True
+
+    def _reap_all(self):
+        for pid in list(self._watched):
+            self._reap(pid)
+
+    def _reap(self, pid):
+        entry = self._watched.get(pid)
+        if entry is None:
+            return
+        if entry["process"] is None:
+            # 자식 프로세스가 아니면 회수할 수 없으므로 종료 여부만 확인
+            if is_running(pid):
+                return
+            waited_pid, status, rusage = pid, None, None
+        else:
+            try:
+                waited_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+            except ChildProcessError:
+                # 다른 곳에서 이미 회수된 경우
+                waited_pid, status, rusage = pid, 0, None
+        if waited_pid == 0:
+            return
+
+        del self._watched[pid]
+        if entry["pidfd"] is not None:
+            asyncio.get_running_loop().remove_reader(entry["pidfd"])
+            os.close(entry["pidfd"])
+
+        exit_code = None
+        if status is not None:
+            exit_code = os.waitstatus_to_exitcode(status)
+            # Popen이 나중에 다시 회수하려고 하지 않도록 종료 코드 기록
+            entry["process"].returncode = exit_code
+        exit_info = {
+            "chatId": entry["chatId"],
+            "pid": pid,
+            "exitCode": exit_code,
+            "runtime": round(time.time() - entry["startedAt"], 1),
+        }
+        if rusage is not None:
+            exit_info.update(
+                userTime=round(rusage.ru_utime, 2),
+                systemTime=round(rusage.ru_stime, 2),
+                maxRssKb=_max_rss_kb(rusage),
+            )
+        self.exits.append(exit_info)
+        self.stats["exited"] += 1
+        if exit_code not in (None, 0, -signal.SIGTERM):
+            self.stats["crashed"] += 1
+        logger.info(f"Worker {pid} for {entry['chatId']} exited: {exit_info}")
+
+        future = self._waiters.pop(pid, None)
+        if future is not None and not future.done():
+            future.set_result(exit_info)
+        asyncio.get_running_loop().create_task(
+            self._notify(entry["onExit"], entry["chatId"], exit_info)
+        )
+
+    async def _notify(self, on_exit, chat_id, exit_info):
+        try:
+            await on_exit(chat_id, exit_info)
+        except Exception as e:
+            logger.error(f"Failed to handle worker exit {exit_info}: {str(e)}")
+
+    def close(self):
+        loop = asyncio.get_running_loop()
+        for entry in self._watched.values():
+            if entry["pidfd"] is not None:
+                loop.remove_reader(entry["pidfd"])
+                os.close(entry["pidfd"])
+                entry["pidfd"] = None
+            if entry.get("timer") is not None:
+                entry["timer"].cancel()
+                entry["timer"] = None
+        if self._sigchld_installed:
+            loop.remove_signal_handler(signal.SIGCHLD)
+            self._sigchld_installed = False
+
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # 다른 사용자의 프로세스 (pid가 재사용된 경우)
+        return True
+    return True
+
+
+def is_worker_process(pid):
+    """pid가 실행중인 예약 worker인지 확인 (pid가 다른 프로세스에 재사용되었을 수 있음)"""
+    if not is_running(pid):
+        return False
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return b"telegramBot.worker" in f.read()
+    except FileNotFoundError:
+        # /proc이 없는 환경(macOS)에서는 실행 여부만 확인
+        return not os.path.isdir("/proc")
+    except OSError:
+        return False
+
+
+def _max_rss_kb(rusage):
+    # macOS는 ru_maxrss를 byte 단위로, Linux는 KB 단위로 돌려준다
+    if os.uname().sysname == "Darwin":
+        return rusage.ru_maxrss // 1024
+    return rusage.ru_maxrss
@@ -1,10 +1,10 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 import datetime
 
+from .callback_data import encode_callback
+from .keyboard_cache import get_keyboard_cache
 
-def create_callback_data(action, time_str):
-    """Callback data 형식 문자열 제작 (action;time)"""
-    return ";".join([action, time_str])
+MINUTE_INTERVAL = 30  # 시간 버튼 간격(분)
 
 
 def create_time_keyboard(action="time", min_time=None):
@@ -17,12 +17,45 @@ def create_time_keyboard(action="time", min_time=None):
     Returns:
         InlineKeyboardMarkup: 시간 선택 레이아웃이 포함된 텔레그램 인라인 키보드 마크업
     """
+    # 최소 시간이 같은 30분 구간 안에 있으면 같은 버튼이 만들어지므로 구간 단위로 캐시
+    slot = None
+    if min_time is not None:
+        minutes = int(min_time[:2]) * 60 + int(min_time[2:])
+        slot = -(-minutes // MINUTE_INTERVAL) * MINUTE_INTERVAL
+    grid = get_keyboard_cache().get(
+        ("time", action, slot, _has_full_day_button(action, min_time)),
+        lambda: _build_time_keyboard(action, min_time),
+    )
+
+    # "time" 액션일 때만 현재 시간 버튼을 맨 위에 추가 (매번 시각이 바뀌므로 캐시하지 않음)
+    if action != "time":
+        return grid
+    current_time_str = datetime.datetime.now().strftime("%H%M")
+    current_row = [
+        InlineKeyboardButton(
+            "현재 시간", callback_data=encode_callback(action, current_time_str)
+        )
+    ]
+    return InlineKeyboardMarkup([current_row, *grid.inline_keyboard])
+
+
+def _has_full_day_button(action, min_time):
+    """23:59(하루 끝) 버튼을 추가할지 여부 - maxtime인 경우에만"""
+    return action == "maxtime" and (
+        not min_time
+        or int(min_time[:2]) < 23
+        or (int(min_time[:2]) == 23 and int(min_time[2:]) < 59)
+    )
+
+
+def _build_time_keyboard(action, min_time):
+    """create_time_keyboard의 시간 버튼을 캐시 없이 새로 만듦 (현재 시간 버튼 제외)"""
     if min_time is None:
         # 일반 시간 선택 (출발시간)
         start_hour = 6
         end_hour = 24
         hour_interval = 1
-        minute_interval = 30
+        minute_interval = MINUTE_INTERVAL
         start_minute = 0
     else:
         # 최대 시간 선택 (최대 출발시간)
@@ -31,25 +64,12 @@ def create_time_keyboard(action="time", min_time=None):
         start_hour = min_hour
         end_hour = 24
         hour_interval = 1
-        minute_interval = 30
+        minute_interval = MINUTE_INTERVAL
         start_minute = min_minute
 
     keyboard = []
     buttons = []
 
-    # "time" 액션일 때만 현재 시간 버튼을 맨 위에 추가
-    if action == "time":
-        current_time = datetime.datetime.now()
-        current_time_str = current_time.strftime("%H%M")
-        keyboard.append(
-            [
-                InlineKeyboardButton(
-                    "현재 시간",
-                    callback_data=create_callback_data(action, current_time_str),
-                )
-            ]
-        )
-
     for hour in range(start_hour, end_hour, hour_interval):
         if min_time and hour == start_hour:
             # 최소 시간이 있고 첫 번째 시간인 경우, 최소 분부터 시작
@@ -69,7 +89,7 @@ def create_time_keyboard(action="time", min_time=None):
                 buttons.append(
                     InlineKeyboardButton(
                         f"{hour:02d}:{minute:02d}",
-                        callback_data=create_callback_data(action, time_str),
+                        callback_data=encode_callback(action, time_str),
                     )
                 )
 
@@ -79,16 +99,12 @@ def create_time_keyboard(action="time", min_time=None):
         keyboard.append(row)
 
     # 23:59 추가 (하루 끝) - maxtime인 경우에만
-    if action == "maxtime" and (
-        not min_time
-        or int(min_time[:2]) < 23
-        or (int(min_time[:2]) == 23 and int(min_time[2:]) < 59)
-    ):
+    if _has_full_day_button(action, min_time):
         keyboard.append(
             [
                 InlineKeyboardButton(
                     "하루 전체",
-                    callback_data=create_callback_data(action, "2359"),
+                    callback_data=encode_callback(action, "2359"),
                 )
             ]
         )
@@ -108,30 +124,6 @@ def create_max_time_keyboard(min_time):
     return create_time_keyboard(action="maxtime", min_time=min_time)
 
 
-def handle_time_action(query_data):
-    """시간 선택 callback handler
-
-    Args:
-        query_data (str): 콜백 데이터 문자열 (action;time 또는 reselect_time)
-
-    Returns:
-        tuple[bool, str | None]: 시간 선택 여부와 선택된 시간을 포함하는 튜플
-            - 첫 번째 요소는 시간이 선택되었는지 여부(bool)
-            - 두 번째 요소는 선택된 시간(HHMM 형식) 또는 "reselect" 또는 None
-    """
-    ret_data = (False, None)
-    try:
-        if query_data == "reselect_time":
-            ret_data = True, "reselect"
-        else:
-            action, time_str = query_data.split(";")
-            if action in ["time", "maxtime"]:
-                ret_data = True, time_str
-    except ValueError:
-        pass
-    return ret_data
-
-
 def create_time_reselect_keyboard():
     """시간 선택 다시하기 버튼이 포함된 키보드 생성
 
@@ -139,6 +131,10 @@ def create_time_reselect_keyboard():
         InlineKeyboardMarkup: 시간 선택 다시하기 버튼이 포함된 인라인 키보드
     """
     keyboard = [
-        [InlineKeyboardButton("⬅️시간선택 다시하기", callback_data="reselect_time")]
+        [
+            InlineKeyboardButton(
+                "⬅️시간선택 다시하기", callback_data=encode_callback("reselect_time")
+            )
+        ]
     ]
     return InlineKeyboardMarkup(keyboard)
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+KTX_TRAIN_GROUP = "100"  # korail2 TrainType.KTX
+
+
+class TimetableCache:
+    """노선과 날짜별 열차 시간표 캐시
+
+    예약 확인 단계에서 검색 시간 범위에 실제로 어떤 열차가 있는지 보여주기 위해,
+    `(srcLocate, dstLocate, depDate)` key마다 한 번 조회한 시간표(매진 여부와 관계없는
+    열차 번호와 출발/도착 시각)를 `ttl`초 동안 재사용한다. 시간표는 좌석 상황과 달리
+    거의 바뀌지 않으므로 만료된 뒤에 다시 요청될 때만 낮은 빈도로 새로 조회한다.
+
+    시간표는 요청한 시간 범위만 조회하고, 같은 key의 다른 범위가 요청되면 겹치거나
+    이어지는 범위끼리 합쳐서 저장한다. 같은 key를 동시에 조회하면 하나의 조회 결과를
+    함께 기다린다.
+
+    Args:
+        ttl (float, optional): 시간표를 재사용할 시간(초). 기본값은 TIMETABLE_TTL 또는 1800
+        max_size (int, optional): 기억할 최대 노선/날짜 수. 기본값은 TIMETABLE_CACHE_SIZE 또는 256
+    """
+
+    def __init__(self, ttl=None, max_size=None):
+        self.ttl = (
+            ttl if ttl is not None else float(os.environ.get("TIMETABLE_TTL", "1800"))
+        )
+        self.max_size = (
+            max_size
+            if max_size is not None
+            else int(os.environ.get("TIMETABLE_CACHE_SIZE", "256"))
+        )
+        self._entries = {}
+        self._inflight = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    async def get(self, key, start, end, fetch):
+        """key의 시간표 중 출발 시각이 [start, end) 범위인 열차 목록
+
+        Args:
+            key (tuple): (srcLocate, dstLocate, depDate)
+            start (str): 범위 시작 (HHMM 형식)
+            end (str): 범위 끝 (HHMM 형식, 2400까지)
+            fetch (Callable[[str, str], Awaitable[list[dict]]]): 캐시가 범위를 덮지 못할 때
+                (start, end) 범위의 시간표를 조회할 코루틴 함수
+
+        Returns:
+            list[dict]: 출발 시각 순의 timetable_entry 목록
+
+        Raises:
+            Exception: fetch가 실패한 경우 그 예외
+        """
+        entry = self._entries.get(key)
+        if (
+            entry is not None
+            and time.monotonic() - entry["fetchedAt"] < self.ttl
+            and entry["start"] <= start
+            and end <= entry["end"]
+        ):
+            self.stats["hits"] += 1
+            return _in_range(entry["trains"], start, end)
+
+        inflight = self._inflight.get((key, start, end))
+        if inflight is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+            inflight = asyncio.ensure_future(fetch(start, end))
+            self._inflight[(key, start, end)] = inflight
+            inflight.add_done_callback(
+                lambda task: self._on_fetched(key, start, end, task)
+            )
+        return _in_range(await asyncio.shield(inflight), start, end)
+
+    def _on_fetched(self, key, start, end, task):
+        self._inflight.pop((key, start, end), None)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.stats["errors"] += 1
+            logger.warning(f"Timetable fetch for {key} failed: {task.exception()}")
+            return
+
+        trains = task.result()
+        entry = self._entries.pop(key, None)
+        if (
+            entry is not None
+            and time.monotonic() - entry["fetchedAt"] < self.ttl
+            and entry["start"] <= end
+            and start <= entry["end"]
+        ):
+            # 겹치거나 이어지는 범위는 합치고, 새로 조회한 열차 정보를 우선
+            merged = {train["trainNo"]: train for train in entry["trains"]}
+            merged.update((train["trainNo"], train) for train in trains)
+            trains = sorted(merged.values(), key=lambda train: train["depTime"])
+            start, end = min(start, entry["start"]), max(end, entry["end"])
+        self._entries[key] = {
+            "fetchedAt": time.monotonic(),
+            "start": start,
+            "end": end,
+            "trains": trains,
+        }
+        while len(self._entries) > self.max_size:
+            del self._entries[next(iter(self._entries))]
+
+    def snapshot(self):
+        return {**self.stats, "size": len(self._entries)}
+
+
+def timetable_entry(train):
+    """korail2 Train을 시간표에 저장할 dict로 변환"""
+    return {
+        "trainNo": train.train_no,
+        "trainGroup": train.train_group,
+        "trainTypeName": train.train_type_name,
+        "depTime": train.dep_time,
+        "arrTime": train.arr_time,
+    }
+
+
+def trains_of_type(timetable, trainType):
+    """시간표 중 예약할 열차 종류에 맞는 열차만 선택
+
+    Args:
+        timetable (list[dict]): TimetableCache.get의 반환값
+        trainType (str): korail2 TrainType 값 (KTX면 KTX 계열만)
+
+    Returns:
+        list[dict]: 선택된 열차 목록
+    """
+    if trainType != KTX_TRAIN_GROUP:
+        return list(timetable)
+    return [train for train in timetable if train["trainGroup"] == KTX_TRAIN_GROUP]
+
+
+def format_timetable(trains, limit=15):
+    """시간표를 메시지에 넣을 줄 목록으로 변환 (limit대를 넘으면 나머지는 개수만 표시)"""
+    lines = [
+        f"{train['trainTypeName']} {train['trainNo']} "
+        f"{train['depTime'][:2]}:{train['depTime'][2:4]} → "
+        f"{train['arrTime'][:2]}:{train['arrTime'][2:4]}"
+        for train in trains[:limit]
+    ]
+    if len(trains) > limit:
+        lines.append(f"외 {len(trains) - limit}대")
+    return "\n".join(lines)
+
+
+def _in_range(trains, start, end):
+    start, end = start.ljust(6, "0"), end.ljust(6, "0")
+    return [train for train in trains if start <= train["depTime"] < end]
+
+
+_timetable_cache = None
+
+
+def get_timetable_cache():
+    """프로세스에서 공유하는 TimetableCache 반환"""
+    global _timetable_cache
+    if _timetable_cache is None:
+        _timetable_cache = TimetableCache()
+    return _timetable_cache
@@ -0,0 +1,51 @@
+import asyncio
+import os
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """서로 다른 채팅의 update는 동시에, 같은 채팅의 update는 순서대로 처리
+
+    기본 update 처리기는 update를 하나씩 처리하므로, 한 사용자의 코레일 로그인을
+    기다리는 동안 다른 모든 사용자의 메시지가 밀린다. 대화 상태(userDict)는
+    채팅별로 순서대로 바뀌어야 하므로 채팅마다 lock을 두어 순서는 지킨다.
+
+    Args:
+        max_concurrent_updates (int, optional): 동시에 처리할 update 수.
+            기본값은 CONCURRENT_UPDATES 또는 32
+    """
+
+    def __init__(self, max_concurrent_updates=None):
+        super().__init__(
+            max_concurrent_updates
+            if max_concurrent_updates is not None
+            else int(os.environ.get("CONCURRENT_UPDATES", "32"))
+        )
+        self._chat_locks = {}
+
+    async def do_process_update(self, update, coroutine):
+        chat_id = None
+        if isinstance(update, Update) and update.effective_chat is not None:
+            chat_id = update.effective_chat.id
+        if chat_id is None:
+            await coroutine
+            return
+
+        # [lock, 처리중이거나 기다리는 update 수]
+        entry = self._chat_locks.setdefault(chat_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await coroutine
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._chat_locks[chat_id]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
@@ -1,9 +1,13 @@
 import sys
+import json
 import signal
 import logging
 import os
 from datetime import datetime
+from .errors import LoginRequiredError
 from .korail_client import ReserveHandler
+from .http_pool import record_pool_stats
+from .ipc import IpcClient
 
 # Configure logging
 # Create logs directory if it doesn't exist
@@ -27,23 +31,38 @@ logger = logging.getLogger(__name__)
 sys.setrecursionlimit(10**7)
 
 
-# def reserve(self, depDate, srcLocate, dstLocate, depTime='000000', trainType=TrainType.KTX, special=ReserveOption.GENERAL_FIRST, chatId="", maxDepTime'2400'):
 class BackProcess(object):
 
-    def __init__(self):
+    def __init__(self, spec):
+        self.spec = spec
+
+    def setup(self):
+        """작업 정보를 읽고 코레일에 로그인
+
+        Returns:
+            bool: 예약을 시작할 수 있으면 True
+        """
+        spec = self.spec
         try:
-            self.username = sys.argv[1]
-            self.password = sys.argv[2]
-            self.depDate = sys.argv[3]
-            self.srcLocate = sys.argv[4]
-            self.dstLocate = sys.argv[5]
-            self.depTime = sys.argv[6]
-            self.trainType = sys.argv[7]
-            self.specialInfo = sys.argv[8]
-            self.chatId = sys.argv[9]
-            self.maxDepTime = sys.argv[10]
+            self.username = spec["username"]
+            # 저장소에서 복구한 예약은 비밀번호 없이 저장된 세션만 받음
+            self.password = spec.get("password")
+            self.depDate = spec["depDate"]
+            self.srcLocate = spec["srcLocate"]
+            self.dstLocate = spec["dstLocate"]
+            self.depTime = spec["depTime"]
+            self.trainType = spec["trainType"]
+            self.specialInfo = spec["specialInfo"]
+            self.chatId = str(spec["chatId"])
+            self.maxDepTime = spec["maxDepTime"]
+            self.targetTrains = spec.get("targetTrains")
 
             self.reserve_handler = ReserveHandler()
+            # 봇 서버와 Unix socket으로 연결해 진행 상황과 결과를 전송
+            if spec.get("ipcSocket"):
+                self.reserve_handler.reporter = IpcClient(
+                    spec["ipcSocket"], spec["chatId"]
+                )
             self.max_retries = 3
             self.retry_count = 0
 
@@ -51,31 +70,54 @@ class BackProcess(object):
             signal.signal(signal.SIGTERM, self.handle_termination)
             signal.signal(signal.SIGINT, self.handle_termination)
 
-            if not self.reserve_handler.login(self.username, self.password):
+            # 봇에서 로그인 확인에 사용한 세션을 넘겨받았으면 다시 로그인하지 않음
+            if spec.get("session"):
+                logger.info("Using Korail session handed off from bot")
+                self.reserve_handler.restore_session(spec["session"], self.password)
+            elif self.password is None:
+                raise LoginRequiredError("저장된 코레일 세션이 없습니다")
+            elif not self.reserve_handler.login(self.username, self.password):
                 raise Exception("Failed to login")
 
+            # 세션 만료 전에 검색 루프 밖에서 미리 갱신
+            self.reserve_handler.session.start_background()
+
+            if self.reserve_handler.reporter is not None:
+                self.reserve_handler.reporter.start_heartbeat()
+            self.reserve_handler.emit("started")
+            return True
+
+        except LoginRequiredError as e:
+            logger.info(f"Login required: {str(e)}")
+            self.send_error_message(str(e), -2)
+            self.close()
+            return False
+
         except Exception as e:
             logger.error(f"Initialization error: {str(e)}")
             self.send_error_message(f"초기화 중 오류 발생: {str(e)}")
-            sys.exit(1)
+            self.close()
+            return False
 
     def handle_termination(self, signum, frame):
+        # IPC 전송 중에 받은 signal에서 다시 전송하면 같은 잠금을 기다리며 멈추므로,
+        # 여기서는 종료만 시작하고 종료 알림은 run()의 finally에서 보냄
         logger.info(f"Received termination signal {signum}")
-        self.cleanup()
         sys.exit(0)
 
     def cleanup(self):
         try:
-            if hasattr(self, "reserve_handler"):
+            # 예약 결과를 이미 보냈으면 종료 알림은 보내지 않음
+            if hasattr(self, "reserve_handler") and not self.reserve_handler.resultSent:
                 self.reserve_handler.sendBotStateChange(
                     self.chatId, "프로세스가 종료되었습니다.", 0
                 )
         except Exception as e:
             logger.error(f"Cleanup error: {str(e)}")
 
-    def send_error_message(self, message):
+    def send_error_message(self, message, status=0):
         try:
-            self.reserve_handler.sendBotStateChange(self.chatId, message, 0)
+            self.reserve_handler.sendBotStateChange(self.chatId, message, status)
         except Exception as e:
             logger.error(f"Failed to send error message: {str(e)}")
 
@@ -93,8 +135,11 @@ class BackProcess(object):
                         self.specialInfo,
                         self.chatId,
                         self.maxDepTime,
+                        self.targetTrains,
                     )
                     break
+                except LoginRequiredError:
+                    raise
                 except Exception as e:
                     self.retry_count += 1
                     logger.error(
@@ -106,6 +151,9 @@ class BackProcess(object):
                     else:
                         raise
 
+        except LoginRequiredError as e:
+            logger.info(f"Login required: {str(e)}")
+            self.send_error_message(str(e), -2)
         except Exception as e:
             logger.error(
                 f"Reservation failed after {self.max_retries} attempts: {str(e)}"
@@ -113,9 +161,44 @@ class BackProcess(object):
             self.send_error_message(f"예약 중 오류 발생: {str(e)}")
         finally:
             self.cleanup()
+            record_pool_stats()
+            self.close()
             logger.info(f"Reserve Job for {self.username} is end")
 
+    def close(self):
+        """작업에 사용한 세션 갱신 스레드와 IPC 연결 정리 (pool worker는 다음 작업을 받음)"""
+        if hasattr(self, "reserve_handler"):
+            self.reserve_handler.session.stop()
+            if self.reserve_handler.reporter is not None:
+                self.reserve_handler.reporter.close()
+
+
+def serve_pool():
+    """미리 실행되어 대기하는 pool worker
+
+    import와 로그 설정을 마친 상태로 stdin에서 작업 정보(JSON 한 줄)를 기다리고,
+    작업이 끝나면 다음 작업을 기다린다. 봇 서버가 stdin을 닫으면 종료된다.
+    작업 준비/종료 알림은 stdout으로 보내고, print 출력은 stderr(log 파일)로 보낸다.
+    """
+    control = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    control.write("ready\n")
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        proc = BackProcess(json.loads(line))
+        if proc.setup():
+            proc.run()
+        control.write("done\n")
+
 
 if __name__ == "__main__":
-    proc1 = BackProcess()
-    proc1.run()
+    if "--pool" in sys.argv:
+        serve_pool()
+    else:
+        # 작업 정보는 argv 대신 stdin으로 받아 비밀번호가 프로세스 목록에 노출되지 않게 함
+        proc1 = BackProcess(json.load(sys.stdin))
+        if not proc1.setup():
+            sys.exit(1)
+        proc1.run()
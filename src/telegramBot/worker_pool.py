@@ -0,0 +1,212 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import subprocess
+import sys
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class PooledWorker:
+    """pool에서 관리하는 worker 프로세스 하나의 상태"""
+
+    def __init__(self, process):
+        self.process = process
+        self.pid = process.pid
+        self.ready = False
+        self.chat_id = None
+        self.jobs = 0
+        self.retiring = False
+        self._buffer = b""
+
+
+class WorkerPool:
+    """import와 로그 설정을 마치고 대기하는 worker 프로세스 pool
+
+    예약을 확인하면 새 프로세스를 띄우는 대신 대기중인 worker의 stdin으로 작업
+    정보를 보내므로, 인터프리터 시작과 korail2/requests import 시간 없이 바로
+    로그인(또는 넘겨받은 세션 복원)과 검색을 시작한다. worker를 꺼내 쓰면 바로
+    다음 worker를 미리 띄워 `size`개를 대기 상태로 유지한다.
+
+    worker는 작업이 끝나면 다시 대기하고, `max_jobs`개의 작업을 처리하면 stdin을
+    닫아 종료시킨다(메모리 누수 등이 쌓이지 않도록 재시작).
+
+    Args:
+        supervisor (ProcessSupervisor): worker 종료를 감지할 감시자
+        on_job_end (Callable[[int, dict], Awaitable]): worker의 작업이 끝나거나 작업 중
+            worker가 종료되었을 때 호출할 코루틴 함수. (chat_id, info)를 인자로 받는다.
+        executor (BlockingExecutor): 프로세스 실행에 사용할 스레드 풀
+        size (int, optional): 대기시킬 worker 수. 기본값은 WORKER_POOL_SIZE 또는 2
+        max_jobs (int, optional): worker 하나가 처리할 최대 작업 수.
+            기본값은 WORKER_MAX_JOBS 또는 20
+    """
+
+    def __init__(self, supervisor, on_job_end, executor, size=None, max_jobs=None):
+        self.supervisor = supervisor
+        self.on_job_end = on_job_end
+        self.executor = executor
+        self.size = (
+            size if size is not None else int(os.environ.get("WORKER_POOL_SIZE", "2"))
+        )
+        self.max_jobs = (
+            max_jobs
+            if max_jobs is not None
+            else int(os.environ.get("WORKER_MAX_JOBS", "20"))
+        )
+        self.workers = {}
+        self._spawning = 0
+        self._closed = False
+        self.stats = {"spawned": 0, "warm_starts": 0, "cold_starts": 0, "recycled": 0}
+
+    @property
+    def idle(self):
+        return [
+            worker
+            for worker in self.workers.values()
+            if worker.chat_id is None and not worker.retiring
+        ]
+
+    async def start(self):
+        await self._refill()
+
+    async def submit(self, spec):
+        """대기중인 worker에 작업을 보내고 worker의 pid 반환
+
+        대기중인 worker가 없으면 새로 띄운 worker에 보낸다. worker는 준비가 끝나면
+        stdin에 쌓인 작업을 읽어 시작한다.
+        """
+        idle = self.idle
+        ready = [worker for worker in idle if worker.ready]
+        if ready or idle:
+            worker = (ready or idle)[0]
+            self.stats["warm_starts"] += 1
+        else:
+            worker = await self._spawn()
+            self.stats["cold_starts"] += 1
+
+        worker.chat_id = spec["chatId"]
+        worker.jobs += 1
+        worker.process.stdin.write(json.dumps(spec) + "\n")
+        worker.process.stdin.flush()
+        if worker.jobs >= self.max_jobs:
+            # 이번 작업이 끝나면 종료되도록 stdin을 닫음
+            worker.retiring = True
+            worker.process.stdin.close()
+            self.stats["recycled"] += 1
+
+        asyncio.get_running_loop().create_task(self._refill())
+        return worker.pid
+
+    async def close(self):
+        """대기중인 worker 종료 (작업중인 worker는 작업을 마치고 종료)"""
+        self._closed = True
+        for worker in list(self.workers.values()):
+            if not worker.process.stdin.closed:
+                worker.process.stdin.close()
+            self._detach(worker)
+
+    async def _refill(self):
+        while not self._closed and len(self.idle) + self._spawning < self.size:
+            await self._spawn()
+
+    async def _spawn(self):
+        self._spawning += 1
+        try:
+            process = await self.executor.run(_start_pool_process)
+        finally:
+            self._spawning -= 1
+        worker = PooledWorker(process)
+        self.workers[worker.pid] = worker
+        self.stats["spawned"] += 1
+
+        loop = asyncio.get_running_loop()
+        fd = process.stdout.fileno()
+        os.set_blocking(fd, False)
+        loop.add_reader(fd, self._read_control, worker)
+        self.supervisor.watch(process, None, on_exit=self._handle_exit)
+        logger.info(f"Pool worker {worker.pid} started")
+        return worker
+
+    def _read_control(self, worker):
+        """worker가 stdout으로 보내는 준비(ready)/작업 종료(done) 알림 처리"""
+        try:
+            data = os.read(worker.process.stdout.fileno(), 4096)
+        except BlockingIOError:
+            return
+        if not data:
+            self._detach(worker)
+            return
+
+        worker._buffer += data
+        *lines, worker._buffer = worker._buffer.split(b"\n")
+        for line in lines:
+            if line == b"ready":
+                worker.ready = True
+            elif line == b"done" and worker.chat_id is not None:
+                chat_id, worker.chat_id = worker.chat_id, None
+                asyncio.get_running_loop().create_task(
+                    self.on_job_end(chat_id, {"pid": worker.pid, "exitCode": None})
+                )
+                # 대기중인 worker가 이미 충분하면 종료
+                if (
+                    len(self.idle) + self._spawning > self.size
+                    and not worker.process.stdin.closed
+                ):
+                    worker.retiring = True
+                    worker.process.stdin.close()
+
+    async def _handle_exit(self, _, exit_info):
+        worker = self.workers.pop(exit_info["pid"], None)
+        if worker is None:
+            return
+        self._detach(worker)
+        if worker.chat_id is not None:
+            await self.on_job_end(worker.chat_id, exit_info)
+        await self._refill()
+
+    def _detach(self, worker):
+        if not worker.process.stdout.closed:
+            asyncio.get_running_loop().remove_reader(worker.process.stdout.fileno())
+            worker.process.stdout.close()
+
+
+def _start_pool_process():
+    cwd = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    logs_dir = os.path.join(os.path.dirname(__file__), "..", "..", "logs")
+    os.makedirs(logs_dir, exist_ok=True)
+
+    with open(os.path.join(logs_dir, "worker_pool.log"), "a") as log_file:
+        return subprocess.Popen(
+            [sys.executable, "-m", "telegramBot.worker", "--pool"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=log_file,
+            text=True,
+            cwd=cwd,
+            start_new_session=True,
+        )
+
+
+class LatencyRecorder:
+    """최근 `window`개 측정값의 평균, p95, 최대값 (예약 확인 → 첫 검색 시간 등)"""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds):
+        self._samples.append(seconds)
+
+    def snapshot(self):
+        if not self._samples:
+            return {"count": 0}
+        samples = sorted(self._samples)
+        p95 = samples[max(0, math.ceil(len(samples) * 0.95) - 1)]
+        return {
+            "count": len(samples),
+            "avg_ms": round(sum(samples) / len(samples) * 1000, 1),
+            "p95_ms": round(p95 * 1000, 1),
+            "max_ms": round(samples[-1] * 1000, 1),
+        }
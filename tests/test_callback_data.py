@@ -0,0 +1,70 @@
+import unittest
+from unittest import mock
+
+from telegramBot import callback_data
+from telegramBot.callback_data import MAX_LENGTH, CallbackCodec, CallbackDataError
+
+
+class CallbackCodecTest(unittest.TestCase):
+    def setUp(self):
+        self.codec = CallbackCodec(secret="test-secret", max_age_days=2)
+
+    def test_round_trip(self):
+        data = self.codec.encode("calendar_day", 2025, 1, 15)
+        self.assertLessEqual(len(data.encode()), MAX_LENGTH)
+        self.assertEqual(self.codec.decode(data), ("calendar_day", ("2025", "1", "15")))
+
+    def test_rejects_forged_signature(self):
+        data = self.codec.encode("station", "서울")
+        payload, _, signature = data.rpartition(".")
+        # 인자를 바꾸고 원래 서명을 그대로 붙인 경우
+        forged = payload.replace("서울", "부산") + "." + signature
+        with self.assertRaises(CallbackDataError):
+            self.codec.decode(forged)
+        # 다른 키로 서명한 경우
+        other = CallbackCodec(secret="other-secret").encode("station", "서울")
+        with self.assertRaises(CallbackDataError):
+            self.codec.decode(other)
+
+    def test_rejects_malformed_data(self):
+        for data in (None, "", "no-signature", "0s:1.AAAAAAAA"):
+            with self.assertRaises(CallbackDataError):
+                self.codec.decode(data)
+
+    def test_rejects_expired_data(self):
+        today = callback_data._today()
+        with mock.patch.object(callback_data, "_today", return_value=today - 3):
+            data = self.codec.encode("time", "0800")
+        with self.assertRaises(CallbackDataError):
+            self.codec.decode(data)
+
+        with mock.patch.object(callback_data, "_today", return_value=today - 2):
+            data = self.codec.encode("time", "0800")
+        self.assertEqual(self.codec.decode(data), ("time", ("0800",)))
+
+    def test_rejects_data_from_the_future(self):
+        today = callback_data._today()
+        with mock.patch.object(callback_data, "_today", return_value=today + 1):
+            data = self.codec.encode("time", "0800")
+        with self.assertRaises(CallbackDataError):
+            self.codec.decode(data)
+
+    def test_encode_enforces_length_limit(self):
+        # 한글은 3 byte이므로 글자 수가 아닌 byte 수로 제한
+        with self.assertRaises(ValueError):
+            self.codec.encode("station", "역" * 20)
+        self.assertLessEqual(
+            len(self.codec.encode("station", "역" * 10).encode()), MAX_LENGTH
+        )
+
+    def test_encode_rejects_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            self.codec.encode("unknown")
+        with self.assertRaises(ValueError):
+            self.codec.encode("time", "08:00")
+        with self.assertRaises(ValueError):
+            self.codec.encode("time", "08.00")
+
+
+if __name__ == "__main__":
+    unittest.main()
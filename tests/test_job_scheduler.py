@@ -0,0 +1,85 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from telegramBot.job_scheduler import JobScheduler, QueueFullError
+
+
+class JobSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    def scheduler(self, **kwargs):
+        self.started = []
+
+        async def start_job(job_id, payload):
+            self.started.append(job_id)
+
+        # 기본 동시 실행 수를 계산하지 않도록 요청 예산을 직접 지정
+        limiter = SimpleNamespace(global_rate=100, account_rate=100)
+        options = {"capacity": 2, "per_user": 1, "per_account": 10, "max_queue": 10}
+        options.update(kwargs)
+        return JobScheduler(start_job, rate_limiter=limiter, **options)
+
+    async def test_starts_jobs_up_to_capacity(self):
+        scheduler = self.scheduler(capacity=2)
+        self.assertEqual(await scheduler.submit(1, "a", "ka", {}), 0)
+        self.assertEqual(await scheduler.submit(2, "b", "kb", {}), 0)
+        self.assertEqual(await scheduler.submit(3, "c", "kc", {}), 1)
+        self.assertEqual(self.started, [1, 2])
+        self.assertEqual(scheduler.queued_ids(), [3])
+
+    async def test_rejects_when_queue_is_full(self):
+        scheduler = self.scheduler(capacity=1, max_queue=1)
+        await scheduler.submit(1, "a", "ka", {})
+        await scheduler.submit(2, "b", "kb", {})
+        with self.assertRaises(QueueFullError):
+            await scheduler.submit(3, "c", "kc", {})
+        self.assertEqual(scheduler.stats["rejected"], 1)
+
+    async def test_skips_jobs_blocked_by_user_and_account_limits(self):
+        scheduler = self.scheduler(capacity=3, per_user=1, per_account=1)
+        await scheduler.submit(1, "a", "ka", {})
+        # 사용자 한도와 계정 한도에 걸린 예약은 대기하고, 뒤의 예약은 바로 실행
+        self.assertEqual(await scheduler.submit(2, "a", "kb", {}), 1)
+        self.assertEqual(await scheduler.submit(3, "b", "ka", {}), 1)
+        self.assertEqual(await scheduler.submit(4, "c", "kc", {}), 0)
+        self.assertEqual(self.started, [1, 4])
+        self.assertEqual(scheduler.queued_ids(), [2, 3])
+
+    async def test_orders_by_running_jobs_per_user(self):
+        scheduler = self.scheduler(capacity=1, per_user=2)
+        await scheduler.submit(1, "a", "ka", {})
+        await scheduler.submit(2, "a", "ka", {})
+        await scheduler.submit(3, "b", "kb", {})
+        await scheduler.submit(4, "c", "kc", {})
+        # 실행중인 예약이 없는 사용자가 먼저, 같으면 먼저 들어온 순서
+        self.assertEqual(
+            [scheduler.position(job_id) for job_id in (3, 4, 2)], [1, 2, 3]
+        )
+        self.assertIsNone(scheduler.position(1))
+
+        scheduler.release(1)
+        await asyncio.sleep(0)
+        # 자리가 나면 실행중인 예약이 없어진 사용자의 먼저 들어온 예약부터 실행
+        self.assertEqual(self.started, [1, 2])
+        self.assertEqual([scheduler.position(job_id) for job_id in (3, 4)], [1, 2])
+
+    async def test_cancel_removes_waiting_job(self):
+        scheduler = self.scheduler(capacity=1)
+        await scheduler.submit(1, "a", "ka", {})
+        await scheduler.submit(2, "b", "kb", {})
+        self.assertTrue(scheduler.cancel(2))
+        self.assertFalse(scheduler.cancel(2))
+
+        scheduler.release(1)
+        await asyncio.sleep(0)
+        self.assertEqual(self.started, [1])
+        self.assertEqual(scheduler.running, {})
+
+    async def test_adopted_jobs_count_towards_capacity(self):
+        scheduler = self.scheduler(capacity=1)
+        scheduler.adopt(1, "a", "ka")
+        self.assertEqual(await scheduler.submit(2, "b", "kb", {}), 1)
+        self.assertEqual(self.started, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
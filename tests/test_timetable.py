@@ -0,0 +1,85 @@
+import unittest
+
+from telegramBot.timetable import TimetableCache
+
+KEY = ("서울", "부산", "20250115")
+
+TIMETABLE = [
+    {
+        "trainNo": f"{hour:03d}",
+        "trainGroup": "100",
+        "trainTypeName": "KTX",
+        "depTime": f"{hour:02d}0000",
+        "arrTime": f"{hour + 3:02d}0000",
+    }
+    for hour in range(6, 21)
+]
+
+
+class TimetableCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cache = TimetableCache(ttl=60, max_size=10)
+        self.fetched = []
+
+    async def fetch(self, start, end):
+        self.fetched.append((start, end))
+        start, end = start.ljust(6, "0"), end.ljust(6, "0")
+        return [train for train in TIMETABLE if start <= train["depTime"] < end]
+
+    async def get(self, start, end):
+        trains = await self.cache.get(KEY, start, end, self.fetch)
+        return [train["depTime"][:4] for train in trains]
+
+    def cached_range(self):
+        entry = self.cache._entries[KEY]
+        return entry["start"], entry["end"]
+
+    async def test_reuses_covering_range(self):
+        self.assertEqual(await self.get("0800", "1100"), ["0800", "0900", "1000"])
+        self.assertEqual(await self.get("0900", "1000"), ["0900"])
+        self.assertEqual(self.fetched, [("0800", "1100")])
+        self.assertEqual(self.cache.stats["hits"], 1)
+
+    async def test_merges_overlapping_ranges(self):
+        await self.get("0800", "1000")
+        await self.get("0900", "1200")
+        self.assertEqual(self.cached_range(), ("0800", "1200"))
+
+        # 합친 범위 안의 요청은 다시 조회하지 않고, 겹친 열차는 한 번만 포함
+        self.assertEqual(
+            await self.get("0800", "1200"), ["0800", "0900", "1000", "1100"]
+        )
+        self.assertEqual(self.fetched, [("0800", "1000"), ("0900", "1200")])
+
+    async def test_merges_adjacent_ranges(self):
+        await self.get("0800", "1000")
+        await self.get("1000", "1200")
+        self.assertEqual(self.cached_range(), ("0800", "1200"))
+        self.assertEqual(await self.get("0900", "1100"), ["0900", "1000"])
+        self.assertEqual(len(self.fetched), 2)
+
+    async def test_replaces_disjoint_range(self):
+        await self.get("0800", "0900")
+        await self.get("1000", "1100")
+        self.assertEqual(self.cached_range(), ("1000", "1100"))
+        await self.get("0800", "0900")
+        self.assertEqual(len(self.fetched), 3)
+
+    async def test_does_not_merge_expired_range(self):
+        self.cache.ttl = 0
+        await self.get("0800", "1000")
+        await self.get("0900", "1200")
+        self.assertEqual(self.cached_range(), ("0900", "1200"))
+
+    async def test_fetch_error_is_not_cached(self):
+        async def failing(start, end):
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            await self.cache.get(KEY, "0800", "1000", failing)
+        self.assertEqual(self.cache.stats["errors"], 1)
+        self.assertEqual(await self.get("0800", "1000"), ["0800", "0900"])
+
+
+if __name__ == "__main__":
+    unittest.main()